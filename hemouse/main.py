@@ -4,6 +4,8 @@ Main application entry point
 
 Usage:
     python main.py
+    python main.py --profiles                  Show learned detection profiles
+    python main.py --reset-profiles [app.exe]  Forget profiles (all or one app)
 
 Controls:
     CapsLock - Activate/Deactivate Hint mode
@@ -16,6 +18,8 @@ Controls:
 import sys
 import time
 import os
+import multiprocessing
+import win32process
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
@@ -23,9 +27,20 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 from core.hotkey_manager import HotkeyManager
 from core.element_detector import ElementDetector
 from core.label_generator import LabelGenerator
+from core.prefetch import PrefetchWorker, create_foreground_source
+from core.detection_profiles import ProfileStore
+from core.click_history import ClickHistory
+from core.stable_labels import StableLabelStore
+from core.ranking import ElementRanker
 from ui.overlay_window import OverlayWindow
+from ui.ui_thread import UIThread
 from modes.hint_mode import HintMode
-from modes.mode_manager import ModeManager, Mode
+from modes.grid_mode import GridMode
+from modes.mode_manager import ModeManager
+
+
+# Not a Caps chord: those make CapsLock toggle on release instead of on press
+GRID_HOTKEY = 'ctrl+alt+g'
 
 
 class HEMouseApp:
@@ -40,8 +55,24 @@ class HEMouseApp:
         print("🔧 Initializing components...")
         self.hotkey_manager = HotkeyManager()
         self.mode_manager = ModeManager()
-        self.element_detector = ElementDetector()
+        # Detection runs in a worker subprocess so a hung app cannot freeze HEMouse
+        self.element_detector = ElementDetector(isolated=True, profiles=ProfileStore())
         self.label_generator = LabelGenerator()
+        self.click_history = ClickHistory()
+        self.stable_labels = StableLabelStore(self.label_generator.charset)
+        self.ranker = ElementRanker()
+        # One overlay for all activations, built hidden on the UI thread at startup
+        self.overlay = OverlayWindow(renderer='image', transparency='colorkey')
+        # Only thread touching Tk: everything else sends it commands
+        self.ui = UIThread(setup=self.overlay.prepare)
+        self.prefetcher = PrefetchWorker(
+            detect=lambda hwnd: self.element_detector.get_clickable_elements(hwnd=hwnd),
+            generate_labels=self.label_generator.generate_labels,
+            source=create_foreground_source(),
+            thread_init=self.element_detector.provider.init_thread,
+            exclude=self._is_own_window,
+            fingerprint=self.element_detector.fingerprint
+        )
 
         self.hint_mode = None
         print("✅ Components initialized\n")
@@ -53,10 +84,20 @@ class HEMouseApp:
         # Register CapsLock hotkey callbacks
         self.hotkey_manager.register_hotkey('capslock_on', self._on_capslock_on)
         self.hotkey_manager.register_hotkey('capslock_off', self._on_capslock_off)
+        # Also while the handler thread waits for an activation
+        self.hotkey_manager.register_interrupt('capslock_off', self._on_capslock_off)
+        # Grid mode directly (chords need the keyboard hook, not the polling fallback)
+        self.hotkey_manager.register_hotkey('grid', self._on_grid_hotkey, keys=GRID_HOTKEY)
+
+        # Tk first: hotkey callbacks send it commands
+        self.ui.start()
 
         # Start hotkey monitoring
         self.hotkey_manager.start_monitoring()
 
+        # Start speculative detection on foreground changes
+        self.prefetcher.start()
+
         print("\n" + "=" * 60)
         print("✅ HEMouse is ready!")
         print("=" * 60)
@@ -64,8 +105,9 @@ class HEMouseApp:
         print("   1. Press CapsLock to activate Hint mode")
         print("   2. Type labels (a-z) to select elements")
         print("   3. Press Space to switch to Grid mode")
-        print("   4. Press ESC to exit current mode")
-        print("   5. Press Ctrl+C to exit HEMouse")
+        print(f"   4. Press {GRID_HOTKEY.title()} for Grid mode directly")
+        print("   5. Press ESC to exit current mode")
+        print("   6. Press Ctrl+C to exit HEMouse")
         print("\n⌛ Waiting for CapsLock...\n")
 
         # Main loop
@@ -77,29 +119,52 @@ class HEMouseApp:
 
     def _on_capslock_on(self):
         """Handle CapsLock ON event"""
-        if self.mode_manager.get_current_mode() == Mode.IDLE:
-            self.mode_manager.switch_mode(Mode.HINT)
-            self._activate_hint_mode()
+        transition = self.mode_manager.fire('hint')
+        if transition:
+            self._activate_hint_mode(transition)
 
     def _on_capslock_off(self):
-        """Handle CapsLock OFF event"""
-        if self.mode_manager.get_current_mode() == Mode.HINT:
-            if self.hint_mode:
-                self.hint_mode.deactivate()
-            self.mode_manager.switch_mode(Mode.IDLE)
-
-    def _activate_hint_mode(self):
-        """Activate Hint mode"""
-        overlay = OverlayWindow()
-        self.hint_mode = HintMode(overlay, self.element_detector, self.label_generator)
+        """Handle CapsLock OFF event: leaving Hint mode sets its cancel event, which ends the activation"""
+        self.mode_manager.fire('cancel')
+
+    def _on_grid_hotkey(self):
+        """Handle the Grid mode hotkey"""
+        transition = self.mode_manager.fire('grid')
+        if not transition:
+            return
+        try:
+            self.ui.run_mode(GridMode(overlay=self.overlay).activate)
+        except Exception as e:
+            print(f"❌ Grid mode error: {e}")
+        finally:
+            self.mode_manager.fire('exit', cancel=transition.cancel)
+
+    def _is_own_window(self, hwnd):
+        """Check if window belongs to HEMouse itself (overlay)"""
+        _, pid = win32process.GetWindowThreadProcessId(hwnd)
+        return pid == os.getpid()
+
+    def _activate_hint_mode(self, transition):
+        """
+        Activate Hint mode
+
+        Args:
+            transition: The mode manager's Transition into Mode.HINT
+        """
+        self.hint_mode = HintMode(self.overlay, self.element_detector, self.label_generator,
+                                  prefetcher=self.prefetcher, streaming=True,
+                                  history=self.click_history, stable_labels=self.stable_labels,
+                                  ranker=self.ranker, cancel_event=transition.cancel,
+                                  mode_manager=self.mode_manager)
 
         try:
-            self.hint_mode.activate()
+            # Blocks this (hotkey handler) thread until the mode has ended on the UI thread
+            self.ui.run_mode(self.hint_mode.activate)
         except Exception as e:
             print(f"❌ Hint mode error: {e}")
         finally:
-            # Return to IDLE after Hint mode exits
-            self.mode_manager.switch_mode(Mode.IDLE)
+            # Return to IDLE after Hint mode exits (stale if CapsLock OFF or Grid mode left it already)
+            self.mode_manager.fire('exit', cancel=transition.cancel)
             print("⌛ Ready for next CapsLock press...\n")
 
     def stop(self):
@@ -109,6 +174,15 @@ class HEMouseApp:
         print("=" * 60)
 
         self.hotkey_manager.stop_monitoring()
+        self.prefetcher.stop()
+        self.stable_labels.flush()
+        self.click_history.flush()
+        self.ui.stop()
+        print(f"📊 Mode transitions: {self.mode_manager.report()}")
+        stats = self.ui.latency_stats()
+        print(f"📊 UI commands: {stats['count']}, latency mean {stats['mean_ms']:.1f}ms, "
+              f"max {stats['max_ms']:.1f}ms")
+        self.element_detector.close()
 
         print("✅ HEMouse stopped")
         print("👋 Goodbye!\n")
@@ -117,6 +191,18 @@ class HEMouseApp:
 
 def main():
     """Main entry point"""
+    # Detection worker subprocess support in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
+
+    if len(sys.argv) > 1 and sys.argv[1] == '--profiles':
+        print(ProfileStore().inspect())
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == '--reset-profiles':
+        executable = sys.argv[2] if len(sys.argv) > 2 else None
+        ProfileStore().reset(executable)
+        print(f"✅ Reset detection profiles for {executable or 'all applications'}")
+        return
+
     try:
         app = HEMouseApp()
         app.start()
@@ -0,0 +1,208 @@
+"""
+HEMouse Click History
+Compact local store of clicked targets per application
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .detection_profiles import default_profile_path
+
+
+def default_history_path():
+    """clicks.json next to the detection profiles"""
+    return os.path.join(os.path.dirname(default_profile_path()), 'clicks.json')
+
+
+def element_fingerprint(record, origin=(0, 0), bucket=64, with_position=False):
+    """
+    Stable identity of an element across activations and app restarts
+
+    Runtime ids change when the app restarts, so the fingerprint uses the
+    control type and name. Unnamed elements add their position relative to
+    the window origin, rounded to `bucket` pixels.
+
+    Args:
+        record: ElementRecord
+        origin: (left, top) of the target window
+        bucket: Position rounding in pixels
+        with_position: Add the position for named elements too
+
+    Returns:
+        16-character hex string
+    """
+    key = f"{record.control_type}|{record.name}"
+    if with_position or not record.name:
+        key += f"|{(record.left - origin[0]) // bucket},{(record.top - origin[1]) // bucket}"
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class ClickHistory:
+    """
+    Exponentially decayed click counts per (application, element fingerprint)
+
+    Memory is bounded by max_apps x max_targets entries: the least recently
+    used application and the lowest scoring target are evicted. A lookup is
+    one dict access per element. record_click() runs on the click path, so it
+    never writes the file itself: changes are flushed from a background timer
+    (and by flush() on exit).
+    """
+
+    def __init__(self, path=None, max_apps=64, max_targets=512, half_life_days=14.0, autosave=True,
+                 save_delay=2.0):
+        """
+        Initialize store (loads existing history)
+
+        Args:
+            path: JSON file (default: default_history_path(); '' keeps history in memory only)
+            max_apps: Applications kept
+            max_targets: Targets kept per application
+            half_life_days: Days after which a click counts half
+            autosave: Write the file in the background after recorded clicks
+            save_delay: Seconds after a click before that write (later ones join it)
+        """
+        self.path = default_history_path() if path is None else path
+        self.max_apps = max_apps
+        self.max_targets = max_targets
+        self.half_life = half_life_days * 86400
+        self.autosave = autosave
+        self.save_delay = save_delay
+        self._apps = OrderedDict()  # app -> {fingerprint: [score, timestamp]}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # One writer at a time
+        self._dirty = False
+        self._timer = None
+        self.load()
+
+    def __len__(self):
+        return sum(len(targets) for targets in self._apps.values())
+
+    def load(self):
+        """Load history from disk (missing or corrupt file -> empty)"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            with self._lock:
+                self._apps = OrderedDict((app, dict(targets)) for app, targets in data.get('apps', {}).items())
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable click history: {e}")
+
+    def save(self):
+        """Write history to disk atomically (serialized outside the store lock)"""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                # Entries are replaced, never mutated: shallow copies are a consistent snapshot
+                apps = {app: dict(targets) for app, targets in self._apps.items()}
+                self._dirty = False
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'apps': apps}, f, separators=(',', ':'))
+            os.replace(temp_path, self.path)
+
+    def flush(self):
+        """Write pending changes now (e.g. on exit)"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            dirty = self._dirty
+        if dirty:
+            try:
+                self.save()
+            except OSError as e:
+                print(f"⚠️ Could not save click history: {e}")
+
+    def _schedule_save(self):
+        """Mark the store dirty and start the background write unless one is pending (lock held)"""
+        self._dirty = True
+        if self.autosave and self.path and self._timer is None:
+            self._timer = threading.Timer(self.save_delay, self._timed_save)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timed_save(self):
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    def _decayed(self, entry, now):
+        score, timestamp = entry
+        return score * 0.5 ** ((now - timestamp) / self.half_life)
+
+    def record_click(self, app, record, origin=(0, 0), now=None):
+        """
+        Count a click on an element
+
+        Args:
+            app: Application key (executable name)
+            record: Clicked ElementRecord
+            origin: (left, top) of the target window
+            now: Timestamp (default: time.time())
+        """
+        if not app:
+            return
+        now = time.time() if now is None else now
+        fingerprint = element_fingerprint(record, origin)
+
+        with self._lock:
+            app = app.lower()
+            targets = self._apps.pop(app, None)
+            if targets is None:
+                targets = {}
+                if len(self._apps) >= self.max_apps:
+                    self._apps.popitem(last=False)
+            self._apps[app] = targets  # Most recently used last
+
+            entry = targets.get(fingerprint)
+            score = self._decayed(entry, now) if entry else 0.0
+            targets[fingerprint] = [score + 1.0, now]
+
+            if len(targets) > self.max_targets:
+                # Never the target just clicked, or new targets could not build up
+                weakest = min((fp for fp in targets if fp != fingerprint),
+                              key=lambda fp: self._decayed(targets[fp], now))
+                del targets[weakest]
+
+            self._schedule_save()
+
+    def weights(self, app, records, origin=(0, 0), now=None):
+        """
+        Decayed click counts for a list of elements
+
+        Args:
+            app: Application key (executable name)
+            records: List of ElementRecord
+            origin: (left, top) of the target window
+            now: Timestamp (default: time.time())
+
+        Returns:
+            List of floats aligned with records (0.0 for never clicked)
+        """
+        with self._lock:
+            targets = self._apps.get(app.lower()) if app else None
+            if not targets:
+                return [0.0] * len(records)
+            now = time.time() if now is None else now
+            weights = []
+            for record in records:
+                entry = targets.get(element_fingerprint(record, origin))
+                weights.append(self._decayed(entry, now) if entry else 0.0)
+            return weights
+
+    def reset(self, app=None):
+        """Forget history (all or one application)"""
+        with self._lock:
+            if app is None:
+                self._apps.clear()
+            else:
+                self._apps.pop(app.lower(), None)
+            self._dirty = True
+        self.flush()
@@ -0,0 +1,103 @@
+"""
+HEMouse Element Deduplication
+Merges overlapping / nested clickables so each target gets one label
+"""
+from .detection_engine import matches_types
+from .spatial_index import SpatialGrid, iou
+
+
+# Most actionable first: a ListItem or TabItem wrapping a Button with almost
+# the same bounds keeps the Button
+ACTION_PRIORITY = (
+    'Button', 'CheckBox', 'RadioButton', 'ComboBox', 'Hyperlink',
+    'Edit', 'MenuItem', 'TabItem', 'TreeItem', 'ListItem'
+)
+
+
+def action_rank(record):
+    """Sort key for a record, lower is more actionable"""
+    for rank, control_type in enumerate(ACTION_PRIORITY):
+        if matches_types(record.control_type, (control_type,)):
+            break
+    else:
+        rank = len(ACTION_PRIORITY)
+    # Named before unnamed, then the tighter rect
+    return (rank, not record.name, record.width() * record.height())
+
+
+def _rect(record):
+    return (record.left, record.top, record.right, record.bottom)
+
+
+def _cell_size(elements):
+    """Cell size near the median element size"""
+    sizes = sorted(max(e.width(), e.height()) for e in elements)
+    return min(max(sizes[len(sizes) // 2], 16), 512)
+
+
+def dedupe_elements(elements, iou_threshold=0.7):
+    """
+    Suppress elements that overlap a more actionable one
+
+    Elements are visited in action_rank() order and kept unless a kept element
+    overlaps them with IoU >= iou_threshold. Overlap candidates come from a
+    SpatialGrid, so the whole pass is O(n log n) for the sort plus near
+    constant work per element.
+
+    Args:
+        elements: List of ElementRecord
+        iou_threshold: Minimum intersection over union to treat two rects as one target
+
+    Returns:
+        Kept elements in their original order
+    """
+    if len(elements) < 2:
+        return list(elements)
+
+    grid = SpatialGrid(_cell_size(elements))
+    keep = [False] * len(elements)
+
+    for index in sorted(range(len(elements)), key=lambda i: action_rank(elements[i])):
+        rect = _rect(elements[index])
+        if any(iou(rect, other) >= iou_threshold for other, _ in grid.query(rect)):
+            continue
+        grid.insert(rect, index)
+        keep[index] = True
+
+    return [element for element, kept in zip(elements, keep) if kept]
+
+
+class StreamingDeduper:
+    """
+    Incremental variant for streamed batches
+
+    Labels of earlier batches are already painted and cannot be taken back, so
+    within a batch the most actionable element wins and later batches only
+    drop elements that duplicate something already emitted.
+    """
+
+    def __init__(self, iou_threshold=0.7, cell_size=64):
+        self.iou_threshold = iou_threshold
+        self._grid = SpatialGrid(cell_size)
+        self.stats = {'seen': 0, 'kept': 0}
+
+    def filter(self, batch):
+        """
+        Filter one batch
+
+        Args:
+            batch: List of ElementRecord
+
+        Returns:
+            Elements of batch that are not duplicates, in batch order
+        """
+        self.stats['seen'] += len(batch)
+        kept = []
+        for element in dedupe_elements(batch, self.iou_threshold):
+            rect = _rect(element)
+            if any(iou(rect, other) >= self.iou_threshold for other, _ in self._grid.query(rect)):
+                continue
+            self._grid.insert(rect, element)
+            kept.append(element)
+        self.stats['kept'] += len(kept)
+        return kept
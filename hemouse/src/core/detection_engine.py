@@ -0,0 +1,583 @@
+"""
+HEMouse Detection Engines
+Platform-independent element detection on top of a UIA provider
+
+A provider wraps the actual UI Automation client. Every provider method except
+screen_bounds() and init_thread() is one cross-process round-trip:
+    init_thread()                       -> prepare calling thread (COM init)
+    window(hwnd)                        -> root element
+    children(element)                   -> list of child elements
+    control_type(element)               -> control type name ('Button', ...)
+    name(element)                       -> element name / window text
+    is_password(element)                -> bool
+    is_offscreen(element)               -> bool (UIA IsOffscreen)
+    rectangle(element)                  -> rect with left/top/right/bottom, width()/height()
+    visit_properties(element)           -> (control_type, rect, is_offscreen) in one cached request
+    runtime_id(element)                 -> UIA runtime id (tuple of ints)
+    find_by_runtime_id(root, runtime_id, control_type) -> live element or None
+    find_all_cached(root, control_types) -> list of CachedElement (single bulk request)
+    screen_bounds()                     -> (left, top, width, height) of the virtual screen
+
+The real provider lives in uia_provider.py (Windows only), a fake one for tests
+in fake_provider.py.
+"""
+import heapq
+import itertools
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .element_record import ElementRecord
+
+
+# High priority: Interactive UI controls
+HIGH_PRIORITY_TYPES = (
+    'Button', 'Hyperlink', 'MenuItem', 'TabItem',
+    'CheckBox', 'RadioButton', 'ComboBox'
+)
+
+# Medium priority: Input and selection (only with a meaningful name)
+MEDIUM_PRIORITY_TYPES = (
+    'Edit', 'ListItem', 'TreeItem'
+)
+
+# Low priority (excluded): Too generic, causes noise
+# 'Document', 'Text', 'Pane', 'Group'
+CLICKABLE_TYPES = HIGH_PRIORITY_TYPES + MEDIUM_PRIORITY_TYPES
+
+
+# Containers that clip their children to their own bounds when scrolled
+SCROLL_CONTAINER_TYPES = ('List', 'Tree', 'DataGrid', 'Table', 'Document')
+
+
+# One element returned by a bulk query, with its properties already cached
+CachedElement = namedtuple('CachedElement', ['runtime_id', 'control_type', 'name', 'rect', 'is_password',
+                                             'is_offscreen'], defaults=[False])
+
+# Result of inspecting one node: record (or None), whether to descend,
+# clip rect for the children, and the node's rect if it was fetched
+Visit = namedtuple('Visit', ['record', 'descend', 'clip', 'rect'])
+
+
+def matches_types(control_type, types):
+    """Check control type against a type list (substring match, 'Button' covers 'SplitButton')"""
+    return any(t in control_type for t in types)
+
+
+def priority_tier(control_type, name):
+    """
+    Priority of an element by control type
+
+    Args:
+        control_type: UIA control type name
+        name: Element name (only fetched/needed for medium priority types)
+
+    Returns:
+        2 for high priority, 1 for named medium priority, 0 if not clickable
+    """
+    # Check high priority first
+    if matches_types(control_type, HIGH_PRIORITY_TYPES):
+        return 2
+
+    # Medium priority: only include if element has meaningful name
+    if matches_types(control_type, MEDIUM_PRIORITY_TYPES):
+        return 1 if name and len(name.strip()) > 0 else 0
+
+    return 0
+
+
+def is_clickable_type(control_type, name):
+    """
+    Check if an element is clickable with priority filtering
+
+    Args:
+        control_type: UIA control type name
+        name: Element name (only fetched/needed for medium priority types)
+
+    Returns:
+        True if the element should get a label
+    """
+    return priority_tier(control_type, name) > 0
+
+
+def distance_to_rect(point, rect):
+    """Euclidean distance from point (x, y) to the nearest point of rect (0 inside)"""
+    x, y = point
+    dx = max(rect.left - x, 0, x - rect.right)
+    dy = max(rect.top - y, 0, y - rect.bottom)
+    return (dx * dx + dy * dy) ** 0.5
+
+
+def intersects_clip(rect, clip):
+    """
+    Check if rect overlaps clip (left, top, right, bottom)
+
+    Empty rects are treated as unknown and never pruned: some containers
+    report no bounds although their children are visible.
+    """
+    if rect.right <= rect.left or rect.bottom <= rect.top:
+        return True
+    return rect.left < clip[2] and rect.right > clip[0] and rect.top < clip[3] and rect.bottom > clip[1]
+
+
+def clip_to_rect(clip, rect):
+    """Intersect clip (left, top, right, bottom) with a non-empty rect"""
+    if rect.right <= rect.left or rect.bottom <= rect.top:
+        return clip
+    return (max(clip[0], rect.left), max(clip[1], rect.top),
+            min(clip[2], rect.right), min(clip[3], rect.bottom))
+
+
+def screen_clip(screen_bounds):
+    """Convert (left, top, width, height) screen bounds to a clip rect"""
+    left, top, width, height = screen_bounds
+    return (left, top, left + width, top + height)
+
+
+def is_visible_on_screen(rect, screen_bounds):
+    """
+    Check if element is visible on screen with size filtering
+
+    Args:
+        rect: Element rectangle
+        screen_bounds: (left, top, width, height) of the virtual screen
+
+    Returns:
+        True if the element is on screen and reasonably sized
+    """
+    screen_left, screen_top, screen_width, screen_height = screen_bounds
+
+    # Element must be within virtual screen bounds (with small margin)
+    within_bounds = (
+        rect.left >= screen_left - 100 and
+        rect.top >= screen_top - 100 and
+        rect.right <= screen_left + screen_width + 100 and
+        rect.bottom <= screen_top + screen_height + 100
+    )
+
+    # Element must be reasonably sized (filter out tiny decorations)
+    min_width = 20  # Minimum 20 pixels wide
+    min_height = 15  # Minimum 15 pixels tall
+    reasonable_size = rect.width() >= min_width and rect.height() >= min_height
+
+    # Element should not be too large (likely container/pane, not clickable)
+    max_width = screen_width * 0.8  # Max 80% of screen width
+    max_height = screen_height * 0.8  # Max 80% of screen height
+    not_too_large = rect.width() <= max_width and rect.height() <= max_height
+
+    return within_bounds and reasonable_size and not_too_large
+
+
+class TreeWalkEngine:
+    """
+    Recursive tree walk, one provider call per node and property
+
+    With pruning enabled, a node that reports IsOffscreen or whose rect lies
+    outside the current clip (screen, narrowed by every scroll container on
+    the way down) is skipped together with its whole subtree. Control type,
+    rect and IsOffscreen then come back in one round-trip per node
+    (visit_properties), so pruning costs no extra calls.
+    """
+
+    name = 'tree'
+
+    def __init__(self, provider, prune=True):
+        """
+        Args:
+            provider: UIA provider
+            prune: Skip offscreen and clipped subtrees
+        """
+        self.provider = provider
+        self.prune = prune
+        self.stats = self._new_stats()
+        self._stats_lock = threading.Lock()
+        self._types = None
+
+    def _new_stats(self):
+        # found_depth: deepest level with a clickable, cut: subtrees left
+        # unexplored by max_depth (both feed detection profiles)
+        return {'visited': 0, 'pruned': 0, 'found_depth': None, 'cut': 0}
+
+    def _count(self, stat):
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def _found(self, depth):
+        with self._stats_lock:
+            if self.stats['found_depth'] is None or depth > self.stats['found_depth']:
+                self.stats['found_depth'] = depth
+
+    def detect(self, root, exclude_password=True, max_depth=6, timeout=2.0, control_types=None):
+        """
+        Detect clickable elements below root
+
+        Args:
+            root: Root element (usually the foreground window)
+            exclude_password: Skip password fields
+            max_depth: Maximum recursion depth
+            timeout: Maximum time in seconds
+            control_types: Restrict labels to these clickable types (default: all)
+
+        Returns:
+            List of ElementRecord
+        """
+        elements = []
+        self.stats = self._new_stats()
+        self._types = control_types
+        screen_bounds = self.provider.screen_bounds()
+        self._traverse_elements(root, elements, exclude_password, screen_bounds, screen_clip(screen_bounds),
+                                depth=0, max_depth=max_depth,
+                                start_time=time.time(), timeout=timeout)
+        return elements
+
+    def iter_batches(self, root, exclude_password=True, max_depth=6, timeout=2.0,
+                     batch_size=20, cursor=None, flush_interval=0.05, control_types=None):
+        """
+        Stream clickable elements in batches, breadth-first
+
+        Shallow elements come first (the visible top of the tree); within a
+        level, subtrees whose parent is closest to the cursor are explored first.
+
+        Args:
+            root: Root element (usually the foreground window)
+            exclude_password: Skip password fields
+            max_depth: Maximum depth
+            timeout: Maximum time in seconds
+            batch_size: Elements per batch
+            cursor: (x, y) cursor position for prioritization, or None
+            flush_interval: Yield a partial batch after this many seconds
+            control_types: Restrict labels to these clickable types (default: all)
+
+        Yields:
+            Lists of ElementRecord
+        """
+        provider = self.provider
+        self.stats = self._new_stats()
+        self._types = control_types
+        screen_bounds = provider.screen_bounds()
+        start_time = time.time()
+        last_flush = start_time
+
+        sequence = itertools.count()
+        # (depth, cursor distance, order, element, clip)
+        heap = [(0, 0, next(sequence), root, screen_clip(screen_bounds))]
+        batch = []
+
+        while heap:
+            # Check timeout to prevent hanging on slow windows
+            now = time.time()
+            if now - start_time > timeout:
+                break
+
+            depth, _, _, element, clip = heapq.heappop(heap)
+            try:
+                visit = self._visit(element, exclude_password, screen_bounds, clip)
+                if visit.record:
+                    batch.append(visit.record)
+                    self._found(depth)
+
+                if visit.descend and depth >= max_depth:
+                    self._count('cut')
+                elif visit.descend:
+                    distance = 0
+                    if cursor is not None:
+                        rect = visit.rect if visit.rect is not None else provider.rectangle(element)
+                        distance = distance_to_rect(cursor, rect)
+                    for child in provider.children(element):
+                        heapq.heappush(heap, (depth + 1, distance, next(sequence), child, visit.clip))
+            except Exception:
+                pass  # Ignore inaccessible elements
+
+            if batch and (len(batch) >= batch_size or now - last_flush >= flush_interval):
+                yield batch
+                batch = []
+                last_flush = time.time()
+
+        if batch:
+            yield batch
+
+    def _traverse_elements(self, element, result_list, exclude_password, screen_bounds, clip,
+                           depth=0, max_depth=6, start_time=None, timeout=2.0):
+        """Recursively traverse UI element tree with timeout protection"""
+        # Check timeout to prevent hanging on slow windows
+        if start_time and (time.time() - start_time) > timeout:
+            return
+
+        if depth > max_depth:
+            self._count('cut')
+            return
+
+        try:
+            visit = self._visit(element, exclude_password, screen_bounds, clip)
+            if visit.record:
+                result_list.append(visit.record)
+                self._found(depth)
+
+            # Recursively process children
+            if visit.descend:
+                for child in self.provider.children(element):
+                    self._traverse_elements(child, result_list, exclude_password, screen_bounds, visit.clip,
+                                            depth + 1, max_depth, start_time, timeout)
+
+        except Exception:
+            pass  # Ignore inaccessible elements
+
+    def _visit(self, element, exclude_password, screen_bounds, clip):
+        """
+        Inspect one element
+
+        Args:
+            element: Element to inspect
+            exclude_password: Skip password fields
+            screen_bounds: (left, top, width, height) of the virtual screen
+            clip: Visible area (left, top, right, bottom) inherited from ancestors
+
+        Returns:
+            Visit tuple
+        """
+        provider = self.provider
+        self._count('visited')
+
+        rect = None
+        if self.prune:
+            # Prune whole subtree before touching any child
+            control_type, rect, offscreen = provider.visit_properties(element)
+            if offscreen or not intersects_clip(rect, clip):
+                self._count('pruned')
+                return Visit(None, False, clip, rect)
+        else:
+            control_type = provider.control_type(element)
+        # Types filtered out by the caller (detection profile) cost no name fetch
+        wanted = self._types is None or matches_types(control_type, self._types)
+        name = None
+        if wanted and matches_types(control_type, MEDIUM_PRIORITY_TYPES):
+            name = provider.name(element)
+
+        record = None
+
+        # Check if element is clickable
+        if wanted and is_clickable_type(control_type, name):
+            # Exclude password fields
+            if exclude_password and control_type == 'Edit' and provider.is_password(element):
+                return Visit(None, False, clip, rect)
+
+            # Get element rectangle
+            if rect is None:
+                rect = provider.rectangle(element)
+            if is_visible_on_screen(rect, screen_bounds):
+                record = ElementRecord.from_rect(
+                    rect, control_type,
+                    name if name is not None else provider.name(element),
+                    provider.runtime_id(element)
+                )
+
+        # Scroll containers clip their children
+        if self.prune and control_type in SCROLL_CONTAINER_TYPES:
+            clip = clip_to_rect(clip, rect)
+
+        return Visit(record, True, clip, rect)
+
+
+class BulkQueryEngine:
+    """
+    Single FindAll over an OR condition of the clickable control types,
+    with all needed properties cached in the same request
+
+    The subtree is fetched in one round-trip, so max_depth and timeout cannot
+    cut the walk short; they are accepted for interface compatibility.
+    """
+
+    name = 'bulk'
+
+    def __init__(self, provider, prune=True):
+        """
+        Args:
+            provider: UIA provider
+            prune: Drop elements reporting IsOffscreen (cached in the same request)
+        """
+        self.provider = provider
+        self.prune = prune
+        self.stats = {'visited': 0, 'pruned': 0, 'found_depth': None, 'cut': 0}
+
+    def detect(self, root, exclude_password=True, max_depth=6, timeout=2.0, control_types=None):
+        """
+        Detect clickable elements below root
+
+        Args:
+            root: Root element (usually the foreground window)
+            exclude_password: Skip password fields
+            max_depth: Unused (the bulk query covers the whole subtree)
+            timeout: Unused (the bulk query is a single call)
+            control_types: Restrict the query to these clickable types (default: all)
+
+        Returns:
+            List of ElementRecord
+        """
+        elements = []
+        screen_bounds = self.provider.screen_bounds()
+
+        found = self.provider.find_all_cached(root, control_types or CLICKABLE_TYPES)
+        # Depth is unknown to a flat query
+        self.stats = {'visited': len(found), 'pruned': 0, 'found_depth': None, 'cut': 0}
+
+        for cached in found:
+            if self.prune and cached.is_offscreen:
+                self.stats['pruned'] += 1
+                continue
+            if not is_clickable_type(cached.control_type, cached.name):
+                continue
+            if exclude_password and cached.control_type == 'Edit' and cached.is_password:
+                continue
+            if is_visible_on_screen(cached.rect, screen_bounds):
+                elements.append(ElementRecord.from_rect(cached.rect, cached.control_type,
+                                                        cached.name, cached.runtime_id))
+
+        return elements
+
+    def iter_batches(self, root, exclude_password=True, max_depth=6, timeout=2.0,
+                     batch_size=20, cursor=None, flush_interval=0.05, control_types=None):
+        """
+        Stream clickable elements in batches
+
+        The bulk query returns everything at once, so batches are only a
+        client-side split, ordered by distance to the cursor when given.
+        """
+        elements = self.detect(root, exclude_password, max_depth, timeout, control_types)
+        if cursor is not None:
+            elements.sort(key=lambda e: distance_to_rect(cursor, e))
+        for i in range(0, len(elements), batch_size):
+            yield elements[i:i + batch_size]
+
+
+class ParallelTreeWalkEngine(TreeWalkEngine):
+    """
+    Tree walk that hands subtrees below split_depth to a thread pool
+
+    Detection time is dominated by waiting on cross-process calls, so several
+    threads walking disjoint subtrees overlap that latency. Each pool thread
+    runs provider.init_thread() (COM MTA init) once. Results are merged in
+    the order of the sequential walk, and all workers share one deadline.
+    """
+
+    name = 'parallel'
+
+    def __init__(self, provider, workers=4, split_depth=2, prune=True):
+        """
+        Args:
+            provider: UIA provider
+            workers: Thread pool size
+            split_depth: Depth at which subtrees are handed to the pool
+            prune: Skip offscreen and clipped subtrees
+        """
+        super().__init__(provider, prune)
+        self.workers = workers
+        self.split_depth = split_depth
+        self._executor = None
+
+    def detect(self, root, exclude_password=True, max_depth=6, timeout=2.0, control_types=None):
+        """
+        Detect clickable elements below root
+
+        Args:
+            root: Root element (usually the foreground window)
+            exclude_password: Skip password fields
+            max_depth: Maximum recursion depth
+            timeout: Maximum time in seconds, shared by all workers
+            control_types: Restrict labels to these clickable types (default: all)
+
+        Returns:
+            List of ElementRecord
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                initializer=self.provider.init_thread,
+                                                thread_name_prefix='hemouse-detect')
+
+        self.stats = self._new_stats()
+        self._types = control_types
+        screen_bounds = self.provider.screen_bounds()
+        start_time = time.time()
+
+        # Records found above split_depth and futures for the subtrees below,
+        # in sequential walk order
+        segments = []
+        self._split_walk(root, segments, exclude_password, screen_bounds, screen_clip(screen_bounds),
+                         0, max_depth, start_time, timeout)
+
+        elements = []
+        for segment in segments:
+            if isinstance(segment, ElementRecord):
+                elements.append(segment)
+            else:
+                remaining = max(timeout - (time.time() - start_time), 0) + 0.5
+                try:
+                    elements.extend(segment.result(timeout=remaining))
+                except Exception:
+                    segment.cancel()  # Deadline passed - drop this subtree
+        return elements
+
+    def _split_walk(self, element, segments, exclude_password, screen_bounds, clip,
+                    depth, max_depth, start_time, timeout):
+        """Walk the top of the tree on the calling thread, submitting deeper subtrees"""
+        if (time.time() - start_time) > timeout:
+            return
+        if depth > max_depth:
+            self._count('cut')
+            return
+
+        if depth == self.split_depth:
+            segments.append(self._executor.submit(
+                self._walk_subtree, element, exclude_password, screen_bounds, clip,
+                depth, max_depth, start_time, timeout))
+            return
+
+        try:
+            visit = self._visit(element, exclude_password, screen_bounds, clip)
+            if visit.record:
+                segments.append(visit.record)
+                self._found(depth)
+            if visit.descend:
+                for child in self.provider.children(element):
+                    self._split_walk(child, segments, exclude_password, screen_bounds, visit.clip,
+                                     depth + 1, max_depth, start_time, timeout)
+        except Exception:
+            pass  # Ignore inaccessible elements
+
+    def _walk_subtree(self, element, exclude_password, screen_bounds, clip,
+                      depth, max_depth, start_time, timeout):
+        """Sequential walk of one subtree (pool thread)"""
+        result = []
+        self._traverse_elements(element, result, exclude_password, screen_bounds, clip,
+                                depth, max_depth, start_time, timeout)
+        return result
+
+    def close(self):
+        """Shut down thread pool"""
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+ENGINES = {
+    TreeWalkEngine.name: TreeWalkEngine,
+    BulkQueryEngine.name: BulkQueryEngine,
+    ParallelTreeWalkEngine.name: ParallelTreeWalkEngine,
+}
+
+
+def create_engine(backend, provider, **options):
+    """
+    Create detection engine by backend name
+
+    Args:
+        backend: 'tree', 'bulk' or 'parallel'
+        provider: UIA provider instance
+        **options: Engine specific options (parallel: workers, split_depth)
+
+    Returns:
+        Engine instance
+    """
+    if backend not in ENGINES:
+        raise ValueError(f"Unknown detection backend: {backend} (available: {', '.join(ENGINES)})")
+    return ENGINES[backend](provider, **options)
@@ -0,0 +1,220 @@
+"""
+HEMouse Detection Profiles
+Per-application detection settings learned from past runs
+"""
+import json
+import os
+import threading
+import time
+
+from .detection_engine import HIGH_PRIORITY_TYPES, MEDIUM_PRIORITY_TYPES, matches_types
+
+
+def default_profile_path():
+    """profiles.json in %APPDATA%\\HEMouse (home directory elsewhere)"""
+    base = os.environ.get('APPDATA') or os.path.expanduser('~')
+    return os.path.join(base, 'HEMouse', 'profiles.json')
+
+
+class ProfileStore:
+    """
+    Detection profiles keyed by process executable name
+
+    A profile records per run the deepest level at which clickables were
+    found, whether the depth limit cut off parts of the tree, the number of
+    visited nodes, the detection latency, the control types found and the
+    number of elements (expected_elements() sizes streamed labels by it).
+    tuned() turns that into max_depth, timeout and control type filter for
+    the next detection in the same application:
+
+    - depth: deepest hit + 1. Clickables below a cut-off cannot be seen, so
+      when the tree was cut every explore_every-th run probes down to
+      max_depth_cap; deeper hits found that way raise the profile depth
+    - timeout: 3x the typical latency, within [min_timeout, max_timeout]
+    - types: medium priority types (which cost an extra name fetch) that
+      never produced a clickable in min_runs runs are skipped, except on
+      every explore_every-th run, which looks for all types so that types
+      appearing later (a new view, a plugin) join the profile
+    """
+
+    def __init__(self, path=None, smoothing=0.3, min_runs=5, max_depth_cap=12, explore_every=10,
+                 min_timeout=1.0, max_timeout=4.0, autosave=True):
+        """
+        Initialize store (loads existing profiles)
+
+        Args:
+            path: JSON file (default: default_profile_path(); '' keeps profiles in memory only)
+            smoothing: Weight of the newest run in the moving averages
+            min_runs: Runs before the type filter is applied
+            max_depth_cap: Upper bound for the tuned depth (and depth of probing runs)
+            explore_every: Probe deeper (while the tree is being cut) and for all control
+                           types on every n-th run
+            min_timeout: Lower bound for the tuned timeout (seconds)
+            max_timeout: Upper bound for the tuned timeout (seconds)
+            autosave: Write the file after every recorded run
+        """
+        self.path = default_profile_path() if path is None else path
+        self.smoothing = smoothing
+        self.min_runs = min_runs
+        self.max_depth_cap = max_depth_cap
+        self.explore_every = explore_every
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.autosave = autosave
+        self._profiles = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def load(self):
+        """Load profiles from disk (missing or corrupt file -> empty)"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            with self._lock:
+                self._profiles = dict(data.get('profiles', {}))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable detection profiles: {e}")
+
+    def save(self):
+        """Write profiles to disk atomically"""
+        if not self.path:
+            return
+        with self._lock:
+            data = {'version': 1, 'profiles': self._profiles}
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(temp_path, self.path)
+
+    def get(self, executable):
+        """Profile dict for an executable, or None"""
+        with self._lock:
+            profile = self._profiles.get(self._key(executable))
+            return dict(profile) if profile else None
+
+    def record(self, executable, found_depth, cut, visited, latency, control_types, found=None):
+        """
+        Record one detection run
+
+        Args:
+            executable: Process executable name ('explorer.exe')
+            found_depth: Deepest level with a clickable (None if none or unknown, e.g. bulk backend)
+            cut: Whether the depth limit left subtrees unexplored
+            visited: Number of visited nodes
+            latency: Detection time in seconds
+            control_types: Control types of the found elements
+            found: Number of elements found (None if unknown)
+        """
+        if not executable:
+            return
+
+        alpha = self.smoothing
+        with self._lock:
+            key = self._key(executable)
+            profile = self._profiles.get(key)
+            if profile is None:
+                profile = self._profiles[key] = {
+                    'runs': 0, 'depth': None, 'cut': False,
+                    'nodes': float(visited), 'latency': float(latency), 'types': [],
+                }
+
+            profile['runs'] += 1
+            if found_depth is not None:
+                profile['depth'] = found_depth if profile['depth'] is None else max(
+                    found_depth, profile['depth'] - 1)  # Let the depth shrink slowly
+            profile['cut'] = bool(cut)
+            profile['nodes'] += alpha * (visited - profile['nodes'])
+            profile['latency'] += alpha * (latency - profile['latency'])
+            profile['types'] = sorted(set(profile['types']) | set(control_types))
+            if found is not None:
+                # Older profiles have no element count yet
+                count = profile.get('elements')
+                profile['elements'] = float(found) if count is None else count + alpha * (found - count)
+            profile['updated'] = time.time()
+
+        if self.autosave:
+            try:
+                self.save()
+            except OSError as e:
+                print(f"⚠️ Could not save detection profiles: {e}")
+
+    def tuned(self, executable, max_depth=6, timeout=2.0):
+        """
+        Detection options for an executable
+
+        Args:
+            executable: Process executable name
+            max_depth: Default depth (no profile yet)
+            timeout: Default timeout (no profile yet)
+
+        Returns:
+            Dict with max_depth, timeout and control_types (None = all clickable types)
+        """
+        options = {'max_depth': max_depth, 'timeout': timeout, 'control_types': None}
+        profile = self.get(executable)
+        if not profile:
+            return options
+
+        probe = (profile['runs'] - 1) % self.explore_every == 0
+        if profile['cut'] and probe:
+            options['max_depth'] = self.max_depth_cap
+        elif profile['depth'] is not None:
+            options['max_depth'] = min(max(profile['depth'] + 1, 2), self.max_depth_cap)
+
+        options['timeout'] = min(max(profile['latency'] * 3, self.min_timeout), self.max_timeout)
+
+        if profile['runs'] >= self.min_runs and not probe:
+            seen = profile['types']
+            skipped = [t for t in MEDIUM_PRIORITY_TYPES if not any(matches_types(s, (t,)) for s in seen)]
+            if skipped:
+                options['control_types'] = HIGH_PRIORITY_TYPES + tuple(
+                    t for t in MEDIUM_PRIORITY_TYPES if t not in skipped)
+
+        return options
+
+    def expected_elements(self, executable):
+        """Typical number of elements found in an executable's windows, or None"""
+        profile = self.get(executable)
+        if not profile or profile.get('elements') is None:
+            return None
+        return round(profile['elements'])
+
+    def reset(self, executable=None):
+        """
+        Forget learned profiles
+
+        Args:
+            executable: Only this application (default: all)
+        """
+        with self._lock:
+            if executable is None:
+                self._profiles.clear()
+            else:
+                self._profiles.pop(self._key(executable), None)
+        self.save()
+
+    def inspect(self):
+        """Human-readable summary of all profiles"""
+        with self._lock:
+            profiles = sorted(self._profiles.items())
+        if not profiles:
+            return "No detection profiles yet"
+
+        lines = [f"{'Application':<28} {'Runs':>5} {'Depth':>5} {'Nodes':>7} {'Latency':>8}  Tuned"]
+        for executable, profile in profiles:
+            tuned = self.tuned(executable)
+            depth = '-' if profile['depth'] is None else profile['depth']
+            types = 'all types' if tuned['control_types'] is None else f"{len(tuned['control_types'])} types"
+            lines.append(f"{executable:<28} {profile['runs']:>5} {depth:>5} {profile['nodes']:>7.0f} "
+                         f"{profile['latency'] * 1000:>6.0f}ms  depth {tuned['max_depth']}, "
+                         f"timeout {tuned['timeout']:.1f}s, {types}")
+        return "\n".join(lines)
+
+    def _key(self, executable):
+        return executable.lower()
@@ -0,0 +1,281 @@
+"""
+HEMouse Detection Worker
+Runs detection in a persistent subprocess so a hung UIA provider can be killed
+
+A provider blocked inside a single COM call cannot be interrupted by the
+engines' timeout checks. The worker process owns the provider and engine;
+the parent only waits on a pipe with a wall-clock deadline and kills the
+process when it is exceeded (a new one is started by the next request).
+
+Protocol (parent -> worker):
+    ('fingerprint', job_id, hwnd)
+    ('detect', job_id, hwnd, options)       options: engine detect()/iter_batches() kwargs
+    ('cancel', job_id)                      stream abandoned, stop sending batches
+    ('stop',)
+Protocol (worker -> parent):
+    ('ready',)
+    ('fingerprint', job_id, fingerprint)
+    ('batch', job_id, [record tuples])      zero or more per detect
+    ('done', job_id, engine_stats)
+    ('error', job_id, message)
+"""
+import multiprocessing
+import time
+
+from .detection_engine import create_engine
+from .element_record import ElementRecord
+from .snapshot_cache import window_fingerprint
+
+
+class DetectionTimeout(Exception):
+    """Worker exceeded its deadline and was killed (the next request starts a new one)"""
+
+
+def _worker_main(conn, provider_factory, backend, engine_options):
+    """Worker process entry point"""
+    provider = provider_factory()
+    provider.init_thread()
+    engine = create_engine(backend, provider, **engine_options)
+    conn.send(('ready',))
+    pending = []  # Requests received while checking for a cancel
+
+    while True:
+        try:
+            request = pending.pop(0) if pending else conn.recv()
+        except EOFError:
+            break  # Parent went away
+
+        if request[0] == 'stop':
+            break
+        if request[0] == 'cancel':
+            continue  # Job already finished
+
+        job_id = request[1]
+        try:
+            window = provider.window(request[2])
+            if request[0] == 'fingerprint':
+                conn.send(('fingerprint', job_id, window_fingerprint(provider, window)))
+                continue
+
+            options = dict(request[3])
+            if options.pop('stream', False):
+                for batch in engine.iter_batches(window, **options):
+                    conn.send(('batch', job_id, [record.to_tuple() for record in batch]))
+                    if _cancelled(conn, job_id, pending):
+                        break
+            else:
+                records = engine.detect(window, **options)
+                conn.send(('batch', job_id, [record.to_tuple() for record in records]))
+            conn.send(('done', job_id, dict(engine.stats)))
+        except Exception as e:
+            conn.send(('error', job_id, str(e)))
+
+    if hasattr(engine, 'close'):
+        engine.close()
+
+
+def _cancelled(conn, job_id, pending):
+    """True if the parent cancelled the job; other requests are queued in `pending`"""
+    cancelled = False
+    while conn.poll():
+        request = conn.recv()
+        if request[0] == 'cancel' and request[1] == job_id:
+            cancelled = True
+        else:
+            pending.append(request)
+    return cancelled
+
+
+class DetectionWorker:
+    """Parent-side handle of the detection subprocess"""
+
+    def __init__(self, provider_factory, backend="tree", deadline=3.0, start_timeout=10.0,
+                 **engine_options):
+        """
+        Initialize worker (the process starts lazily on first use)
+
+        Args:
+            provider_factory: Picklable callable creating the provider in the worker
+                              (e.g. the UIAProvider class)
+            backend: Detection engine name (see create_engine)
+            deadline: Wall-clock seconds per request before the worker is killed
+                      (detection requests get at least their timeout + 1s)
+            start_timeout: Seconds to wait for a (re)started worker to come up
+            **engine_options: Engine options passed to create_engine
+        """
+        self.provider_factory = provider_factory
+        self.backend = backend
+        self.name = f"{backend}, isolated"
+        self.deadline = deadline
+        self.start_timeout = start_timeout
+        self.engine_options = engine_options
+        self.stats = {'visited': 0, 'pruned': 0, 'found_depth': None, 'cut': 0, 'restarts': 0, 'timeouts': 0,
+                      'abandoned': 0}
+
+        # Spawn on every platform: the only method on Windows, and a forked
+        # copy of a process with live COM/Tk state would not be safe anyway
+        self._context = multiprocessing.get_context('spawn')
+        self._process = None
+        self._conn = None
+        self._job_id = 0
+        self._killed = False  # Killed after a timeout or crash, restarted by the next request
+
+    def start(self):
+        """Start the worker process and wait until it is ready"""
+        if self._process is not None and self._process.is_alive():
+            return
+        if self._killed:
+            self._killed = False
+            self.stats['restarts'] += 1
+            print("♻️ Restarting detection worker")
+
+        parent_conn, child_conn = self._context.Pipe()
+        self._process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self.provider_factory, self.backend, self.engine_options),
+            name="HEMouseDetectionWorker",
+            daemon=True
+        )
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+
+        if not self._conn.poll(self.start_timeout):
+            self._kill()
+            raise DetectionTimeout("detection worker did not start")
+        self._conn.recv()  # ('ready',)
+
+    def stop(self):
+        """Stop the worker process"""
+        if self._process is None:
+            return
+        try:
+            self._conn.send(('stop',))
+            self._process.join(timeout=1.0)
+        except (OSError, EOFError):
+            pass
+        self._kill()
+
+    def _kill(self):
+        """Hard-kill the worker (it may be stuck in a COM call)"""
+        if self._process is not None:
+            if self._process.is_alive():
+                self._process.kill()
+            self._process.join()
+        if self._conn is not None:
+            self._conn.close()
+        self._process = None
+        self._conn = None
+
+    def _abort(self):
+        """Kill a hung or dead worker now; the next request starts a new one"""
+        self._kill()
+        self._killed = True
+
+    def _request(self, request, deadline=None):
+        """
+        Send a request and yield its replies until the terminating one
+
+        Replies of earlier, abandoned jobs still in the pipe are skipped by job id.
+
+        Raises:
+            DetectionTimeout: Deadline exceeded (worker has been killed)
+        """
+        self.start()
+        limit = self.deadline if deadline is None else deadline
+        deadline = time.monotonic() + limit
+        finished = False
+        try:
+            self._conn.send(request)
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._conn.poll(remaining):
+                    self.stats['timeouts'] += 1
+                    raise DetectionTimeout(f"no reply within {limit:.1f}s")
+
+                reply = self._conn.recv()
+                if reply[1] != request[1]:
+                    continue  # Late reply of an abandoned request
+                finished = reply[0] != 'batch'
+                yield reply
+                if finished:
+                    return
+        except (OSError, EOFError):
+            # Worker died (crashed provider)
+            self._abort()
+            raise DetectionTimeout("detection worker died")
+        except DetectionTimeout:
+            self._abort()
+            raise
+        except GeneratorExit:
+            if not finished and self._conn is not None:
+                # Caller stopped consuming a stream: the worker stops after its
+                # current batch, replies already in flight are skipped later
+                try:
+                    self._conn.send(('cancel', request[1]))
+                except (OSError, EOFError):
+                    self._abort()
+                self.stats['abandoned'] += 1
+            raise
+
+    def _detect_deadline(self, options):
+        return max(self.deadline, options.get('timeout', 2.0) + 1.0)
+
+    def _update_stats(self, engine_stats):
+        for stat in ('visited', 'pruned', 'found_depth', 'cut'):
+            self.stats[stat] = engine_stats.get(stat)
+
+    def _next_job(self):
+        self._job_id += 1
+        return self._job_id
+
+    def fingerprint(self, hwnd):
+        """Window fingerprint (see snapshot_cache.window_fingerprint)"""
+        for reply in self._request(('fingerprint', self._next_job(), hwnd)):
+            if reply[0] == 'error':
+                raise RuntimeError(reply[2])
+            return reply[2]
+
+    def iter_batches(self, hwnd, **options):
+        """
+        Stream records from the worker (see TreeWalkEngine.iter_batches)
+
+        Args:
+            hwnd: Window to scan
+            **options: iter_batches() options (exclude_password, max_depth, timeout, ...)
+
+        Yields:
+            Lists of ElementRecord
+        """
+        options['stream'] = True
+        for reply in self._request(('detect', self._next_job(), hwnd, options), self._detect_deadline(options)):
+            if reply[0] == 'batch':
+                yield [ElementRecord.from_tuple(values) for values in reply[2]]
+            elif reply[0] == 'done':
+                self._update_stats(reply[2])
+            else:
+                raise RuntimeError(reply[2])
+
+    def detect(self, hwnd, **options):
+        """
+        Detect elements in the worker (see TreeWalkEngine.detect)
+
+        Args:
+            hwnd: Window to scan
+            **options: detect() options (exclude_password, max_depth, timeout)
+
+        Returns:
+            List of ElementRecord
+
+        Raises:
+            DetectionTimeout: Worker did not answer before the deadline
+        """
+        records = []
+        for reply in self._request(('detect', self._next_job(), hwnd, options), self._detect_deadline(options)):
+            if reply[0] == 'batch':
+                records.extend(ElementRecord.from_tuple(values) for values in reply[2])
+            elif reply[0] == 'done':
+                self._update_stats(reply[2])
+            else:
+                raise RuntimeError(reply[2])
+        return records
@@ -2,166 +2,274 @@
 HEMouse Element Detector
 Detects clickable UI elements using Windows UI Automation
 """
-from pywinauto import Desktop
-import win32gui
+import os
 import win32api
 import win32con
+import win32gui
+import win32process
+import threading
 import time
 
+from .uia_provider import UIAProvider
+from .detection_engine import create_engine
+from .snapshot_cache import SnapshotCache, window_fingerprint
+from .dedup import dedupe_elements, StreamingDeduper
+from .detection_worker import DetectionWorker
+
 
 class ElementDetector:
     """UI element detector using Windows UIA"""
 
-    def __init__(self):
-        self.desktop = Desktop(backend="uia")
+    def __init__(self, backend="tree", provider=None, cache=None, dedup_iou=0.7, isolated=False,
+                 provider_factory=UIAProvider, profiles=None, **engine_options):
+        """
+        Initialize detector
 
-    def get_clickable_elements(self, exclude_password=True, max_depth=6):
+        Args:
+            backend: Detection engine, 'tree' (per-node walk), 'bulk' (single cached
+                     FindAll) or 'parallel' (subtrees on a thread pool)
+            provider: UIA provider (default: UIAProvider)
+            cache: SnapshotCache for per-window results (default: new cache)
+            dedup_iou: IoU above which overlapping/nested clickables are merged
+                       into the most actionable one (None disables)
+            isolated: Run detection in a worker subprocess that is killed and
+                      restarted when a hung provider misses the deadline
+            provider_factory: Picklable provider factory for the worker subprocess
+            profiles: ProfileStore tuning depth, timeout and types per application
+                      (default: fixed max_depth and 2.0s timeout)
+            **engine_options: Engine options, e.g. workers=4, split_depth=2 for 'parallel'
+        """
+        self.provider = provider if provider is not None else provider_factory()
+        self.isolated = isolated
+        if isolated:
+            # Same name/stats/detect interface, keyed by hwnd instead of window element
+            self.engine = DetectionWorker(provider_factory, backend, **engine_options)
+        else:
+            self.engine = create_engine(backend, self.provider, **engine_options)
+        self.cache = cache if cache is not None else SnapshotCache()
+        self.dedup_iou = dedup_iou
+        self.profiles = profiles
+        self._executables = {}  # pid -> executable name
+        # Serializes hotkey-thread and prefetch-thread detections (an activation
+        # during a running prefetch waits for it and then hits the cache)
+        self._lock = threading.Lock()
+
+    def get_clickable_elements(self, exclude_password=True, max_depth=6, use_cache=True, hwnd=None):
         """
         Get all clickable elements on current screen
 
         Args:
             exclude_password: Skip password fields
             max_depth: Maximum recursion depth (default: 6 for performance)
+            use_cache: Reuse the last snapshot of this window if it is unchanged
+            hwnd: Window to scan (default: foreground window)
 
         Returns:
-            List of element dictionaries with 'element', 'rect', 'type', 'name'
+            List of ElementRecord
         """
+        with self._lock:
+            return self._get_clickable_elements(exclude_password, max_depth, use_cache, hwnd)
+
+    def _get_clickable_elements(self, exclude_password, max_depth, use_cache, hwnd):
         elements = []
 
         # Get foreground window
-        hwnd = win32gui.GetForegroundWindow()
+        if hwnd is None:
+            hwnd = win32gui.GetForegroundWindow()
         if hwnd == 0:
             print("⚠️ No foreground window found")
             return elements
 
         try:
-            # Get window using UIA
-            window = self.desktop.window(handle=hwnd)
-
-            # Add timeout protection for slow windows
-            import time
             start_time = time.time()
-            self._traverse_elements(window, elements, exclude_password, depth=0, max_depth=max_depth, start_time=start_time, timeout=2.0)
+            window = self._window(hwnd)
+            executable, options = self._tuned_options(hwnd, max_depth)
+
+            raw_count = None
+
+            def detect():
+                nonlocal raw_count
+                # Add timeout protection for slow windows
+                found = self.engine.detect(window, exclude_password=exclude_password, **options)
+                raw_count = len(found)
+                self._record_profile(executable, found, time.time() - start_time)
+                if self.dedup_iou is not None:
+                    found = dedupe_elements(found, self.dedup_iou)
+                return found
+
+            if use_cache:
+                key = (self._window_key(hwnd), exclude_password, max_depth)
+                elements, cache_hit = self.cache.get_or_detect(key, self._fingerprint(window), detect)
+            else:
+                elements, cache_hit = detect(), False
 
             elapsed = time.time() - start_time
-            print(f"✅ Detected {len(elements)} clickable elements in {elapsed:.2f}s")
+            if cache_hit:
+                print(f"⚡ Reused {len(elements)} cached elements in {elapsed:.2f}s")
+            else:
+                print(f"✅ Detected {len(elements)} clickable elements in {elapsed:.2f}s ({self.engine.name}, "
+                      f"visited {self.engine.stats['visited']} nodes, pruned {self.engine.stats['pruned']} subtrees, "
+                      f"{raw_count} before dedup)")
         except Exception as e:
             print(f"❌ Error detecting elements: {e}")
 
         return elements
 
-    def _traverse_elements(self, element, result_list, exclude_password, depth=0, max_depth=6, start_time=None, timeout=2.0):
+    def iter_clickable_elements(self, exclude_password=True, max_depth=6, batch_size=20,
+                                cursor=None, use_cache=True, hwnd=None):
         """
-        Recursively traverse UI element tree with timeout protection
+        Stream clickable elements in batches as they are found (breadth-first)
 
         Args:
-            element: Current element
-            result_list: List to append found elements
             exclude_password: Skip password fields
-            depth: Current recursion depth
-            max_depth: Maximum recursion depth
-            start_time: Start time for timeout check
-            timeout: Maximum time in seconds (default: 2.0s)
+            max_depth: Maximum depth (default: 6 for performance)
+            batch_size: Elements per batch
+            cursor: (x, y) cursor position, nearby elements come first
+            use_cache: Serve an unchanged window from the snapshot cache
+            hwnd: Window to scan (default: foreground window)
+
+        Yields:
+            Lists of ElementRecord
         """
-        # Check timeout to prevent hanging on slow windows
-        if start_time and (time.time() - start_time) > timeout:
+        with self._lock:
+            if hwnd is None:
+                hwnd = win32gui.GetForegroundWindow()
+            if hwnd == 0:
+                print("⚠️ No foreground window found")
+                return
+
+            try:
+                start_time = time.time()
+                window = self._window(hwnd)
+                executable, options = self._tuned_options(hwnd, max_depth)
+
+                key = fingerprint = None
+                if use_cache:
+                    key = (self._window_key(hwnd), exclude_password, max_depth)
+                    fingerprint = self._fingerprint(window)
+                    cached = self.cache.get(key, fingerprint)
+                    if cached is not None:
+                        print(f"⚡ Reused {len(cached)} cached elements")
+                        yield cached
+                        return
+
+                elements = []
+                raw = []
+                deduper = StreamingDeduper(self.dedup_iou) if self.dedup_iou is not None else None
+                for batch in self.engine.iter_batches(window, exclude_password=exclude_password,
+                                                      batch_size=batch_size, cursor=cursor, **options):
+                    raw.extend(batch)
+                    if deduper:
+                        batch = deduper.filter(batch)
+                        if not batch:
+                            continue
+                    elements.extend(batch)
+                    yield batch
+
+                if use_cache:
+                    self.cache.put(key, fingerprint, elements)
+
+                elapsed = time.time() - start_time
+                self._record_profile(executable, raw, elapsed)
+                raw_count = deduper.stats['seen'] if deduper else len(elements)
+                print(f"✅ Streamed {len(elements)} clickable elements in {elapsed:.2f}s ({self.engine.name}, "
+                      f"{raw_count} before dedup)")
+            except Exception as e:
+                print(f"❌ Error detecting elements: {e}")
+
+    def _tuned_options(self, hwnd, max_depth):
+        """Executable name and engine options (profile-tuned when profiles are enabled)"""
+        options = {'max_depth': max_depth, 'timeout': 2.0}
+        if self.profiles is None:
+            return None, options
+
+        executable = self.executable(hwnd)
+        if executable:
+            options = self.profiles.tuned(executable, max_depth, 2.0)
+        return executable, options
+
+    def _record_profile(self, executable, found, elapsed):
+        """Feed a fresh detection run into the application's profile"""
+        if self.profiles is None or not executable:
             return
+        stats = self.engine.stats
+        self.profiles.record(executable, stats.get('found_depth'), stats.get('cut', 0), stats['visited'],
+                             elapsed, {element.control_type for element in found}, len(found))
+
+    def expected_count(self, hwnd):
+        """Typical element count of the window's application (detection profile), or None"""
+        if self.profiles is None:
+            return None
+        executable = self.executable(hwnd)
+        return self.profiles.expected_elements(executable) if executable else None
+
+    def executable(self, hwnd):
+        """Executable name of the window's process ('explorer.exe'), or None"""
+        _, pid = win32process.GetWindowThreadProcessId(hwnd)
+        if pid not in self._executables:
+            try:
+                handle = win32api.OpenProcess(win32con.PROCESS_QUERY_INFORMATION | win32con.PROCESS_VM_READ,
+                                              False, pid)
+                try:
+                    self._executables[pid] = os.path.basename(win32process.GetModuleFileNameEx(handle, 0))
+                finally:
+                    win32api.CloseHandle(handle)
+            except Exception:
+                return None  # Elevated or protected process, try again next time
+        return self._executables[pid]
+
+    def _window(self, hwnd):
+        """Root handed to the engine: the hwnd itself when the worker resolves it"""
+        return hwnd if self.isolated else self.provider.window(hwnd)
+
+    def fingerprint(self, hwnd):
+        """
+        Cheap fingerprint of a window's current state (what the snapshot cache revalidates with)
 
-        if depth > max_depth:
-            return
+        Args:
+            hwnd: Window handle
 
-        try:
-            # Check if element is clickable
-            if self._is_clickable(element):
-                # Exclude password fields
-                if exclude_password and self._is_password_field(element):
-                    return
-
-                # Get element rectangle
-                rect = element.rectangle()
-                if self._is_visible_on_screen(rect):
-                    result_list.append({
-                        'element': element,
-                        'rect': rect,
-                        'type': element.element_info.control_type,
-                        'name': element.window_text()
-                    })
-
-            # Recursively process children
-            for child in element.children():
-                self._traverse_elements(child, result_list, exclude_password, depth + 1, max_depth, start_time, timeout)
-
-        except Exception:
-            pass  # Ignore inaccessible elements
-
-    def _is_clickable(self, element):
-        """Check if element is clickable with priority filtering"""
-        # High priority: Interactive UI controls
-        high_priority_types = [
-            'Button', 'Hyperlink', 'MenuItem', 'TabItem',
-            'CheckBox', 'RadioButton', 'ComboBox'
-        ]
-
-        # Medium priority: Input and selection
-        medium_priority_types = [
-            'Edit', 'ListItem', 'TreeItem'
-        ]
-
-        # Low priority (excluded): Too generic, causes noise
-        # 'Document', 'Text', 'Pane', 'Group'
+        Returns:
+            Hashable fingerprint tuple
+        """
+        with self._lock:
+            return self._fingerprint(self._window(hwnd))
 
-        try:
-            control_type = element.element_info.control_type
+    def _fingerprint(self, window):
+        if self.isolated:
+            return self.engine.fingerprint(window)
+        return window_fingerprint(self.provider, window)
 
-            # Check high priority first
-            if any(t in control_type for t in high_priority_types):
-                return True
+    def close(self):
+        """Stop the detection worker subprocess (isolated mode)"""
+        if self.isolated:
+            self.engine.stop()
 
-            # Medium priority: additional checks for real interactivity
-            if any(t in control_type for t in medium_priority_types):
-                # Only include if element has meaningful name or is enabled
-                name = element.window_text()
-                if name and len(name.strip()) > 0:
-                    return True
+    def resolve(self, record, hwnd=None):
+        """
+        Resolve a record to a live pywinauto wrapper (only for the clicked element)
 
-            return False
-        except:
-            return False
+        Args:
+            record: ElementRecord
+            hwnd: Window the record was detected in (default: foreground window)
+
+        Returns:
+            UIAWrapper or None if the element is gone
+        """
+        if record.runtime_id is None:
+            return None
 
-    def _is_password_field(self, element):
-        """Check if element is a password field"""
         try:
-            return element.element_info.control_type == "Edit" and element.is_password()
-        except:
-            return False
-
-    def _is_visible_on_screen(self, rect):
-        """Check if element is visible on screen with size filtering"""
-        # Get virtual screen bounds (all monitors)
-        virtual_screen_left = win32api.GetSystemMetrics(win32con.SM_XVIRTUALSCREEN)
-        virtual_screen_top = win32api.GetSystemMetrics(win32con.SM_YVIRTUALSCREEN)
-        virtual_screen_width = win32api.GetSystemMetrics(win32con.SM_CXVIRTUALSCREEN)
-        virtual_screen_height = win32api.GetSystemMetrics(win32con.SM_CYVIRTUALSCREEN)
-
-        # Element must be within virtual screen bounds (with small margin)
-        within_bounds = (
-            rect.left >= virtual_screen_left - 100 and
-            rect.top >= virtual_screen_top - 100 and
-            rect.right <= virtual_screen_left + virtual_screen_width + 100 and
-            rect.bottom <= virtual_screen_top + virtual_screen_height + 100
-        )
-
-        # Element must be reasonably sized (filter out tiny decorations)
-        min_width = 20  # Minimum 20 pixels wide
-        min_height = 15  # Minimum 15 pixels tall
-        reasonable_size = rect.width() >= min_width and rect.height() >= min_height
-
-        # Element should not be too large (likely container/pane, not clickable)
-        max_width = virtual_screen_width * 0.8  # Max 80% of screen width
-        max_height = virtual_screen_height * 0.8  # Max 80% of screen height
-        not_too_large = rect.width() <= max_width and rect.height() <= max_height
-
-        return within_bounds and reasonable_size and not_too_large
+            window = self.provider.window(hwnd or win32gui.GetForegroundWindow())
+            return self.provider.find_by_runtime_id(window, record.runtime_id, record.control_type)
+        except Exception as e:
+            print(f"❌ Could not resolve element: {e}")
+            return None
+
+    def _window_key(self, hwnd):
+        """Cache key for a window: (hwnd, process id, window rect)"""
+        _, pid = win32process.GetWindowThreadProcessId(hwnd)
+        return (hwnd, pid, win32gui.GetWindowRect(hwnd))
 
 
 # Test code
@@ -175,4 +283,4 @@ if __name__ == "__main__":
 
     print(f"\n📊 Found {len(elements)} clickable elements:")
     for i, elem in enumerate(elements[:20]):  # Show first 20
-        print(f"{i+1}. {elem['type']}: {elem['name'][:50]} at ({elem['rect'].left}, {elem['rect'].top})")
\ No newline at end of file
+        print(f"{i+1}. {elem.control_type}: {elem.name[:50]} at ({elem.left}, {elem.top})")
\ No newline at end of file
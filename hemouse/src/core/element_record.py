@@ -0,0 +1,55 @@
+"""
+HEMouse Element Record
+Compact detection result, independent of any live UIA object
+"""
+import sys
+
+
+class ElementRecord:
+    """
+    One detected element
+
+    Holds integer rect columns, an interned control type and the UIA runtime
+    id. The pywinauto wrapper is resolved from the runtime id only when the
+    element is actually clicked (see ElementDetector.resolve).
+    """
+
+    __slots__ = ('left', 'top', 'right', 'bottom', 'control_type', 'name', 'runtime_id')
+
+    def __init__(self, left, top, right, bottom, control_type, name, runtime_id=None):
+        self.left = left
+        self.top = top
+        self.right = right
+        self.bottom = bottom
+        self.control_type = sys.intern(control_type)
+        self.name = name
+        self.runtime_id = tuple(runtime_id) if runtime_id is not None else None
+
+    @classmethod
+    def from_rect(cls, rect, control_type, name, runtime_id=None):
+        """Create record from a provider rect (pywinauto RECT or FakeRect)"""
+        return cls(int(rect.left), int(rect.top), int(rect.right), int(rect.bottom),
+                   control_type, name, runtime_id)
+
+    def width(self):
+        return self.right - self.left
+
+    def height(self):
+        return self.bottom - self.top
+
+    def center(self):
+        """Get center point (x, y)"""
+        return (self.left + self.width() // 2, self.top + self.height() // 2)
+
+    def to_tuple(self):
+        """Plain tuple for pickling / IPC"""
+        return (self.left, self.top, self.right, self.bottom, self.control_type, self.name, self.runtime_id)
+
+    @classmethod
+    def from_tuple(cls, values):
+        """Inverse of to_tuple()"""
+        return cls(*values)
+
+    def __repr__(self):
+        return (f"ElementRecord({self.control_type!r}, {self.name!r}, "
+                f"({self.left}, {self.top}, {self.right}, {self.bottom}))")
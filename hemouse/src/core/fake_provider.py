@@ -0,0 +1,226 @@
+"""
+HEMouse Fake UIA Provider
+In-memory UIA provider for tests and benchmarks (runs on any platform)
+"""
+import time
+import itertools
+import threading
+from collections import Counter
+
+from .detection_engine import CachedElement, matches_types
+
+
+class FakeRect:
+    """Rectangle with the same interface as pywinauto's RECT"""
+
+    def __init__(self, left, top, right, bottom):
+        self.left = left
+        self.top = top
+        self.right = right
+        self.bottom = bottom
+
+    def width(self):
+        return self.right - self.left
+
+    def height(self):
+        return self.bottom - self.top
+
+    def __eq__(self, other):
+        return (self.left, self.top, self.right, self.bottom) == \
+            (other.left, other.top, other.right, other.bottom)
+
+    def __repr__(self):
+        return f"FakeRect({self.left}, {self.top}, {self.right}, {self.bottom})"
+
+
+class FakeElement:
+    """Synthetic UI element"""
+
+    _next_runtime_id = itertools.count(1)
+
+    def __init__(self, control_type, name="", rect=(0, 0, 0, 0), children=None, is_password=False,
+                 is_offscreen=False):
+        """
+        Args:
+            control_type: UIA control type name
+            name: Element name
+            rect: (left, top, right, bottom)
+            children: List of FakeElement
+            is_password: Password field flag
+            is_offscreen: UIA IsOffscreen flag (collapsed menus, hidden tabs)
+        """
+        self.control_type = control_type
+        self.name = name
+        self.rect = FakeRect(*rect)
+        self.children = list(children or [])
+        self.is_password = is_password
+        self.is_offscreen = is_offscreen
+        self.runtime_id = (42, next(FakeElement._next_runtime_id))
+
+    def __repr__(self):
+        return f"FakeElement({self.control_type!r}, {self.name!r})"
+
+
+class FakeUIAProvider:
+    """Provider over a FakeElement tree that counts cross-process round-trips"""
+
+    def __init__(self, root, screen_bounds=(0, 0, 1920, 1080), latency=0.0):
+        """
+        Args:
+            root: Root FakeElement (returned for any hwnd)
+            screen_bounds: (left, top, width, height) of the virtual screen
+            latency: Seconds to sleep per round-trip (simulates a slow target app)
+        """
+        self.root = root
+        self._screen_bounds = screen_bounds
+        self.latency = latency
+        self.calls = Counter()
+        self._calls_lock = threading.Lock()
+
+    @property
+    def round_trips(self):
+        """Total number of simulated cross-process calls"""
+        return sum(self.calls.values())
+
+    def _round_trip(self, method):
+        with self._calls_lock:
+            self.calls[method] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def init_thread(self):
+        pass
+
+    def window(self, hwnd):
+        self._round_trip('window')
+        return self.root
+
+    def children(self, element):
+        self._round_trip('children')
+        return list(element.children)
+
+    def control_type(self, element):
+        self._round_trip('control_type')
+        return element.control_type
+
+    def name(self, element):
+        self._round_trip('name')
+        return element.name
+
+    def is_password(self, element):
+        self._round_trip('is_password')
+        return element.is_password
+
+    def is_offscreen(self, element):
+        self._round_trip('is_offscreen')
+        return element.is_offscreen
+
+    def rectangle(self, element):
+        self._round_trip('rectangle')
+        return element.rect
+
+    def visit_properties(self, element):
+        self._round_trip('visit_properties')
+        return element.control_type, element.rect, element.is_offscreen
+
+    def runtime_id(self, element):
+        self._round_trip('runtime_id')
+        return element.runtime_id
+
+    def find_all_cached(self, root, control_types):
+        self._round_trip('find_all_cached')
+        results = []
+        stack = [root]
+        while stack:
+            element = stack.pop()
+            if matches_types(element.control_type, control_types):
+                results.append(CachedElement(element.runtime_id, element.control_type, element.name,
+                                             element.rect, element.is_password, element.is_offscreen))
+            stack.extend(reversed(element.children))
+        return results
+
+    def find_by_runtime_id(self, root, runtime_id, control_type=None):
+        self._round_trip('find_by_runtime_id')
+        stack = [root]
+        while stack:
+            element = stack.pop()
+            if element.runtime_id == tuple(runtime_id):
+                return element
+            stack.extend(element.children)
+        return None
+
+    def screen_bounds(self):
+        return self._screen_bounds
+
+
+class HangingFakeProvider(FakeUIAProvider):
+    """Fake provider that blocks forever inside children() for some windows"""
+
+    def __init__(self, root, hang_hwnds=(), **kwargs):
+        """
+        Args:
+            root: Root FakeElement
+            hang_hwnds: Window handles whose traversal never returns (simulates a
+                        provider stuck in a COM call)
+        """
+        super().__init__(root, **kwargs)
+        self.hang_hwnds = set(hang_hwnds)
+        self._hwnd = None
+
+    def window(self, hwnd):
+        self._hwnd = hwnd
+        return super().window(hwnd)
+
+    def children(self, element):
+        if self._hwnd in self.hang_hwnds and element is not self.root:
+            threading.Event().wait()
+        return super().children(element)
+
+
+def synthetic_provider(breadth=4, depth=4, hang_hwnds=()):
+    """
+    Provider factory for the detection worker (module level, so it pickles)
+
+    Args:
+        breadth: Children per inner node (see make_synthetic_tree)
+        depth: Tree depth
+        hang_hwnds: Window handles whose traversal hangs
+
+    Returns:
+        FakeUIAProvider over a synthetic tree
+    """
+    root = make_synthetic_tree(breadth, depth)
+    if hang_hwnds:
+        return HangingFakeProvider(root, hang_hwnds=hang_hwnds)
+    return FakeUIAProvider(root)
+
+
+def make_synthetic_tree(breadth=4, depth=4, leaf_type='Button'):
+    """
+    Build a regular synthetic window tree
+
+    Every inner node is a Pane with `breadth` children; leaves are clickable
+    elements laid out left to right so they are all visible and sized.
+
+    Args:
+        breadth: Children per inner node
+        depth: Tree depth below the root window
+        leaf_type: Control type of the leaves
+
+    Returns:
+        Root FakeElement
+    """
+    counter = [0]
+
+    def build(level):
+        if level == depth:
+            i = counter[0]
+            counter[0] += 1
+            left = 10 + (i % 40) * 45
+            top = 10 + (i // 40) % 20 * 40
+            return FakeElement(leaf_type, f"{leaf_type} {i}", (left, top, left + 40, top + 30))
+        return FakeElement('Pane', children=[build(level + 1) for _ in range(breadth)])
+
+    root = build(0)
+    root.control_type = 'Window'
+    return root
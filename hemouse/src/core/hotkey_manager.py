@@ -1,76 +1,459 @@
 """
 HEMouse Hotkey Manager
-Monitors CapsLock state changes using Windows API polling
+Detects CapsLock toggles and registered chords/sequences from a low-level keyboard hook
+(CapsLock polling as fallback)
 """
-import win32api
-import win32con
+import queue
 import threading
 import time
+from collections import deque, namedtuple
 
+from .hotkey_trie import HotkeyMatcher, HotkeyTrie, key_name
 
-class HotkeyManager:
-    """Global hotkey manager for CapsLock detection"""
+
+# A hotkey event ('capslock_on', 'capslock_off' or a registered name) and
+# when it was seen (time.perf_counter())
+KeyEvent = namedtuple('KeyEvent', ['name', 'timestamp'])
+
+
+class KeyEventSource:
+    """Source of hotkey events"""
+
+    def wait_for_event(self, timeout=None):
+        """
+        Block until the next hotkey event
+
+        Args:
+            timeout: Maximum wait in seconds (None: until an event or close())
+
+        Returns:
+            KeyEvent, or None on timeout / after close()
+        """
+        raise NotImplementedError
+
+    def set_matcher(self, matcher):
+        """Use a HotkeyMatcher for raw keys (sources that only see CapsLock ignore it)"""
+        pass
+
+    def close(self):
+        """Release resources and wake up a blocked wait_for_event()"""
+        pass
+
+
+class QueueKeySource(KeyEventSource):
+    """Events pushed from another thread (hook callback, synthetic events in tests)"""
+
+    def __init__(self):
+        self._events = queue.Queue()
+        self.matcher = HotkeyMatcher()
+
+    def set_matcher(self, matcher):
+        self.matcher = matcher
+
+    def push(self, name, timestamp=None):
+        """Queue an event (timestamp defaults to now)"""
+        self._events.put(KeyEvent(name, time.perf_counter() if timestamp is None else timestamp))
+
+    def feed_key(self, key, down, timestamp=None):
+        """
+        Run a raw key event through the matcher and queue the hotkey events it completes
+
+        Args:
+            key: Key name (see hotkey_trie.key_name)
+            down: True for key-down, False for key-up
+            timestamp: time.perf_counter() of the event (default: now)
+
+        Returns:
+            KeyResult (swallow: keep the key from applications)
+        """
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        result = self.matcher.feed(key, down, timestamp)
+        for name in result.events:
+            self.push(name, timestamp)
+        return result
+
+    def wait_for_event(self, timeout=None):
+        try:
+            return self._events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self._events.put(None)
+
+
+class PollingKeySource(KeyEventSource):
+    """CapsLock toggle state polled with GetAsyncKeyState (fallback, no chords)"""
+
+    def __init__(self, get_state=None, interval=0.015):
+        """
+        Args:
+            get_state: Callable returning the CapsLock toggle state, 0 or 1 (default: win32api)
+            interval: Polling interval in seconds (15ms for faster response)
+        """
+        if get_state is None:
+            import win32api
+            import win32con
+            # Check bit 0 (0x0001) for toggle state (ON/OFF)
+            get_state = lambda: win32api.GetAsyncKeyState(win32con.VK_CAPITAL) & 0x0001
+        self.get_state = get_state
+        self.interval = interval
+        self._last = get_state()
+        self._closed = False
+
+    def set_matcher(self, matcher):
+        if len(matcher.trie):
+            print(f"⚠️ Polling CapsLock only: {len(matcher.trie)} chord hotkey(s) unavailable")
+
+    def wait_for_event(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._closed:
+            state = self.get_state()
+            if state != self._last:
+                self._last = state
+                return KeyEvent('capslock_on' if state else 'capslock_off', time.perf_counter())
+            remaining = self.interval if deadline is None else deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(self.interval, remaining))
+        return None
+
+    def close(self):
+        self._closed = True
+
+
+class KeyboardHookSource(QueueKeySource):
+    """
+    Hotkey events from a WH_KEYBOARD_LL hook
+
+    The hook thread sleeps in GetMessage until Windows delivers a key, so
+    there is no CPU use or wakeup while idle, however many hotkeys are
+    registered. The hook callback runs the key through the matcher (one trie
+    lookup), queues completed events and swallows keys that belong to a
+    hotkey (low-level hooks must return quickly).
+    """
+
+    WH_KEYBOARD_LL = 13
+    WM_KEYDOWN = 0x0100
+    WM_KEYUP = 0x0101
+    WM_SYSKEYDOWN = 0x0104
+    WM_SYSKEYUP = 0x0105
+    WM_QUIT = 0x0012
+    WM_APP_REINJECT = 0x8001  # WM_APP + 1: replay CapsLock outside the hook callback
+    VK_CAPITAL = 0x14
+    KEYEVENTF_KEYUP = 0x0002
+    INJECTED_TAG = 0x48454D  # dwExtraInfo of our own replayed keys
 
     def __init__(self):
+        super().__init__()
+        import ctypes
+        self._ctypes = ctypes
+        self._user32 = ctypes.windll.user32
+        self._hook = None
+        self._thread_id = None
+        self.matcher.caps_on = self._user32.GetKeyState(self.VK_CAPITAL) & 0x0001
+
+        # Low-level hooks call back on the installing thread, which
+        # therefore needs its own message loop
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._hook_loop, args=(ready,), daemon=True)
+        self._thread.start()
+        ready.wait(timeout=1.0)
+        if not self._hook:
+            raise OSError("SetWindowsHookEx(WH_KEYBOARD_LL) failed")
+
+    def set_matcher(self, matcher):
+        # Toggle state is tracked from key-downs: in the hook it has not flipped yet
+        matcher.caps_on = self._user32.GetKeyState(self.VK_CAPITAL) & 0x0001
+        self.matcher = matcher
+
+    def _hook_loop(self, ready):
+        ctypes = self._ctypes
+        from ctypes import wintypes
+
+        class KBDLLHOOKSTRUCT(ctypes.Structure):
+            _fields_ = [('vkCode', wintypes.DWORD), ('scanCode', wintypes.DWORD), ('flags', wintypes.DWORD),
+                        ('time', wintypes.DWORD), ('dwExtraInfo', ctypes.c_size_t)]
+
+        LowLevelKeyboardProc = ctypes.WINFUNCTYPE(ctypes.c_ssize_t, ctypes.c_int, wintypes.WPARAM, wintypes.LPARAM)
+        downs = (self.WM_KEYDOWN, self.WM_SYSKEYDOWN)
+        ups = (self.WM_KEYUP, self.WM_SYSKEYUP)
+
+        def on_key(code, wparam, lparam):
+            if code == 0 and (wparam in downs or wparam in ups):
+                key = ctypes.cast(lparam, ctypes.POINTER(KBDLLHOOKSTRUCT)).contents
+                if key.dwExtraInfo != self.INJECTED_TAG:
+                    result = self.feed_key(key_name(key.vkCode), wparam in downs)
+                    if result.reinject_caps:
+                        self._user32.PostThreadMessageW(self._thread_id, self.WM_APP_REINJECT, 0, 0)
+                    if result.swallow:
+                        return 1
+            return self._user32.CallNextHookEx(None, code, wparam, lparam)
+
+        self._callback = LowLevelKeyboardProc(on_key)  # Keep reference alive
+        self._user32.SetWindowsHookExW.restype = wintypes.HHOOK
+        self._user32.CallNextHookEx.argtypes = (wintypes.HHOOK, ctypes.c_int, wintypes.WPARAM, wintypes.LPARAM)
+        self._user32.CallNextHookEx.restype = ctypes.c_ssize_t
+        self._user32.keybd_event.argtypes = (wintypes.BYTE, wintypes.BYTE, wintypes.DWORD, ctypes.c_size_t)
+        self._hook = self._user32.SetWindowsHookExW(self.WH_KEYBOARD_LL, self._callback, None, 0)
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        ready.set()
+
+        msg = wintypes.MSG()
+        while self._user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+            if msg.message == self.WM_APP_REINJECT:
+                # CapsLock tapped alone while dual-role: let the real toggle happen
+                self._user32.keybd_event(self.VK_CAPITAL, 0, 0, self.INJECTED_TAG)
+                self._user32.keybd_event(self.VK_CAPITAL, 0, self.KEYEVENTF_KEYUP, self.INJECTED_TAG)
+                continue
+            self._user32.TranslateMessage(ctypes.byref(msg))
+            self._user32.DispatchMessageW(ctypes.byref(msg))
+
+        if self._hook:
+            self._user32.UnhookWindowsHookEx(self._hook)
+
+    def close(self):
+        super().close()
+        if self._thread_id:
+            self._user32.PostThreadMessageW(self._thread_id, self.WM_QUIT, 0, 0)
+
+
+def create_key_source():
+    """Create keyboard hook source, falling back to polling"""
+    try:
+        return KeyboardHookSource()
+    except Exception as e:
+        print(f"⚠️ Keyboard hook unavailable ({e}), polling CapsLock state")
+        return PollingKeySource()
+
+
+# Events of one toggle key: only the latest of a burst matters
+TOGGLE_GROUPS = {'capslock_on': 'capslock', 'capslock_off': 'capslock'}
+
+
+class HotkeyManager:
+    """
+    Global hotkey manager: CapsLock toggles plus registered chords and sequences
+
+    Capturing and handling run on separate threads joined by a bounded
+    queue: the capture thread only reads the event source, so events are
+    still seen while a callback blocks (the capslock_on callback waits
+    while Hint mode runs on the UI thread). Toggle events that queue up while a handler
+    is busy are coalesced to the latest one, and dropped if it matches the
+    state already handled (e.g. ON-OFF tapped during an activation).
+    Interrupts run on the capture thread right away while a handler is
+    busy, so capslock_off can end an activation in progress.
+    """
+
+    def __init__(self, source=None, max_queue=8, sequence_timeout=1.0):
+        """
+        Args:
+            source: KeyEventSource (default: create_key_source() at start_monitoring)
+            max_queue: Events held while a handler is busy (the oldest is dropped beyond)
+            sequence_timeout: Max seconds between the chords of a key sequence
+        """
         self.running = False
         self.callbacks = {}
-        self.thread = None
-        self.poll_interval = 0.015  # 15ms polling interval for faster response
+        self.interrupts = {}
+        self.thread = None  # Capture thread
+        self.handler_thread = None
+        self.source = source
+        self.trie = HotkeyTrie(sequence_timeout)
+        self.matcher = HotkeyMatcher(self.trie)
+        self.latencies = deque(maxlen=100)  # Event-to-callback seconds of recent events
+        self.metrics = {'dispatched': 0, 'coalesced': 0, 'dropped': 0, 'interrupted': 0, 'max_queue_depth': 0}
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._busy = False
+        self._state = {}  # Toggle group -> last event handled
 
-    def register_hotkey(self, key_name, callback):
+    def register_hotkey(self, key_name, callback, keys=None):
         """
         Register a callback for hotkey events
 
         Args:
-            key_name: 'capslock_on' or 'capslock_off'
-            callback: Function to call when event occurs
+            key_name: 'capslock_on', 'capslock_off' or the name of a new hotkey
+            callback: Function to call when event occurs (on the handler thread)
+            keys: Chord or sequence for a new hotkey, e.g. 'caps+f' or 'ctrl+alt+g 1'
+                  (see hotkey_trie.parse_sequence)
+
+        Raises:
+            ValueError: Invalid keys or a conflict with another hotkey
         """
+        if keys is not None:
+            self.trie.add(keys, key_name)
         self.callbacks[key_name] = callback
 
-    def start_monitoring(self):
-        """Start monitoring hotkeys in background thread"""
+    def register_interrupt(self, key_name, callback):
+        """
+        Register a callback run as soon as key_name is seen while another handler is busy
+
+        It runs on the capture thread and must be thread-safe (e.g. set an
+        Event the busy handler watches). The event is still queued; if the
+        interrupt handled it, the queued copy is coalesced away.
+
+        Args:
+            key_name: Hotkey event name
+            callback: Function to call
+        """
+        self.interrupts[key_name] = callback
+
+    @property
+    def queue_depth(self):
+        """Events waiting for the handler thread"""
+        return self._queue.qsize()
+
+    def start_monitoring(self, on_start=None):
+        """
+        Start monitoring hotkeys in background threads
+
+        Args:
+            on_start: Optional function run on the handler thread before the
+                      first event (callbacks run on this thread, so per-thread
+                      resources can be set up here)
+        """
         if self.running:
             return
 
+        if self.source is None:
+            self.source = create_key_source()
+        self.source.set_matcher(self.matcher)
         self.running = True
+        self.handler_thread = threading.Thread(target=self._handler_loop, args=(on_start,), daemon=True)
+        self.handler_thread.start()
         self.thread = threading.Thread(target=self._monitor_loop, daemon=True)
         self.thread.start()
-        print("🟢 Hotkey monitoring started")
+        print(f"🟢 Hotkey monitoring started ({type(self.source).__name__})")
 
     def _monitor_loop(self):
-        """Main monitoring loop (runs in background thread)"""
-        # Use GetAsyncKeyState for global key state detection
-        # Check bit 0 (0x0001) for toggle state (ON/OFF)
-        prev_capslock_state = win32api.GetAsyncKeyState(win32con.VK_CAPITAL) & 0x0001
-
+        """Capture loop (background thread, blocked while idle)"""
         while self.running:
             try:
-                # Check global CapsLock toggle state
-                curr_state = win32api.GetAsyncKeyState(win32con.VK_CAPITAL) & 0x0001
-
-                # Detect state change
-                if curr_state != prev_capslock_state:
-                    if curr_state == 1:  # CapsLock ON
-                        print("🔔 CapsLock ON detected (global)")
-                        if 'capslock_on' in self.callbacks:
-                            self.callbacks['capslock_on']()
-                    else:  # CapsLock OFF
-                        print("🔔 CapsLock OFF detected (global)")
-                        if 'capslock_off' in self.callbacks:
-                            self.callbacks['capslock_off']()
-
-                    prev_capslock_state = curr_state
-
+                event = self.source.wait_for_event()
+                if event is None or not self.running:
+                    continue
+                self._capture(event)
             except Exception as e:
                 print(f"❌ Hotkey monitor error: {e}")
 
-            time.sleep(self.poll_interval)
+    def _capture(self, event):
+        """Interrupt a busy handler if requested, then queue the event"""
+        with self._lock:
+            interrupt = self.interrupts.get(event.name) if self._busy else None
+            if interrupt:
+                self.metrics['interrupted'] += 1
+                group = TOGGLE_GROUPS.get(event.name)
+                if group:
+                    self._state[group] = event.name
+        if interrupt:
+            try:
+                interrupt()
+            except Exception as e:
+                print(f"❌ Hotkey interrupt error: {e}")
+        self._put(event)
+
+    def _put(self, event):
+        """Queue without blocking the capture thread (drops the oldest event when full)"""
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                break
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.metrics['dropped'] += 1
+                except queue.Empty:
+                    pass
+        self.metrics['max_queue_depth'] = max(self.metrics['max_queue_depth'], self._queue.qsize())
+
+    def _handler_loop(self, on_start=None):
+        """Handler loop (background thread, runs the callbacks)"""
+        if on_start:
+            try:
+                on_start()
+            except Exception as e:
+                print(f"❌ Hotkey thread setup error: {e}")
+
+        while True:
+            events = [self._queue.get()]
+            # Everything that queued up behind it while the last handler ran
+            while True:
+                try:
+                    events.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in events:
+                break
+
+            for event in self._coalesce(events):
+                try:
+                    self._dispatch(event)
+                except Exception as e:
+                    print(f"❌ Hotkey handler error: {e}")
+
+    def _coalesce(self, events):
+        """Keep the latest event per toggle group, unless it matches the state already handled"""
+        last = {}
+        for index, event in enumerate(events):
+            group = TOGGLE_GROUPS.get(event.name)
+            if group:
+                last[group] = index
+
+        kept = []
+        with self._lock:
+            for index, event in enumerate(events):
+                group = TOGGLE_GROUPS.get(event.name)
+                if group and (last[group] != index or self._state.get(group) == event.name):
+                    continue
+                if group:
+                    self._state[group] = event.name
+                kept.append(event)
+            self.metrics['coalesced'] += len(events) - len(kept)
+        return kept
+
+    def _dispatch(self, event):
+        """Run the callback of an event, recording event-to-callback latency (dispatch lag)"""
+        latency = time.perf_counter() - event.timestamp
+        self.latencies.append(latency)
+        self.metrics['dispatched'] += 1
+        if event.name in TOGGLE_GROUPS:
+            state = 'ON' if event.name == 'capslock_on' else 'OFF'
+            print(f"🔔 CapsLock {state} detected (global, {latency * 1000:.2f}ms)")
+        else:
+            print(f"🔔 Hotkey {event.name} detected ({latency * 1000:.2f}ms)")
+        callback = self.callbacks.get(event.name)
+        if callback:
+            with self._lock:
+                self._busy = True
+            try:
+                callback()
+            finally:
+                with self._lock:
+                    self._busy = False
+
+    def latency_stats(self):
+        """
+        Event-to-callback latency of recent events and dispatcher metrics
+
+        Returns:
+            Dict with 'count', 'mean_ms', 'max_ms', 'queue_depth' and self.metrics
+        """
+        stats = {'count': len(self.latencies), 'mean_ms': 0.0, 'max_ms': 0.0, 'queue_depth': self.queue_depth}
+        if self.latencies:
+            stats['mean_ms'] = sum(self.latencies) / len(self.latencies) * 1000
+            stats['max_ms'] = max(self.latencies) * 1000
+        stats.update(self.metrics)
+        return stats
 
     def stop_monitoring(self):
         """Stop monitoring hotkeys"""
         self.running = False
-        if self.thread and self.thread.is_alive():
-            self.thread.join(timeout=1)
+        if self.source:
+            self.source.close()
+        self._put(None)
+        for thread in (self.thread, self.handler_thread):
+            if thread and thread.is_alive():
+                thread.join(timeout=1)
         print("🔴 Hotkey monitoring stopped")
 
 
@@ -93,4 +476,5 @@ if __name__ == "__main__":
             time.sleep(1)
     except KeyboardInterrupt:
         manager.stop_monitoring()
-        print("Goodbye!")
\ No newline at end of file
+        print(f"Latency: {manager.latency_stats()}")
+        print("Goodbye!")
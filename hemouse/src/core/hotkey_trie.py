@@ -0,0 +1,232 @@
+"""
+HEMouse Hotkey Trie
+Chord and key-sequence matching over raw key events (no Win32 here)
+"""
+from collections import namedtuple
+
+
+MODIFIERS = ('caps', 'ctrl', 'shift', 'alt', 'win')
+
+# Virtual-key code -> key name (left/right modifiers share one name)
+KEY_NAMES = {
+    0x08: 'backspace', 0x09: 'tab', 0x0D: 'enter', 0x10: 'shift', 0x11: 'ctrl', 0x12: 'alt',
+    0x14: 'caps', 0x1B: 'esc', 0x20: 'space', 0x5B: 'win', 0x5C: 'win',
+    0xA0: 'shift', 0xA1: 'shift', 0xA2: 'ctrl', 0xA3: 'ctrl', 0xA4: 'alt', 0xA5: 'alt',
+}
+KEY_NAMES.update({vk: chr(vk).lower() for vk in range(0x30, 0x3A)})  # 0-9
+KEY_NAMES.update({vk: chr(vk).lower() for vk in range(0x41, 0x5B)})  # a-z
+KEY_NAMES.update({0x70 + i: f"f{i + 1}" for i in range(12)})  # F1-F12
+
+# What one raw key event produced
+KeyResult = namedtuple('KeyResult', ['events', 'swallow', 'reinject_caps'])
+NO_RESULT = KeyResult((), False, False)
+
+
+def key_name(vk):
+    """Key name of a virtual-key code (None if unknown)"""
+    return KEY_NAMES.get(vk)
+
+
+def parse_sequence(text):
+    """
+    Parse a hotkey such as 'caps+f' or 'caps+g 1' (chords separated by spaces)
+
+    Returns:
+        Tuple of chords (frozenset of modifiers, key)
+
+    Raises:
+        ValueError: Unknown key, no key in a chord, or no modifier in the first chord
+    """
+    known = set(KEY_NAMES.values())
+    sequence = []
+    for chord_text in text.lower().split():
+        keys = chord_text.split('+')
+        unknown = [k for k in keys if k not in known]
+        if unknown:
+            raise ValueError(f"Unknown key {unknown[0]!r} in hotkey {text!r}")
+        modifiers = [k for k in keys if k in MODIFIERS]
+        others = [k for k in keys if k not in MODIFIERS]
+        if len(others) != 1:
+            raise ValueError(f"Chord {chord_text!r} needs exactly one non-modifier key")
+        sequence.append((frozenset(modifiers), others[0]))
+    if not sequence:
+        raise ValueError("Empty hotkey")
+    if not sequence[0][0]:
+        # A global hook would otherwise swallow ordinary typing
+        raise ValueError(f"Hotkey {text!r} must start with a modifier chord")
+    return tuple(sequence)
+
+
+class _Node:
+    __slots__ = ('children', 'name')
+
+    def __init__(self):
+        self.children = {}
+        self.name = None
+
+
+class HotkeyTrie:
+    """
+    Prefix tree of chord sequences
+
+    feed() does one dict lookup per chord, so matching cost does not grow
+    with the number of bindings. Bindings are prefix-free (like labels), so
+    a match fires as soon as its last chord is pressed. A sequence is
+    abandoned when the next chord does not continue it or after `timeout`
+    seconds between chords.
+    """
+
+    def __init__(self, timeout=1.0):
+        """
+        Args:
+            timeout: Max seconds between chords of a sequence
+        """
+        self.timeout = timeout
+        self.modifiers = set()  # Modifiers used by any binding
+        self._root = _Node()
+        self._node = self._root
+        self._last = 0.0
+        self._names = {}  # Name -> sequence
+
+    def __len__(self):
+        return len(self._names)
+
+    def add(self, sequence, name):
+        """
+        Bind a sequence
+
+        Args:
+            sequence: Hotkey text (see parse_sequence) or parsed tuple of chords
+            name: Event name emitted on a match
+
+        Raises:
+            ValueError: Invalid sequence, name in use, or prefix conflict with another binding
+        """
+        if isinstance(sequence, str):
+            sequence = parse_sequence(sequence)
+        if name in self._names:
+            raise ValueError(f"Hotkey {name!r} already registered")
+
+        node = self._root
+        for chord in sequence:
+            if node.name is not None:
+                raise ValueError(f"{name!r} conflicts with {node.name!r} (prefix)")
+            node = node.children.setdefault(chord, _Node())
+        if node.name is not None or node.children:
+            raise ValueError(f"{name!r} conflicts with an existing hotkey (prefix)")
+
+        node.name = name
+        self._names[name] = sequence
+        for modifiers, _ in sequence:
+            self.modifiers.update(modifiers)
+
+    def names(self):
+        """Registered names and their sequences"""
+        return dict(self._names)
+
+    def reset(self):
+        """Abandon a sequence in progress"""
+        self._node = self._root
+
+    def feed(self, chord, timestamp):
+        """
+        Advance by one chord
+
+        Args:
+            chord: (frozenset of modifiers, key)
+            timestamp: Seconds (monotonic)
+
+        Returns:
+            (name, consumed): Name of a completed binding or None, and whether
+            the chord belongs to a binding (and should not reach applications)
+        """
+        if self._node is not self._root and timestamp - self._last > self.timeout:
+            self._node = self._root
+        child = self._node.children.get(chord)
+        if child is None and self._node is not self._root:
+            # Not a continuation: maybe the start of another sequence
+            self._node = self._root
+            child = self._root.children.get(chord)
+        if child is None:
+            return None, False
+
+        self._last = timestamp
+        if child.name is not None:
+            self._node = self._root
+            return child.name, True
+        self._node = child
+        return None, True
+
+
+class HotkeyMatcher:
+    """
+    Turns raw key-down/up events into hotkey events
+
+    CapsLock toggles produce 'capslock_on' / 'capslock_off' on key-down. Once
+    a binding uses caps as a modifier, CapsLock becomes dual-role: its
+    key-down is swallowed, and on key-up it toggles (reinject_caps asks the
+    source to replay it so the real CapsLock state follows) only if no chord
+    (bound or not) was pressed while it was held.
+    """
+
+    def __init__(self, trie=None, caps_on=0):
+        """
+        Args:
+            trie: HotkeyTrie (default: empty)
+            caps_on: Current CapsLock toggle state
+        """
+        self.trie = trie if trie is not None else HotkeyTrie()
+        self.caps_on = caps_on
+        self._down = set()
+        self._swallowed = set()
+        self._caps_chorded = False
+
+    def _toggle(self):
+        self.caps_on ^= 1
+        return ('capslock_on' if self.caps_on else 'capslock_off',)
+
+    def feed(self, key, down, timestamp):
+        """
+        Process one raw key event
+
+        Args:
+            key: Key name (see key_name); None for keys without a name
+            down: True for key-down, False for key-up
+            timestamp: Seconds (monotonic)
+
+        Returns:
+            KeyResult(events, swallow, reinject_caps)
+        """
+        if key is None:
+            return NO_RESULT
+
+        if not down:
+            self._down.discard(key)
+            swallowed = key in self._swallowed
+            self._swallowed.discard(key)
+            if key == 'caps' and swallowed and not self._caps_chorded:
+                return KeyResult(self._toggle(), True, True)
+            return KeyResult((), swallowed, False)
+
+        if key in self._down:  # Auto-repeat
+            return KeyResult((), key in self._swallowed, False)
+        self._down.add(key)
+
+        if key == 'caps':
+            if 'caps' in self.trie.modifiers:
+                self._caps_chorded = False
+                self._swallowed.add(key)
+                return KeyResult((), True, False)
+            return KeyResult(self._toggle(), False, False)
+        if key in MODIFIERS:
+            return NO_RESULT
+
+        modifiers = frozenset(k for k in self._down if k in MODIFIERS)
+        if 'caps' in modifiers:
+            # Caps used as a modifier (bound or not): no toggle on its release
+            self._caps_chorded = True
+        name, consumed = self.trie.feed((modifiers, key), timestamp)
+        if not consumed:
+            return NO_RESULT
+        self._swallowed.add(key)
+        return KeyResult((name,) if name else (), True, False)
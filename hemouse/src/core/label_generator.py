@@ -2,6 +2,65 @@
 HEMouse Label Generator
 Generates non-conflicting labels for UI elements
 """
+import heapq
+import itertools
+from functools import lru_cache
+
+
+# Touch typing hands, used to prefer alternating-hand key pairs
+LEFT_HAND = set("qwertasdfgzxcvb")
+
+
+def _alternates(a, b):
+    return (a in LEFT_HAND) != (b in LEFT_HAND)
+
+
+@lru_cache(maxsize=64)
+def build_labels(charset, count):
+    """
+    Build an optimal prefix-free label table
+
+    With k = len(charset) and k^L <= count < k^(L+1), the code is a complete
+    k-ary trie of depth L in which the last e = ceil((count - k^L) / (k - 1))
+    depth-L nodes are split one level further. All labels have length L or
+    L + 1, which minimizes the total length for equally likely targets.
+    Runs in O(count).
+
+    Args:
+        charset: Label characters (at least 2, distinct)
+        count: Number of labels (> 0)
+
+    Returns:
+        Tuple of labels: length-L labels first, in charset order
+    """
+    k = len(charset)
+    if k < 2:
+        raise ValueError("charset needs at least 2 characters")
+    if count <= k:
+        return tuple(charset[:count])
+
+    length, level_size = 1, k
+    while level_size * k <= count:
+        length += 1
+        level_size *= k
+
+    splits = -(-(count - level_size) // (k - 1))  # ceil
+    prefixes = (''.join(p) for p in itertools.product(charset, repeat=length))
+    labels = list(itertools.islice(prefixes, level_size - splits))
+
+    remaining = count - len(labels)
+    for prefix in prefixes:
+        if remaining >= k:
+            extensions = charset
+        else:
+            # Partially used split node: prefer keys on the other hand
+            last = prefix[-1]
+            extensions = sorted(charset, key=lambda c: not _alternates(last, c))[:remaining]
+        labels.extend(prefix + c for c in extensions)
+        remaining -= len(extensions)
+
+    return tuple(labels)
+
 
 
 class LabelGenerator:
@@ -21,60 +80,121 @@ class LabelGenerator:
         """
         Generate non-conflicting labels
 
+        Builds a prefix-free code of minimal total length: all labels have
+        length L or L + 1 (see build_labels). Tables are memoized per
+        (charset, count).
+
         Args:
             count: Number of labels to generate
 
         Returns:
-            List of label strings
+            List of label strings (shortest first)
+        """
+        if count <= 0:
+            return []
+        return list(build_labels(self.charset, count))
+
+    def generate_weighted_labels(self, weights, prior=0.5):
+        """
+        Generate labels with the shortest codes on the most used targets
+
+        Builds a k-ary Huffman code over the weights, so the expected number
+        of keystrokes per click is minimal. At every trie node the heavier
+        subtrees get the earlier (easier) charset keys. Equal weights fall back
+        to generate_labels(), i.e. traversal order.
+
+        Args:
+            weights: Usage weight per element (e.g. ClickHistory.weights())
+            prior: Added to every weight so unseen targets keep short codes
+
+        Returns:
+            List of label strings aligned with weights
         """
+        count = len(weights)
         if count <= 0:
             return []
+        if count <= self.charset_size or min(weights) == max(weights):
+            if count <= self.charset_size:
+                # Single letters for everyone, easiest keys to the heaviest
+                order = sorted(range(count), key=lambda i: -weights[i])
+                labels = [None] * count
+                for c, i in zip(self.charset, order):
+                    labels[i] = c
+                return labels
+            return self.generate_labels(count)
+
+        k = self.charset_size
+        # Heap entries: (weight, unique tie, node). Leaves use -index, so at
+        # equal weight later elements are merged (pushed deeper) first
+        heap = [(weights[i] + prior, -i, i) for i in range(count)]
+        # Dummy leaves so every merge takes k nodes
+        heap += [(0.0, -count - j, None) for j in range((-(count - 1)) % (k - 1))]
+        heapq.heapify(heap)
+        tie = itertools.count(1)
+        while len(heap) > 1:
+            children = [heapq.heappop(heap) for _ in range(min(k, len(heap)))]
+            weight = sum(child[0] for child in children)
+            heapq.heappush(heap, (weight, next(tie), children))
+
+        labels = [None] * count
+        stack = [(heap[0], "")]
+        while stack:
+            (_, _, node), prefix = stack.pop()
+            if isinstance(node, list):
+                ranked = sorted(node, key=lambda child: (-child[0], -child[1]))
+                stack.extend((child, prefix + c) for child, c in zip(ranked, self.charset))
+            elif node is not None:
+                labels[node] = prefix
+        return labels
+
+    def iter_labels(self, expected=None, reserve=None):
+        """
+        Generate labels one by one for a set of unknown final size
 
-        labels = []
-
-        # Stage 1: Single letters ONLY (up to 9 elements)
-        if count <= self.charset_size:
-            return [self.charset[i] for i in range(count)]
-
-        # Stage 2: Two-letter combinations ONLY (no single letters to avoid prefix conflicts)
-        # For 10+ elements, we skip single letters entirely
-        left_hand = "asdf"
-        right_hand = "jkl"
-
-        # Prioritize left-right or right-left alternations
-        for c1 in self.charset:
-            for c2 in self.charset:
-                if len(labels) >= count:
-                    return labels[:count]
-
-                # Prefer alternating hands
-                if (c1 in left_hand and c2 in right_hand) or \
-                   (c1 in right_hand and c2 in left_hand):
-                    label = c1 + c2
-                    if label not in labels:
-                        labels.append(label)
-
-        # If still need more, add same-hand combinations
-        for c1 in self.charset:
-            for c2 in self.charset:
-                if len(labels) >= count:
-                    return labels[:count]
-                label = c1 + c2
-                if label not in labels:
-                    labels.append(label)
-
-        # If still need more, add three-letter combinations
-        if len(labels) < count:
-            for c1 in self.charset:
-                for c2 in self.charset:
-                    for c3 in self.charset:
-                        if len(labels) >= count:
-                            return labels[:count]
-                        label = c1 + c2 + c3
-                        if label not in labels:
-                            labels.append(label)
-
-        return labels[:count]
+        Every label stays prefix-free against all labels generated before and
+        after it. At each length some characters are held back as prefixes
+        for longer labels and the rest are handed out, so early (most
+        relevant) elements get the shortest labels while label length still
+        only grows logarithmically. With an expected count, each level
+        reserves just enough prefixes for the labels still expected to fit
+        one level deeper (300 elements: at most 3 characters instead of 5);
+        beyond it, and without one, `reserve` characters are held back.
+
+        Args:
+            expected: Estimated number of labels (e.g. from the detection profile)
+            reserve: Characters kept as expansion prefixes per level
+                     (default: a third of the charset)
+
+        Yields:
+            Label strings
+        """
+        if reserve is None:
+            reserve = max(1, self.charset_size // 3)
+        reserve = min(max(reserve, 1), self.charset_size - 1)
+        remaining = expected or 0
+
+        prefixes = [""]
+        while True:
+            level_reserve = self._level_reserve(len(prefixes), remaining) if remaining > 0 else reserve
+            split = self.charset_size - level_reserve
+
+            # Hand out non-reserved extensions of every open prefix
+            for prefix in prefixes:
+                for c in self.charset[:split]:
+                    yield prefix + c
+            remaining -= len(prefixes) * split
+
+            # Reserved extensions become the next level's prefixes
+            prefixes = [prefix + c for prefix in prefixes for c in self.charset[split:]]
+
+    def _level_reserve(self, open_prefixes, remaining):
+        """Fewest reserved characters leaving room for `remaining` labels one level deeper"""
+        size = self.charset_size
+        for reserve in range(1, size):
+            # The next level holds back one character per prefix as well
+            if (size - reserve) * open_prefixes + reserve * open_prefixes * (size - 1) >= remaining:
+                return reserve
+        return size - 1
 
     def match_label(self, input_str, labels):
         """
@@ -95,7 +215,10 @@ class LabelGenerator:
 
     def verify_no_prefix_conflicts(self, labels):
         """
-        Verify that no label is a prefix of another
+        Verify that no label is a prefix of another (and no duplicates)
+
+        In sorted order every string that starts with a label directly
+        follows it, so comparing neighbours is enough: O(n log n).
 
         Args:
             labels: List of labels to check
@@ -103,11 +226,8 @@ class LabelGenerator:
         Returns:
             True if no conflicts, False otherwise
         """
-        for i, label1 in enumerate(labels):
-            for j, label2 in enumerate(labels):
-                if i != j and label2.startswith(label1):
-                    return False
-        return True
+        ordered = sorted(labels)
+        return not any(b.startswith(a) for a, b in zip(ordered, ordered[1:]))
 
 
 # Test code
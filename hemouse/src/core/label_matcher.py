@@ -0,0 +1,163 @@
+"""
+HEMouse Label Matcher
+Incremental trie matching of typed keys against hint labels
+"""
+from collections import namedtuple
+
+
+# Label indices whose highlight state changed: added -> highlight, removed -> clear
+MatchDelta = namedtuple('MatchDelta', ['added', 'removed'])
+
+NO_CHANGE = MatchDelta((), ())
+
+
+class _Node:
+    """Trie node with the indices of all labels in its subtree"""
+
+    __slots__ = ('children', 'indices', 'terminal')
+
+    def __init__(self):
+        self.children = {}
+        self.indices = []
+        self.terminal = []  # Labels ending exactly here
+
+
+class LabelMatcher:
+    """
+    Trie over one activation's labels, advanced one node per key
+
+    push() and pop() move the state by a single dict lookup / stack pop.
+    Each call returns a MatchDelta of the labels whose highlight changed,
+    where the highlighted set is the current match set once at least one key
+    was typed (nothing is highlighted before the first key). Deltas are built
+    from sibling subtrees, so their cost is proportional to the number of
+    labels that actually change.
+    """
+
+    def __init__(self, labels=()):
+        """
+        Args:
+            labels: Initial labels (more can be added with add())
+        """
+        self.labels = []
+        self._root = _Node()
+        self._path = [self._root]  # Node per typed prefix, None past a dead end
+        self.input = ""
+        self.add(labels)
+
+    @property
+    def node(self):
+        """Trie node of the current input (None if nothing can match)"""
+        return self._path[-1]
+
+    @property
+    def count(self):
+        """Number of labels matching the current input"""
+        node = self.node
+        return len(node.indices) if node else 0
+
+    def matches(self):
+        """Indices of labels matching the current input"""
+        node = self.node
+        return list(node.indices) if node else []
+
+    def _highlighted(self, node):
+        return list(node.indices) if node is not None and node is not self._root else []
+
+    def _outside(self, parent, char):
+        """Labels below parent that are not below its child char"""
+        indices = list(parent.terminal)
+        for c, sibling in parent.children.items():
+            if c != char:
+                indices.extend(sibling.indices)
+        return indices
+
+    def add(self, labels):
+        """
+        Add labels (streaming detection)
+
+        Args:
+            labels: Label strings, indexed after the existing ones
+
+        Returns:
+            MatchDelta with the new labels that match the current input
+        """
+        added = []
+        start = len(self.labels)
+        for index, label in enumerate(labels, start):
+            self.labels.append(label)
+            node = self._root
+            node.indices.append(index)
+            for c in label:
+                child = node.children.get(c)
+                if child is None:
+                    child = node.children[c] = _Node()
+                child.indices.append(index)
+                node = child
+            node.terminal.append(index)
+            if self.input and label.startswith(self.input):
+                added.append(index)
+
+        if self.node is None:
+            # Typed ahead of the labels: part of the path may exist now
+            self._path = [self._root]
+            for c in self.input:
+                self._path.append(self._path[-1].children.get(c) if self._path[-1] else None)
+
+        return MatchDelta(added, ()) if added else NO_CHANGE
+
+    def push(self, char):
+        """
+        Advance by one typed key
+
+        Args:
+            char: Typed character
+
+        Returns:
+            MatchDelta
+        """
+        parent = self.node
+        child = parent.children.get(char) if parent is not None else None
+        self._path.append(child)
+        self.input += char
+
+        if parent is None:
+            return NO_CHANGE
+        if parent is self._root:
+            # First key: the new match set lights up
+            return MatchDelta(self._highlighted(child), ())
+        # Narrowing: everything outside the chosen subtree goes dark
+        return MatchDelta((), self._outside(parent, char))
+
+    def pop(self):
+        """
+        Undo the last key (backspace)
+
+        Returns:
+            MatchDelta
+        """
+        if not self.input:
+            return NO_CHANGE
+
+        char = self.input[-1]
+        child = self._path.pop()
+        self.input = self.input[:-1]
+        parent = self.node
+
+        if parent is None:
+            return NO_CHANGE
+        if parent is self._root:
+            return MatchDelta((), self._highlighted(child))
+        return MatchDelta(self._outside(parent, char), ())
+
+    def reset(self):
+        """
+        Clear the input
+
+        Returns:
+            MatchDelta
+        """
+        removed = self._highlighted(self.node)
+        self._path = [self._root]
+        self.input = ""
+        return MatchDelta((), removed) if removed else NO_CHANGE
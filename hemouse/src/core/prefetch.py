@@ -0,0 +1,342 @@
+"""
+HEMouse Prefetch Worker
+Speculative background detection whenever the foreground window changes
+"""
+import queue
+import threading
+import time
+from collections import namedtuple
+
+
+# Detection result kept ready for the next activation
+PrefetchResult = namedtuple('PrefetchResult', ['hwnd', 'elements', 'labels', 'timestamp', 'fingerprint'])
+
+
+class ForegroundSource:
+    """Source of foreground window changes"""
+
+    def current(self):
+        """Get current foreground window handle"""
+        raise NotImplementedError
+
+    def wait_for_change(self, timeout):
+        """
+        Block until the foreground window changes
+
+        Args:
+            timeout: Maximum wait in seconds
+
+        Returns:
+            New foreground hwnd, or None on timeout
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release resources"""
+        pass
+
+
+class PollingForegroundSource(ForegroundSource):
+    """Foreground source polling GetForegroundWindow"""
+
+    def __init__(self, get_foreground=None, interval=0.2):
+        """
+        Args:
+            get_foreground: Callable returning the foreground hwnd (default: win32gui)
+            interval: Polling interval in seconds
+        """
+        if get_foreground is None:
+            import win32gui
+            get_foreground = win32gui.GetForegroundWindow
+        self.get_foreground = get_foreground
+        self.interval = interval
+        self._last = get_foreground()
+
+    def current(self):
+        return self.get_foreground()
+
+    def wait_for_change(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            hwnd = self.get_foreground()
+            if hwnd != self._last:
+                self._last = hwnd
+                return hwnd
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(self.interval, remaining))
+
+
+class WinEventForegroundSource(ForegroundSource):
+    """Foreground source driven by a SetWinEventHook(EVENT_SYSTEM_FOREGROUND) hook"""
+
+    EVENT_SYSTEM_FOREGROUND = 0x0003
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    WM_QUIT = 0x0012
+
+    def __init__(self):
+        import ctypes
+        self._ctypes = ctypes
+        self._user32 = ctypes.windll.user32
+        self._events = queue.Queue()
+        self._hook = None
+        self._thread_id = None
+
+        # The hook delivers events to the thread that installed it, which
+        # therefore needs its own message loop
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._hook_loop, args=(ready,), daemon=True)
+        self._thread.start()
+        ready.wait(timeout=1.0)
+        if not self._hook:
+            raise OSError("SetWinEventHook failed")
+
+    def _hook_loop(self, ready):
+        ctypes = self._ctypes
+        from ctypes import wintypes
+
+        WinEventProc = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+        )
+
+        def on_event(hook, event, hwnd, id_object, id_child, thread_id, event_time):
+            if hwnd:
+                self._events.put(hwnd)
+
+        self._callback = WinEventProc(on_event)  # Keep reference alive
+        self._user32.SetWinEventHook.restype = wintypes.HANDLE
+        self._hook = self._user32.SetWinEventHook(
+            self.EVENT_SYSTEM_FOREGROUND, self.EVENT_SYSTEM_FOREGROUND,
+            0, self._callback, 0, 0, self.WINEVENT_OUTOFCONTEXT
+        )
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        ready.set()
+
+        msg = wintypes.MSG()
+        while self._user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+            self._user32.TranslateMessage(ctypes.byref(msg))
+            self._user32.DispatchMessageW(ctypes.byref(msg))
+
+        if self._hook:
+            self._user32.UnhookWinEvent(self._hook)
+
+    def current(self):
+        return self._user32.GetForegroundWindow()
+
+    def wait_for_change(self, timeout):
+        try:
+            hwnd = self._events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+        # Only the latest change matters
+        while not self._events.empty():
+            hwnd = self._events.get_nowait()
+        return hwnd
+
+    def close(self):
+        if self._thread_id:
+            self._user32.PostThreadMessageW(self._thread_id, self.WM_QUIT, 0, 0)
+
+
+def create_foreground_source():
+    """Create WinEvent hook source, falling back to polling"""
+    try:
+        return WinEventForegroundSource()
+    except Exception as e:
+        print(f"⚠️ WinEvent hook unavailable ({e}), polling foreground window")
+        return PollingForegroundSource()
+
+
+def is_on_battery():
+    """Check if the machine is running on battery power"""
+    try:
+        import win32api
+        return win32api.GetSystemPowerStatus()['ACLineStatus'] == 0
+    except Exception:
+        return False
+
+
+class PrefetchWorker:
+    """
+    Background worker that detects elements and generates labels for each new
+    foreground window, so activation only has to paint
+
+    CPU use is capped as a duty cycle: after a job that took `c` seconds, the
+    worker stays idle until c / cpu_budget seconds have passed. The cost is
+    the wall time of the detect call, not this thread's CPU time: detection
+    runs in the worker subprocess (isolated mode) and in the target app's
+    UIA provider, neither of which would show up here.
+
+    A result is only handed out while its window still has the fingerprint it
+    had when detection started (see snapshot_cache.window_fingerprint), so a
+    window that scrolled or changed since is detected again instead.
+    """
+
+    def __init__(self, detect, generate_labels, source, cpu_budget=0.1,
+                 battery_budget=0.02, on_battery=is_on_battery, max_age=30.0, thread_init=None,
+                 exclude=None, fingerprint=None):
+        """
+        Initialize worker
+
+        Args:
+            detect: Callable(hwnd) returning element list
+            generate_labels: Callable(count) returning label list
+            source: ForegroundSource
+            cpu_budget: Max fraction of one core used on AC power
+            battery_budget: Max fraction of one core used on battery
+            on_battery: Callable returning True when on battery
+            max_age: Seconds after which a prefetched result is no longer used
+            thread_init: Callable run once on the worker thread (e.g. COM init)
+            exclude: Callable(hwnd) returning True for windows never to prefetch
+                     (e.g. our own overlay)
+            fingerprint: Callable(hwnd) returning the window's current fingerprint
+                         (e.g. ElementDetector.fingerprint); None trusts results until max_age
+        """
+        self.detect = detect
+        self.generate_labels = generate_labels
+        self.source = source
+        self.cpu_budget = cpu_budget
+        self.battery_budget = battery_budget
+        self.on_battery = on_battery
+        self.max_age = max_age
+        self.thread_init = thread_init
+        self.exclude = exclude
+        self.fingerprint = fingerprint
+
+        self.running = False
+        self.thread = None
+        self._lock = threading.Lock()
+        self._result = None
+        self._last_job_time = 0.0
+        self.stats = {'prefetched': 0, 'stale': 0, 'changed': 0, 'used': 0, 'throttled_time': 0.0}
+
+    def start(self):
+        """Start worker thread"""
+        if self.running:
+            return
+
+        self.running = True
+        self.thread = threading.Thread(target=self._worker_loop, daemon=True)
+        self.thread.start()
+        print("🟢 Prefetch worker started")
+
+    def stop(self):
+        """Stop worker thread"""
+        self.running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=1)
+        self.source.close()
+        print("🔴 Prefetch worker stopped")
+
+    def take(self, hwnd):
+        """
+        Get prefetched result for a window
+
+        Args:
+            hwnd: Window about to be labelled
+
+        Returns:
+            PrefetchResult or None if nothing fresh is ready for this window
+        """
+        with self._lock:
+            result = self._result
+            if result is None or result.hwnd != hwnd:
+                return None
+            if time.monotonic() - result.timestamp > self.max_age:
+                self._result = None
+                return None
+
+        if self.fingerprint is not None and (result.fingerprint is None or
+                                             self._fingerprint(hwnd) != result.fingerprint):
+            # Scrolled, re-laid out or changed (or unverifiable): positions may be stale
+            with self._lock:
+                if self._result is result:
+                    self._result = None
+                self.stats['changed'] += 1
+            return None
+
+        with self._lock:
+            self.stats['used'] += 1
+        return result
+
+    def _fingerprint(self, hwnd):
+        """Current fingerprint of a window (None without a fingerprint function or on error)"""
+        if self.fingerprint is None:
+            return None
+        try:
+            return self.fingerprint(hwnd)
+        except Exception as e:
+            print(f"⚠️ Prefetch fingerprint error: {e}")
+            return None
+
+    def _current_budget(self):
+        return self.battery_budget if self.on_battery() else self.cpu_budget
+
+    def _worker_loop(self):
+        """Main worker loop (runs in background thread)"""
+        if self.thread_init:
+            self.thread_init()
+
+        pending = self.source.current()
+        if pending and self.exclude and self.exclude(pending):
+            pending = None
+        idle_until = 0.0
+
+        while self.running:
+            hwnd = self.source.wait_for_change(timeout=0.2)
+            if hwnd is not None and self.exclude and self.exclude(hwnd):
+                continue
+            if hwnd is not None:
+                pending = hwnd
+                # Focus moved - drop result for the previous window
+                with self._lock:
+                    if self._result is not None and self._result.hwnd != hwnd:
+                        self._result = None
+                        self.stats['stale'] += 1
+
+            if not pending:
+                continue
+
+            # Respect CPU budget; newer focus changes replace the pending window meanwhile
+            wait = idle_until - time.monotonic()
+            if wait > 0:
+                continue
+
+            job_hwnd, pending = pending, None
+            self._run_job(job_hwnd)
+
+            cost = self._last_job_time
+            cooldown = cost / max(self._current_budget(), 1e-3) - cost
+            if cooldown > 0:
+                self.stats['throttled_time'] += cooldown
+            idle_until = time.monotonic() + max(cooldown, 0.0)
+
+    def _run_job(self, hwnd):
+        """Detect and label one window, publishing the result unless focus moved meanwhile"""
+        start = time.monotonic()
+
+        # Taken first: changes during detection also invalidate the result
+        fingerprint = self._fingerprint(hwnd)
+        try:
+            elements = self.detect(hwnd)
+            labels = self.generate_labels(len(elements))
+        except Exception as e:
+            print(f"❌ Prefetch error: {e}")
+            elements = None
+
+        self._last_job_time = time.monotonic() - start
+
+        if elements is None:
+            return
+
+        if self.source.current() != hwnd:
+            # Focus moved during detection - result is stale
+            self.stats['stale'] += 1
+            return
+
+        with self._lock:
+            self._result = PrefetchResult(hwnd, elements, labels, time.monotonic(), fingerprint)
+            self.stats['prefetched'] += 1
@@ -0,0 +1,95 @@
+"""
+HEMouse Element Ranking
+Keeps the most likely targets so dense windows get short labels and few canvas items
+"""
+import heapq
+
+from .detection_engine import distance_to_rect, priority_tier
+
+
+class ElementRanker:
+    """
+    Scores elements and keeps the top k
+
+    The score is a weighted sum of four terms in [0, 1]:
+    - type: high priority controls 1.0, named medium priority ones 0.5
+    - size: grows with the square root of the area, saturating at `full_size` px
+    - distance: 1 / (1 + d / reach) for the distance d to the cursor
+    - history: c / (c + 1) for the decayed click count c (see ClickHistory)
+
+    Selection uses a size-k heap, O(n log k).
+    """
+
+    def __init__(self, limit=60, type_weight=1.0, size_weight=0.5, distance_weight=1.0, history_weight=2.0,
+                 full_size=48, reach=400):
+        """
+        Initialize ranker
+
+        Args:
+            limit: Elements labelled before the user expands (k)
+            type_weight: Weight of the control type priority
+            size_weight: Weight of the element size
+            distance_weight: Weight of the distance to the cursor
+            history_weight: Weight of the click history
+            full_size: Side length in px from which size no longer adds score
+            reach: Distance in px at which the distance term halves
+        """
+        self.limit = limit
+        self.type_weight = type_weight
+        self.size_weight = size_weight
+        self.distance_weight = distance_weight
+        self.history_weight = history_weight
+        self.full_size = full_size
+        self.reach = reach
+
+    def scores(self, elements, cursor=None, weights=None):
+        """
+        Score elements
+
+        Args:
+            elements: List of ElementRecord
+            cursor: Optional (x, y) mouse position
+            weights: Optional click counts aligned with elements
+
+        Returns:
+            List of floats aligned with elements (higher is more likely)
+        """
+        scores = []
+        tiers = {}  # Few distinct control types per window
+        for i, element in enumerate(elements):
+            key = (element.control_type, bool(element.name and element.name.strip()))
+            tier = tiers.get(key)
+            if tier is None:
+                tier = tiers[key] = priority_tier(element.control_type, element.name)
+            score = self.type_weight * tier / 2
+            side = (max(element.width(), 0) * max(element.height(), 0)) ** 0.5
+            score += self.size_weight * min(side / self.full_size, 1.0)
+            if cursor is not None:
+                score += self.distance_weight / (1 + distance_to_rect(cursor, element) / self.reach)
+            if weights is not None and weights[i] > 0:
+                score += self.history_weight * weights[i] / (weights[i] + 1)
+            scores.append(score)
+        return scores
+
+    def top_k(self, elements, cursor=None, weights=None, k=None):
+        """
+        Split elements into the top k and the rest
+
+        Args:
+            elements: List of ElementRecord
+            cursor: Optional (x, y) mouse position
+            weights: Optional click counts aligned with elements
+            k: Elements to keep (default: self.limit)
+
+        Returns:
+            (kept, rest) index lists: kept best first, rest in traversal order
+            (all elements in traversal order if there are at most k)
+        """
+        k = self.limit if k is None else k
+        if len(elements) <= k:
+            return list(range(len(elements))), []
+
+        scores = self.scores(elements, cursor, weights)
+        kept = heapq.nlargest(k, range(len(elements)), key=scores.__getitem__)
+        chosen = set(kept)
+        return kept, [i for i in range(len(elements)) if i not in chosen]
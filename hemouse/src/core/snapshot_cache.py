@@ -0,0 +1,139 @@
+"""
+HEMouse Snapshot Cache
+LRU cache of detection results per window with cheap revalidation
+"""
+from collections import OrderedDict
+
+
+def window_fingerprint(provider, window):
+    """
+    Compute a cheap fingerprint of a window's element tree
+
+    Only the top level is inspected: child count, a hash of the children's
+    runtime ids and the window rectangle. This costs 2 + (child count)
+    round-trips instead of a full traversal.
+
+    Args:
+        provider: UIA provider
+        window: Window root element
+
+    Returns:
+        Hashable fingerprint tuple
+    """
+    children = provider.children(window)
+    runtime_ids = tuple(tuple(provider.runtime_id(child)) for child in children)
+    rect = provider.rectangle(window)
+    return (len(children), hash(runtime_ids), (rect.left, rect.top, rect.right, rect.bottom))
+
+
+class SnapshotCache:
+    """LRU cache of element snapshots keyed by window (hwnd, process, rect)"""
+
+    def __init__(self, max_entries=8, max_elements=5000):
+        """
+        Initialize cache
+
+        Args:
+            max_entries: Maximum number of cached windows
+            max_elements: Memory budget as total number of cached elements
+        """
+        self.max_entries = max_entries
+        self.max_elements = max_elements
+        self._snapshots = OrderedDict()  # key -> (fingerprint, elements)
+        self._element_count = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    @property
+    def element_count(self):
+        """Total number of elements currently cached"""
+        return self._element_count
+
+    def get(self, key, fingerprint):
+        """
+        Get cached elements if the snapshot is still valid
+
+        Args:
+            key: Window key (hwnd, pid, rect)
+            fingerprint: Current window fingerprint
+
+        Returns:
+            Cached element list or None on miss
+        """
+        entry = self._snapshots.get(key)
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+
+        cached_fingerprint, elements = entry
+        if cached_fingerprint != fingerprint:
+            # Window content changed - drop stale snapshot
+            self._remove(key)
+            self.stats['invalidations'] += 1
+            self.stats['misses'] += 1
+            return None
+
+        self._snapshots.move_to_end(key)
+        self.stats['hits'] += 1
+        return elements
+
+    def put(self, key, fingerprint, elements):
+        """
+        Store snapshot, evicting least recently used ones to stay within budget
+
+        Args:
+            key: Window key (hwnd, pid, rect)
+            fingerprint: Window fingerprint at detection time
+            elements: Detected element list
+        """
+        if key in self._snapshots:
+            self._remove(key)
+
+        # Snapshot alone exceeds the budget - not worth caching
+        if len(elements) > self.max_elements:
+            return
+
+        self._snapshots[key] = (fingerprint, elements)
+        self._element_count += len(elements)
+
+        while len(self._snapshots) > self.max_entries or self._element_count > self.max_elements:
+            oldest_key = next(iter(self._snapshots))
+            self._remove(oldest_key)
+            self.stats['evictions'] += 1
+
+    def get_or_detect(self, key, fingerprint, detect):
+        """
+        Return cached elements, running detect() only on a miss
+
+        Args:
+            key: Window key (hwnd, pid, rect)
+            fingerprint: Current window fingerprint
+            detect: Callable returning a fresh element list
+
+        Returns:
+            Tuple (elements, cache_hit)
+        """
+        elements = self.get(key, fingerprint)
+        if elements is not None:
+            return elements, True
+
+        elements = detect()
+        self.put(key, fingerprint, elements)
+        return elements, False
+
+    def invalidate(self, key):
+        """Drop snapshot for a window"""
+        if key in self._snapshots:
+            self._remove(key)
+            self.stats['invalidations'] += 1
+
+    def clear(self):
+        """Drop all snapshots"""
+        self._snapshots.clear()
+        self._element_count = 0
+
+    def _remove(self, key):
+        _, elements = self._snapshots.pop(key)
+        self._element_count -= len(elements)
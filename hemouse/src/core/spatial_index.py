@@ -0,0 +1,96 @@
+"""
+HEMouse Spatial Index
+Uniform grid over screen rectangles for fast overlap queries
+"""
+from collections import defaultdict
+
+
+def rect_area(rect):
+    """Area of a (left, top, right, bottom) tuple, 0 for empty rects"""
+    return max(rect[2] - rect[0], 0) * max(rect[3] - rect[1], 0)
+
+
+def iou(a, b):
+    """
+    Intersection over union of two (left, top, right, bottom) tuples
+
+    Returns:
+        0.0 (disjoint) .. 1.0 (identical)
+    """
+    inter = rect_area((max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3])))
+    if inter == 0:
+        return 0.0
+    return inter / (rect_area(a) + rect_area(b) - inter)
+
+
+class SpatialGrid:
+    """
+    Uniform grid bucketing rects by the cells they cover
+
+    Insert and query cost is proportional to the number of cells a rect covers
+    plus the items in those cells, so with a cell size near the typical element
+    size both stay close to constant.
+    """
+
+    def __init__(self, cell_size=64):
+        """
+        Initialize grid
+
+        Args:
+            cell_size: Cell edge length in pixels
+        """
+        self.cell_size = max(int(cell_size), 1)
+        self._cells = defaultdict(list)  # (cx, cy) -> [(rect, item)]
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _cell_range(self, rect):
+        size = self.cell_size
+        return (range(rect[0] // size, max(rect[2] - 1, rect[0]) // size + 1),
+                range(rect[1] // size, max(rect[3] - 1, rect[1]) // size + 1))
+
+    def insert(self, rect, item):
+        """
+        Add item covering rect (left, top, right, bottom)
+
+        Args:
+            rect: Integer rect tuple
+            item: Any payload returned by query()
+        """
+        xs, ys = self._cell_range(rect)
+        entry = (rect, item)
+        for cx in xs:
+            for cy in ys:
+                self._cells[(cx, cy)].append(entry)
+        self._count += 1
+
+    def query(self, rect):
+        """
+        Find items whose rect overlaps rect
+
+        Args:
+            rect: Integer rect tuple
+
+        Returns:
+            List of (rect, item), each item at most once
+        """
+        found = []
+        seen = set()
+        xs, ys = self._cell_range(rect)
+        for cx in xs:
+            for cy in ys:
+                for entry in self._cells.get((cx, cy), ()):
+                    other = entry[0]
+                    if id(entry) in seen:
+                        continue
+                    if other[0] < rect[2] and other[2] > rect[0] and other[1] < rect[3] and other[3] > rect[1]:
+                        seen.add(id(entry))
+                        found.append(entry)
+        return found
+
+    def clear(self):
+        """Remove all items"""
+        self._cells.clear()
+        self._count = 0
@@ -0,0 +1,241 @@
+"""
+HEMouse Stable Labels
+Keeps each element's label across activations of the same window
+"""
+import json
+import os
+import threading
+from collections import Counter, OrderedDict
+from itertools import islice
+
+from .click_history import element_fingerprint
+from .detection_profiles import default_profile_path
+from .label_generator import build_labels
+
+
+def default_label_path():
+    """labels.json next to the detection profiles"""
+    return os.path.join(os.path.dirname(default_profile_path()), 'labels.json')
+
+
+def snapshot_fingerprints(records, origin=(0, 0)):
+    """
+    Fingerprint every element of a snapshot, unique within the snapshot
+
+    Named elements include their position too (relative to the window,
+    bucketed), so identically named siblings keep their own labels. Elements
+    that still share a fingerprint get their occurrence number appended in
+    traversal order.
+
+    Args:
+        records: List of ElementRecord
+        origin: (left, top) of the target window
+
+    Returns:
+        List of fingerprint strings aligned with records
+    """
+    seen = Counter()
+    fingerprints = []
+    for record in records:
+        fingerprint = element_fingerprint(record, origin, with_position=True)
+        seen[fingerprint] += 1
+        if seen[fingerprint] > 1:
+            fingerprint = f"{fingerprint}#{seen[fingerprint]}"
+        fingerprints.append(fingerprint)
+    return fingerprints
+
+
+class StableLabelStore:
+    """
+    Persistent element -> label mapping per window
+
+    Each activation draws labels from the optimal code for the current count
+    (build_labels), so stability never costs extra keystrokes. An element
+    keeps its previous label whenever that label is still part of the code;
+    only new elements and elements whose label dropped out of the code get
+    free labels. Claims are resolved most recent first: runtime id (same app
+    session), then fingerprints seen in the previous activation, then older
+    ones. Everything is O(n) per activation: each window's entries are kept
+    in least recently seen order, so eviction drops from the front.
+
+    The file is bounded by max_windows (LRU) x max_entries per window; an
+    element that disappears is remembered until max_entries newer ones push
+    it out, so a closed menu gets its labels back when reopened. assign()
+    runs before the first paint, so it never writes the file itself: changes
+    are flushed from a background timer (and by flush() on exit).
+    """
+
+    def __init__(self, charset="asdfghjkl", path=None, max_windows=32, max_entries=2000, autosave=True,
+                 save_delay=2.0):
+        """
+        Initialize store (loads existing mappings)
+
+        Args:
+            charset: Label characters (same as the LabelGenerator's)
+            path: JSON file (default: default_label_path(); '' keeps mappings in memory only)
+            max_windows: Windows remembered
+            max_entries: Elements remembered per window
+            autosave: Write the file in the background after assignments
+            save_delay: Seconds after an assignment before that write (later ones join it)
+        """
+        self.charset = charset
+        self.path = default_label_path() if path is None else path
+        self.max_windows = max_windows
+        self.max_entries = max_entries
+        self.autosave = autosave
+        self.save_delay = save_delay
+        self._windows = OrderedDict()  # window key -> {'tick': n, 'labels': {fingerprint: [label, tick]}}
+        self._runtime_ids = {}  # window key -> {runtime id: label} (current app session only)
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # One writer at a time
+        self._dirty = False
+        self._timer = None
+        self.load()
+
+    def __len__(self):
+        return len(self._windows)
+
+    def load(self):
+        """Load mappings from disk (missing or corrupt file -> empty)"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != 2:
+                return  # Older fingerprints (no position for named elements) would not match
+            with self._lock:
+                self._windows = OrderedDict(data.get('windows', {}))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable label mappings: {e}")
+
+    def save(self):
+        """Write mappings to disk atomically (serialized outside the store lock)"""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                # Entries are replaced, never mutated: shallow copies are a consistent snapshot
+                windows = {key: {'tick': window['tick'], 'labels': dict(window['labels'])}
+                           for key, window in self._windows.items()}
+                self._dirty = False
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': 2, 'windows': windows}, f, separators=(',', ':'))
+            os.replace(temp_path, self.path)
+
+    def flush(self):
+        """Write pending changes now (e.g. on exit)"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            dirty = self._dirty
+        if dirty:
+            try:
+                self.save()
+            except OSError as e:
+                print(f"⚠️ Could not save label mappings: {e}")
+
+    def _schedule_save(self):
+        """Mark the store dirty and start the background write unless one is pending (lock held)"""
+        self._dirty = True
+        if self.autosave and self.path and self._timer is None:
+            self._timer = threading.Timer(self.save_delay, self._timed_save)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timed_save(self):
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    def assign(self, window_key, records, origin=(0, 0), weights=None):
+        """
+        Label a snapshot, reusing previous labels where possible
+
+        Args:
+            window_key: Stable window identity (e.g. 'explorer.exe|CabinetWClass')
+            records: List of ElementRecord
+            origin: (left, top) of the window, for position-based fingerprints
+            weights: Optional usage weights; heavier new elements get the shorter free labels
+
+        Returns:
+            List of labels aligned with records
+        """
+        count = len(records)
+        if count == 0:
+            return []
+
+        code = build_labels(self.charset, count)
+        available = set(code)
+        fingerprints = snapshot_fingerprints(records, origin)
+
+        with self._lock:
+            window = self._windows.pop(window_key, None) or {'tick': 0, 'labels': {}}
+            self._windows[window_key] = window  # Most recently used last
+            while len(self._windows) > self.max_windows:
+                evicted, _ = self._windows.popitem(last=False)
+                self._runtime_ids.pop(evicted, None)
+
+            stored = window['labels']
+            last_tick = window['tick']
+            tick = window['tick'] = last_tick + 1
+            runtime_ids = self._runtime_ids.get(window_key, {})
+
+            labels = [None] * count
+
+            def claim(index, label):
+                if label in available and labels[index] is None:
+                    available.discard(label)
+                    labels[index] = label
+
+            # Most recent claims first
+            for i, record in enumerate(records):
+                if record.runtime_id is not None and record.runtime_id in runtime_ids:
+                    claim(i, runtime_ids[record.runtime_id])
+            older = []
+            for i, fingerprint in enumerate(fingerprints):
+                entry = stored.get(fingerprint)
+                if entry and labels[i] is None:
+                    if entry[1] == last_tick:
+                        claim(i, entry[0])
+                    else:
+                        older.append((i, entry[0]))
+            for i, label in older:
+                claim(i, label)
+
+            # Free labels (shortest first) to the remaining elements, heaviest first
+            free = (label for label in code if label in available)
+            unassigned = [i for i in range(count) if labels[i] is None]
+            if weights is not None:
+                unassigned.sort(key=lambda i: -weights[i])
+            for i in unassigned:
+                labels[i] = next(free)
+
+            # Remember this activation (moved to the end: least recently seen first)
+            for fingerprint, label in zip(fingerprints, labels):
+                stored.pop(fingerprint, None)
+                stored[fingerprint] = [label, tick]
+            excess = len(stored) - self.max_entries
+            if excess > 0:
+                for fingerprint in list(islice(stored, excess)):
+                    del stored[fingerprint]
+            self._runtime_ids[window_key] = {record.runtime_id: label for record, label in zip(records, labels)
+                                             if record.runtime_id is not None}
+            self._schedule_save()
+
+        return labels
+
+    def reset(self, window_key=None):
+        """Forget mappings (all or one window)"""
+        with self._lock:
+            if window_key is None:
+                self._windows.clear()
+                self._runtime_ids.clear()
+            else:
+                self._windows.pop(window_key, None)
+                self._runtime_ids.pop(window_key, None)
+            self._dirty = True
+        self.flush()
@@ -0,0 +1,169 @@
+"""
+HEMouse UIA Provider
+Windows UI Automation access for the detection engines (see detection_engine.py)
+"""
+from pywinauto import Desktop
+from pywinauto.uia_defines import IUIA
+from pywinauto.uia_element_info import UIAElementInfo
+from pywinauto.controls.uiawrapper import UIAWrapper
+from pywinauto.win32structures import RECT
+import pythoncom
+import win32api
+import win32con
+
+from .detection_engine import CachedElement, matches_types
+
+
+class UIAProvider:
+    """UIA provider backed by pywinauto and the IUIAutomation COM interface"""
+
+    def __init__(self):
+        self.desktop = Desktop(backend="uia")
+        self._conditions = {}  # control types tuple -> IUIAutomationCondition
+        self._visit_request = None  # IUIAutomationCacheRequest for visit_properties
+
+    def init_thread(self):
+        """Initialize COM (MTA) on a worker thread before it makes UIA calls"""
+        pythoncom.CoInitializeEx(pythoncom.COINIT_MULTITHREADED)
+
+    def window(self, hwnd):
+        """Get wrapper for top-level window"""
+        return self.desktop.window(handle=hwnd).wrapper_object()
+
+    def children(self, element):
+        return element.children()
+
+    def control_type(self, element):
+        return element.element_info.control_type
+
+    def name(self, element):
+        return element.window_text()
+
+    def is_password(self, element):
+        return element.is_password()
+
+    def is_offscreen(self, element):
+        return bool(element.element_info.element.CurrentIsOffscreen)
+
+    def rectangle(self, element):
+        return element.rectangle()
+
+    def runtime_id(self, element):
+        return element.element_info.runtime_id
+
+    def visit_properties(self, element):
+        """
+        Control type, bounding rectangle and IsOffscreen of one element
+
+        BuildUpdatedCache fetches all three in a single cross-process request
+        instead of one per property.
+        """
+        iuia = IUIA()
+        if self._visit_request is None:
+            cache_request = iuia.iuia.CreateCacheRequest()
+            for prop_id in (iuia.UIA_dll.UIA_ControlTypePropertyId,
+                            iuia.UIA_dll.UIA_BoundingRectanglePropertyId,
+                            iuia.UIA_dll.UIA_IsOffscreenPropertyId):
+                cache_request.AddProperty(prop_id)
+            self._visit_request = cache_request
+
+        cached = element.element_info.element.BuildUpdatedCache(self._visit_request)
+        bounds = cached.CachedBoundingRectangle
+        return (iuia.known_control_type_ids.get(cached.CachedControlType, ''),
+                RECT(bounds.left, bounds.top, bounds.right, bounds.bottom),
+                bool(cached.CachedIsOffscreen))
+
+    def find_all_cached(self, root, control_types):
+        """
+        Fetch all elements of the given control types below root in one request
+
+        Uses FindAllBuildCache with an OR condition over the control type ids
+        and a CacheRequest for runtime id, control type, name, bounding rectangle,
+        IsPassword and IsOffscreen, so no further cross-process calls are needed.
+        """
+        iuia = IUIA()
+        uia_dll = iuia.UIA_dll
+
+        cache_request = iuia.iuia.CreateCacheRequest()
+        for prop_id in (uia_dll.UIA_RuntimeIdPropertyId,
+                        uia_dll.UIA_ControlTypePropertyId,
+                        uia_dll.UIA_NamePropertyId,
+                        uia_dll.UIA_BoundingRectanglePropertyId,
+                        uia_dll.UIA_IsPasswordPropertyId,
+                        uia_dll.UIA_IsOffscreenPropertyId):
+            cache_request.AddProperty(prop_id)
+
+        found = root.element_info.element.FindAllBuildCache(
+            iuia.tree_scope['subtree'],
+            self._control_type_condition(tuple(control_types)),
+            cache_request
+        )
+
+        results = []
+        for i in range(found.Length if found else 0):
+            uia_element = found.GetElement(i)
+            bounds = uia_element.CachedBoundingRectangle
+            results.append(CachedElement(
+                runtime_id=tuple(uia_element.GetCachedPropertyValue(uia_dll.UIA_RuntimeIdPropertyId)),
+                control_type=iuia.known_control_type_ids.get(uia_element.CachedControlType, ''),
+                name=uia_element.CachedName or '',
+                rect=RECT(bounds.left, bounds.top, bounds.right, bounds.bottom),
+                is_password=bool(uia_element.CachedIsPassword),
+                is_offscreen=bool(uia_element.CachedIsOffscreen)
+            ))
+        return results
+
+    def find_by_runtime_id(self, root, runtime_id, control_type=None):
+        """
+        Resolve a runtime id to a live wrapper below root
+
+        Runs one FindAllBuildCache over elements of the given control type with
+        the runtime id cached and compares the ids locally (property conditions
+        on array-valued properties are unreliable through comtypes).
+        """
+        iuia = IUIA()
+        uia_dll = iuia.UIA_dll
+
+        cache_request = iuia.iuia.CreateCacheRequest()
+        cache_request.AddProperty(uia_dll.UIA_RuntimeIdPropertyId)
+
+        if control_type:
+            condition = iuia.iuia.CreatePropertyCondition(
+                uia_dll.UIA_ControlTypePropertyId, iuia.known_control_types[control_type])
+        else:
+            condition = iuia.iuia.CreateTrueCondition()
+
+        found = root.element_info.element.FindAllBuildCache(iuia.tree_scope['subtree'], condition, cache_request)
+        runtime_id = tuple(runtime_id)
+        for i in range(found.Length if found else 0):
+            uia_element = found.GetElement(i)
+            if tuple(uia_element.GetCachedPropertyValue(uia_dll.UIA_RuntimeIdPropertyId)) == runtime_id:
+                return UIAWrapper(UIAElementInfo(uia_element))
+        return None
+
+    def _control_type_condition(self, control_types):
+        """Build (and memoize) OR condition over all UIA control types matching the list"""
+        if control_types not in self._conditions:
+            iuia = IUIA()
+            type_ids = [type_id for type_name, type_id in iuia.known_control_types.items()
+                        if matches_types(type_name, control_types)]
+
+            # Conditions are built client-side, chaining avoids SAFEARRAY marshalling
+            condition = None
+            for type_id in type_ids:
+                type_condition = iuia.iuia.CreatePropertyCondition(
+                    iuia.UIA_dll.UIA_ControlTypePropertyId, type_id)
+                condition = type_condition if condition is None else \
+                    iuia.iuia.CreateOrCondition(condition, type_condition)
+            self._conditions[control_types] = condition
+
+        return self._conditions[control_types]
+
+    def screen_bounds(self):
+        """Get virtual screen bounds (all monitors)"""
+        return (
+            win32api.GetSystemMetrics(win32con.SM_XVIRTUALSCREEN),
+            win32api.GetSystemMetrics(win32con.SM_YVIRTUALSCREEN),
+            win32api.GetSystemMetrics(win32con.SM_CXVIRTUALSCREEN),
+            win32api.GetSystemMetrics(win32con.SM_CYVIRTUALSCREEN),
+        )
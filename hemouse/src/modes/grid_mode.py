@@ -2,7 +2,6 @@
 HEMouse Grid Mode
 Grid-based mouse positioning mode (fallback when Hint mode fails)
 """
-import tkinter as tk
 import win32api
 import win32con
 
@@ -10,7 +9,7 @@ import win32con
 class GridMode:
     """Grid mode for coarse mouse positioning"""
 
-    def __init__(self, grid_size=3, region=None):
+    def __init__(self, grid_size=3, region=None, overlay=None):
         """
         Initialize Grid mode
 
@@ -18,93 +17,113 @@ class GridMode:
             grid_size: Size of grid (default 3x3)
             region: Region to display grid (None = fullscreen)
                    Dict with 'left', 'top', 'width', 'height'
+            overlay: OverlayWindow to draw on (the long-lived Hint mode overlay;
+                     a new one is created if None)
         """
         self.grid_size = grid_size
         self.region = region
-        self.root = None
-        self.canvas = None
+        if overlay is None:
+            from ui.overlay_window import OverlayWindow
+            overlay = OverlayWindow()
+        self.overlay = overlay
         self.active = False
         self.history = []  # For recursive refinement
 
-    def activate(self):
-        """Activate Grid mode"""
+    @property
+    def canvas(self):
+        return self.overlay.canvas
+
+    def activate(self, on_exit=None):
+        """
+        Activate Grid mode
+
+        Args:
+            on_exit: Optional function called once Grid mode has ended. If given,
+                     returns as soon as the grid is shown and the caller's Tk event
+                     loop drives the mode; otherwise blocks in its own loop
+        """
         if self.active:
+            if on_exit:
+                on_exit()
             return
 
         print("\n🟦 Activating Grid mode...")
 
-        # Create fullscreen window
-        self.root = tk.Tk()
-        self.root.attributes('-alpha', 0.5)  # 50% transparency
-        self.root.attributes('-topmost', True)
-        self.root.overrideredirect(True)
-
-        # Determine region
-        if self.region:
-            x = self.region['left']
-            y = self.region['top']
-            width = self.region['width']
-            height = self.region['height']
-        else:
-            x = 0
-            y = 0
-            width = self.root.winfo_screenwidth()
-            height = self.root.winfo_screenheight()
-
-        self.root.geometry(f"{width}x{height}+{x}+{y}")
-
-        # Create canvas
-        self.canvas = tk.Canvas(self.root, bg='black', highlightthickness=0)
-        self.canvas.pack(fill=tk.BOTH, expand=True)
-
-        # Draw grid
-        self._draw_grid(width, height)
+        self.overlay.create(alpha=0.5)  # 50% transparency
+        self._draw_grid()
 
         # Bind keyboard
-        self.root.bind('<KeyPress>', self._on_key_press)
-        self.root.bind('<Escape>', lambda e: self.deactivate())
-        self.root.bind('<BackSpace>', lambda e: self._go_back())
+        self.overlay.bind('<KeyPress>', self._on_key_press)
+        self.overlay.bind('<Escape>', lambda e: self.deactivate())
+        self.overlay.bind('<BackSpace>', lambda e: self._go_back())
+        self.overlay.unbind('<space>')
 
-        self.root.focus_force()
         self.active = True
 
         print("✅ Grid mode ready! Press 1-9 to select grid, ESC to exit")
 
-        # Run event loop
-        self.root.mainloop()
-        self.active = False
+        if on_exit is None:
+            # Run event loop
+            self.overlay.run_event_loop()
+            self._after_loop()
+        else:
+            self.overlay.run_event_loop(on_hidden=lambda: self._after_loop(on_exit))
 
-    def _draw_grid(self, width, height):
-        """Draw grid with numbered cells"""
+    def _after_loop(self, on_exit=None):
+        """Overlay hidden: remove Grid bindings, restore the overlay's own ESC handling for Hint mode"""
+        self.active = False
+        # bind_all outlives this instance: a left-over <BackSpace> would beat
+        # Hint mode's <KeyPress> handler (Backspace undo)
+        self.overlay.unbind('<BackSpace>')
+        self.overlay.bind('<Escape>', lambda e: self.overlay.hide())
+        if on_exit:
+            on_exit()
+
+    def _current_region(self):
+        """Current region in screen coordinates (left, top, width, height)"""
+        if self.region:
+            return self.region['left'], self.region['top'], self.region['width'], self.region['height']
+        return (0, 0, win32api.GetSystemMetrics(win32con.SM_CXSCREEN),
+                win32api.GetSystemMetrics(win32con.SM_CYSCREEN))
+
+    def _draw_grid(self):
+        """Draw grid with numbered cells over the current region"""
+        self.overlay.clear()
+        left, top, width, height = self._current_region()
+        # Draw on the region's monitor window, its canvas origin is the monitor's top-left
+        _, (offset_x, offset_y) = self.overlay.focus_at(left + width // 2, top + height // 2)
+        left -= offset_x
+        top -= offset_y
         cell_width = width // self.grid_size
         cell_height = height // self.grid_size
+        add = self.overlay.add_item
 
         # Draw grid lines
         for i in range(1, self.grid_size):
             # Vertical lines
-            self.canvas.create_line(
-                i * cell_width, 0, i * cell_width, height,
+            add(self.canvas.create_line(
+                left + i * cell_width, top, left + i * cell_width, top + height,
                 fill='yellow', width=2
-            )
+            ))
             # Horizontal lines
-            self.canvas.create_line(
-                0, i * cell_height, width, i * cell_height,
+            add(self.canvas.create_line(
+                left, top + i * cell_height, left + width, top + i * cell_height,
                 fill='yellow', width=2
-            )
+            ))
 
         # Draw numbered labels (1-9)
         label_num = 1
         for row in range(self.grid_size):
             for col in range(self.grid_size):
-                x = col * cell_width + cell_width // 2
-                y = row * cell_height + cell_height // 2
+                x = left + col * cell_width + cell_width // 2
+                y = top + row * cell_height + cell_height // 2
 
-                self.canvas.create_text(
+                add(self.canvas.create_text(
                     x, y,
                     text=str(label_num),
                     font=('Arial', 48, 'bold'),
                     fill='yellow'
-                )
+                ))
                 label_num += 1
 
         print(f"✅ Drew {self.grid_size}x{self.grid_size} grid")
@@ -140,14 +159,11 @@ class GridMode:
 
             self.deactivate()
         else:
-            # Region is large - recurse with sub-grid
+            # Region is large - refine with a sub-grid on the same overlay
             print(f"🔍 Region too large - showing sub-grid")
             self.history.append(self.region)
-            self.deactivate()
-
-            # Create sub-grid
-            sub_grid = GridMode(grid_size=self.grid_size, region=region)
-            sub_grid.activate()
+            self.region = region
+            self._draw_grid()
 
     def _calculate_grid_region(self, grid_num):
         """
@@ -160,16 +176,7 @@ class GridMode:
             Dict with 'left', 'top', 'width', 'height'
         """
         # Determine current region
-        if self.region:
-            left = self.region['left']
-            top = self.region['top']
-            width = self.region['width']
-            height = self.region['height']
-        else:
-            left = 0
-            top = 0
-            width = win32api.GetSystemMetrics(win32con.SM_CXSCREEN)
-            height = win32api.GetSystemMetrics(win32con.SM_CYSCREEN)
+        left, top, width, height = self._current_region()
 
         cell_width = width // self.grid_size
         cell_height = height // self.grid_size
@@ -189,13 +196,8 @@ class GridMode:
         """Go back to previous grid level"""
         if len(self.history) > 0:
             print("⬅️ Going back to previous grid")
-            prev_region = self.history.pop()
-            self.deactivate()
-
-            # Show previous grid
-            prev_grid = GridMode(grid_size=self.grid_size, region=prev_region)
-            prev_grid.history = self.history
-            prev_grid.activate()
+            self.region = self.history.pop()
+            self._draw_grid()
         else:
             print("⚠️ Already at top level")
 
@@ -205,15 +207,16 @@ class GridMode:
             return
 
         print("🔴 Deactivating Grid mode...")
-        if self.root:
-            try:
-                self.root.destroy()
-            except:
-                pass
+        self.overlay.hide()
         self.active = False
 
 
 # Test code
 if __name__ == "__main__":
+    import os
+    import sys
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
     grid = GridMode()
     grid.activate()
\ No newline at end of file
@@ -2,15 +2,22 @@
 HEMouse Hint Mode
 Core Hint mode controller with element detection and label matching
 """
+import queue
+import threading
+import time
 import win32gui
 import win32con
 import win32api
 
+from core.label_matcher import LabelMatcher
+
 
 class HintMode:
     """Hint mode controller"""
 
-    def __init__(self, overlay_window, element_detector, label_generator):
+    def __init__(self, overlay_window, element_detector, label_generator, prefetcher=None,
+                 streaming=False, history=None, stable_labels=None, ranker=None, cancel_event=None,
+                 mode_manager=None):
         """
         Initialize Hint mode
 
@@ -18,56 +25,387 @@ class HintMode:
             overlay_window: OverlayWindow instance
             element_detector: ElementDetector instance
             label_generator: LabelGenerator instance
+            prefetcher: Optional PrefetchWorker with results ready for the foreground window
+            streaming: Paint labels batch by batch while detection is still running. When
+                       the whole snapshot arrives before the first paint (snapshot cache
+                       hit, e.g. warmed by the prefetcher) it is labelled like a full
+                       detection; only batches painted on arrival keep arrival order and
+                       skip history, stable_labels and ranker scores
+            history: Optional ClickHistory; frequently clicked targets get the shortest
+                     labels
+            stable_labels: Optional StableLabelStore; elements keep their labels across
+                           activations of the same window (takes precedence over history,
+                           whose weights then only order newly assigned labels)
+            ranker: Optional ElementRanker; only its top-k elements are labelled until
+                    Tab expands to the rest (for batches painted on arrival: the first k)
+            cancel_event: Optional threading.Event set from another thread to end the
+                          activation (e.g. CapsLock OFF); a Grid mode started from it
+                          is ended by the cancel Event of its own transition instead
+            mode_manager: Optional ModeManager the activation was entered through; Space
+                          fires 'grid' on it and the end of that Grid mode 'exit'
         """
         self.overlay = overlay_window
         self.detector = element_detector
         self.label_gen = label_generator
+        self.prefetcher = prefetcher
+        self.streaming = streaming
+        self.history = history
+        self.stable_labels = stable_labels
+        self.ranker = ranker
 
         self.elements = []
         self.labels = []
+        self.matcher = None
+        self._hidden = []  # Ranked out, labelled on expand
+        self._label_iter = None  # Streaming label sequence
+        self.target_hwnd = None
+        self._app = None
+        self._origin = (0, 0)
         self.current_input = ""
         self.active = False
+        self.detection_complete = True
+        self.metrics = {}
+        self._grid_requested = False
+        self.cancel_event = cancel_event
+        self.mode_manager = mode_manager
+        self._cancel_watch = None
+        self._on_exit = None
+
+    def activate(self, on_exit=None):
+        """
+        Activate Hint mode
 
-    def activate(self):
-        """Activate Hint mode"""
+        Args:
+            on_exit: Optional function called once the activation (and a Grid mode
+                     started from it) has ended. If given, returns as soon as the
+                     labels are shown and the caller's Tk event loop drives the
+                     mode (UIThread.run_mode); otherwise blocks in its own loop
+        """
         if self.active:
+            if on_exit:
+                on_exit()
             return
+        self._on_exit = on_exit
 
         print("\n🟢 Activating Hint mode...")
+        self._start_time = time.time()
+        self.metrics = {}
+
+        # Window to label (and to resolve the clicked element in)
+        self.target_hwnd = win32gui.GetForegroundWindow()
+        if self.history or self.stable_labels:
+            self._app = self.detector.executable(self.target_hwnd)
+            self._origin = win32gui.GetWindowRect(self.target_hwnd)[:2]
+
+        self._hidden = []
+        self._label_iter = None
+        prefetched = None
+        if self.prefetcher:
+            prefetched = self.prefetcher.take(self.target_hwnd)
+
+        if self.streaming and not prefetched:
+            self._activate_streaming()
+            return
 
-        # Step 1: Detect UI elements
-        print("🔍 Detecting clickable elements...")
-        self.elements = self.detector.get_clickable_elements()
+        if prefetched:
+            # Steps 1-2 already done in the background
+            print(f"⚡ Using {len(prefetched.elements)} prefetched elements")
+            self.elements = prefetched.elements
+            self.labels = prefetched.labels
+        else:
+            # Step 1: Detect UI elements
+            print("🔍 Detecting clickable elements...")
+            self.elements = self.detector.get_clickable_elements(hwnd=self.target_hwnd)
 
         if len(self.elements) == 0:
             print("⚠️ No clickable elements found")
             win32api.MessageBeep(win32con.MB_ICONWARNING)
+            self._exit()
             return
 
         # Step 2: Generate labels
-        print(f"🏷️ Generating labels for {len(self.elements)} elements...")
-        self.labels = self.label_gen.generate_labels(len(self.elements))
+        self._label_snapshot(self.labels if prefetched else None)
 
         # Step 3: Create overlay window
         print("🎨 Creating overlay window...")
         self.overlay.create()
         self.overlay.draw_labels(self.elements, self.labels)
+        self.metrics['time_to_first_label'] = self.metrics['time_to_complete'] = time.time() - self._start_time
 
         # Step 4: Bind keyboard events
-        self.overlay.root.bind('<KeyPress>', self._on_key_press)
-        self.overlay.root.bind('<space>', self._on_space_press)
+        self._bind_keys()
 
         self.current_input = ""
+        self.detection_complete = True
         self.active = True
 
         print("✅ Hint mode ready! Type labels to select elements")
         print("   Press Space for Grid mode, ESC to exit\n")
 
-        # Run event loop (blocking)
-        self.overlay.run_event_loop()
+        self._run_event_loop()
 
-        # Cleanup when window closes
-        self.active = False
+    def _label_snapshot(self, labels=None):
+        """
+        Rank and label a complete snapshot in self.elements (history, stable labels, top-k)
+
+        Args:
+            labels: Default labels already generated for all elements (e.g. prefetched)
+        """
+        weights = None
+        if self.history:
+            weights = self.history.weights(self._app, self.elements, self._origin)
+
+        if self.ranker:
+            kept, rest = self.ranker.top_k(self.elements, win32api.GetCursorPos(), weights)
+            if rest:
+                print(f"✂️ Labelling the top {len(kept)} of {len(self.elements)} elements (Tab shows the rest)")
+                self._hidden = [self.elements[i] for i in rest]
+                self.elements = [self.elements[i] for i in kept]
+                weights = [weights[i] for i in kept] if weights else None
+                labels = None  # Generated for all elements
+
+        if labels is None:
+            print(f"🏷️ Generating labels for {len(self.elements)} elements...")
+        self.labels = self._assign_labels(weights, labels)
+        self.matcher = LabelMatcher(self.labels)
+
+    def _run_event_loop(self):
+        """Wait for the overlay to be hidden, then clean up (in a nested loop without on_exit)"""
+        self._grid_requested = False
+        self._watch_cancel()
+        if self._on_exit is None:
+            self.overlay.run_event_loop()
+            self._after_loop()
+        else:
+            self.overlay.run_event_loop(on_hidden=self._after_loop)
+
+    def _after_loop(self):
+        """Overlay hidden (match, ESC, Space, cancel): free the snapshot, maybe start Grid mode"""
+        self.deactivate()
+        if not self._grid_requested:
+            self._exit()
+            return
+
+        transition = None
+        if self.mode_manager:
+            # Stale if Hint mode was left in the meantime (CapsLock OFF)
+            transition = self.mode_manager.fire('grid', cancel=self.cancel_event)
+            if transition is None:
+                self._exit()
+                return
+            self.cancel_event = transition.cancel  # Watched for the Grid session from now on
+
+        def grid_exit():
+            if transition is not None:
+                self.mode_manager.fire('exit', cancel=transition.cancel)
+            self._exit()
+
+        # Grid mode reuses the same overlay root
+        try:
+            from .grid_mode import GridMode
+            grid = GridMode(overlay=self.overlay)
+            if self._on_exit is None:
+                grid.activate()
+            else:
+                grid.activate(on_exit=grid_exit)
+                return
+        except Exception as e:
+            print(f"❌ Failed to activate Grid mode: {e}")
+        grid_exit()
+
+    def _exit(self):
+        """Activation over: stop watching for cancellation and tell the caller"""
+        if self._cancel_watch:
+            self.overlay.root.after_cancel(self._cancel_watch)
+            self._cancel_watch = None
+        on_exit, self._on_exit = self._on_exit, None
+        if on_exit:
+            on_exit()
+
+    def _watch_cancel(self):
+        """Hide the overlay once cancel_event is set (Tk thread, checked every 50ms while shown)"""
+        self._cancel_watch = None
+        if self.cancel_event is None or not self.overlay.root:
+            return
+        if self.cancel_event.is_set():
+            print("⏹️ Activation cancelled")
+            self._grid_requested = False
+            self.overlay.hide()
+            return
+        self._cancel_watch = self.overlay.root.after(50, self._watch_cancel)
+
+    def _assign_labels(self, weights, labels=None):
+        """
+        Labels for self.elements
+
+        Args:
+            weights: Click history weights aligned with self.elements (or None)
+            labels: Default labels already generated (e.g. prefetched)
+
+        Returns:
+            List of labels aligned with self.elements
+        """
+        if self.stable_labels:
+            window_key = f"{self._app}|{win32gui.GetClassName(self.target_hwnd)}"
+            return self.stable_labels.assign(window_key, self.elements, self._origin, weights)
+        if weights and any(weights):
+            return self.label_gen.generate_weighted_labels(weights)
+        return labels if labels is not None else self.label_gen.generate_labels(len(self.elements))
+
+    def _expand(self):
+        """Label the elements left out by the ranker (Tab)"""
+        if not self._hidden:
+            return
+
+        hidden, self._hidden = self._hidden, []
+        print(f"➕ Showing {len(hidden)} more elements")
+        if self._label_iter is not None:
+            # Streaming: continue the label sequence
+            self._add_batch(hidden)
+            return
+
+        self.elements = self.elements + hidden
+        weights = self.history.weights(self._app, self.elements, self._origin) if self.history else None
+        self.labels = self._assign_labels(weights)
+        self.matcher = LabelMatcher(self.labels)
+        self.current_input = ""
+        self.overlay.draw_labels(self.elements, self.labels)
+
+    def _activate_streaming(self):
+        """Show overlay immediately and paint labels as detection batches arrive"""
+        self.elements = []
+        self.labels = []
+        self.matcher = LabelMatcher()
+        # Label lengths sized for the usual element count (the ranker's limit at most)
+        expected = self.detector.expected_count(self.target_hwnd)
+        if expected and self.ranker:
+            expected = min(expected, self.ranker.limit)
+        self._label_iter = self.label_gen.iter_labels(expected)
+        self._hidden = []
+        self._batches = queue.Queue()
+        self.detection_complete = False
+
+        print("🎨 Creating overlay window...")
+        self.overlay.create()
+        self.overlay.draw_labels([], [])
+        self._bind_keys()
+
+        self.current_input = ""
+        self.active = True
+
+        # Detect on a worker thread, Tk is only touched from this thread
+        print("🔍 Streaming clickable elements...")
+        cursor = win32api.GetCursorPos()
+        threading.Thread(target=self._stream_worker, args=(cursor,), daemon=True).start()
+        self.overlay.root.after(10, self._drain_batches)
+
+        print("✅ Hint mode ready! Type labels to select elements")
+        print("   Press Space for Grid mode, ESC to exit\n")
+
+        self._run_event_loop()
+
+    def _stream_worker(self, cursor):
+        """Run streaming detection (background thread)"""
+        try:
+            self.detector.provider.init_thread()
+            for batch in self.detector.iter_clickable_elements(cursor=cursor, hwnd=self.target_hwnd):
+                if not self.active:
+                    break
+                self._batches.put(batch)
+        except Exception as e:
+            print(f"❌ Streaming detection error: {e}")
+        finally:
+            self._batches.put(None)
+
+    def _drain_batches(self):
+        """Draw batches that arrived since the last call (Tk thread)"""
+        if not self.active:
+            return
+
+        batches = []
+        complete = False
+        try:
+            while True:
+                batch = self._batches.get_nowait()
+                if batch is None:
+                    complete = True
+                    break
+                batches.append(batch)
+        except queue.Empty:
+            pass
+
+        if complete and batches and not self.elements and not self._hidden:
+            # Whole snapshot before the first paint (e.g. from the snapshot cache):
+            # label it like a full detection instead of in arrival order
+            self._show_snapshot([element for batch in batches for element in batch])
+            self._finish_streaming()
+            return
+
+        received = bool(batches)
+        for batch in batches:
+            if self.ranker:
+                # Past the limit, elements wait for Tab
+                room = max(self.ranker.limit - len(self.elements), 0)
+                self._hidden.extend(batch[room:])
+                batch = batch[:room]
+                if not batch:
+                    continue
+            self._add_batch(batch)
+
+            if 'time_to_first_label' not in self.metrics:
+                self.metrics['time_to_first_label'] = time.time() - self._start_time
+                print(f"⏱️ First labels after {self.metrics['time_to_first_label'] * 1000:.0f}ms")
+
+        if complete:
+            self._finish_streaming()
+            return
+
+        # Pending input may now match one of the new labels
+        if received and self.current_input:
+            self._match_input()
+
+        if self.active:
+            self.overlay.root.after(15, self._drain_batches)
+
+    def _show_snapshot(self, elements):
+        """Label and draw a complete snapshot at once (Tk thread)"""
+        self.elements = elements
+        self._label_iter = None  # Tab relabels the full set
+        self._label_snapshot()
+        self.overlay.draw_labels(self.elements, self.labels)
+        self.metrics['time_to_first_label'] = time.time() - self._start_time
+        print(f"⏱️ {len(self.elements)} labels after {self.metrics['time_to_first_label'] * 1000:.0f}ms")
+
+    def _add_batch(self, batch):
+        """Label and draw streamed elements (Tk thread)"""
+        labels = [next(self._label_iter) for _ in batch]
+        self.elements.extend(batch)
+        self.labels.extend(labels)
+        self.overlay.draw_batch(batch, labels)
+        # New labels matching typed-ahead input light up
+        self._apply(self.matcher.add(labels))
+
+    def _finish_streaming(self):
+        """Detection finished (Tk thread)"""
+        self.detection_complete = True
+        self.metrics['time_to_complete'] = time.time() - self._start_time
+        print(f"⏱️ Detection complete after {self.metrics['time_to_complete'] * 1000:.0f}ms "
+              f"({len(self.elements)} labels)")
+        print(f"   {self.overlay.report()}")
+        if self._hidden:
+            print(f"✂️ {len(self._hidden)} more elements (Tab shows them)")
+
+        if len(self.elements) == 0 and not self._hidden:
+            print("⚠️ No clickable elements found")
+            win32api.MessageBeep(win32con.MB_ICONWARNING)
+            self.deactivate()
+        elif self.current_input:
+            self._match_input()
+
+    def _bind_keys(self):
+        """Bind keyboard events on the overlay"""
+        self.overlay.bind('<KeyPress>', self._on_key_press)
+        self.overlay.bind('<space>', self._on_space_press)
 
     def deactivate(self):
         """Deactivate Hint mode"""
@@ -75,10 +413,17 @@ class HintMode:
             return
 
         print("🔴 Deactivating Hint mode...")
-        self.overlay.destroy()
+        self.overlay.hide()
         self.active = False
         self.current_input = ""
 
+        # Free snapshot (the detector's cache keeps its own copy)
+        self.elements = []
+        self.labels = []
+        self.matcher = None
+        self._hidden = []
+        self._label_iter = None
+
     def _on_key_press(self, event):
         """Handle keyboard input"""
         key = event.char.lower()
@@ -88,25 +433,52 @@ class HintMode:
             self.deactivate()
             return
 
+        # Tab labels the elements left out by the ranker
+        if event.keysym == 'Tab':
+            self._expand()
+            return
+
+        # Backspace undoes the last key
+        if event.keysym == 'BackSpace':
+            if self.current_input:
+                self._apply(self.matcher.pop())
+                self.current_input = self.matcher.input
+                print(f"📝 Current input: '{self.current_input}'")
+            return
+
         # Only process alphabetic characters
         if not key.isalpha():
             return
 
-        self.current_input += key
+        self._apply(self.matcher.push(key))
+        self.current_input = self.matcher.input
         print(f"📝 Current input: '{self.current_input}'")
+        self._match_input()
+
+    def _apply(self, delta):
+        """Repaint labels whose highlight changed"""
+        if delta.added or delta.removed:
+            self.overlay.update_highlight(delta.added, delta.removed)
 
-        # Find matching labels
-        matches = self.label_gen.match_label(self.current_input, self.labels)
+    def _match_input(self):
+        """Act on the matcher state for the current input"""
+        count = self.matcher.count
+
+        if count == 0:
+            if not self.detection_complete:
+                # Labels with this prefix may still be on their way
+                return
 
-        if len(matches) == 0:
             # No match - reset and beep
             print(f"❌ No match for '{self.current_input}'")
+            self._apply(self.matcher.reset())
             self.current_input = ""
             win32api.MessageBeep(win32con.MB_ICONHAND)
 
-        elif len(matches) == 1:
+        elif count == 1 and (self.detection_complete or
+                             self.labels[self.matcher.matches()[0]] == self.current_input):
             # Unique match - click element
-            matched_index = matches[0]
+            matched_index = self.matcher.matches()[0]
             matched_label = self.labels[matched_index]
             matched_element = self.elements[matched_index]
 
@@ -115,46 +487,39 @@ class HintMode:
             self.deactivate()
 
         else:
-            # Multiple matches - highlight
-            matching_labels = [self.labels[i] for i in matches]
-            print(f"🔵 {len(matches)} matches: {matching_labels}")
-            self.overlay.highlight_matches(matching_labels)
+            # Multiple matches (or more may still arrive) - already highlighted
+            print(f"🔵 {count} matches")
 
     def _on_space_press(self, event):
         """Handle Space key - switch to Grid mode"""
         print("🔄 Space pressed - switching to Grid mode")
+        # Grid mode starts once this event loop has returned
+        self._grid_requested = True
         self.deactivate()
 
-        # Import and activate Grid mode
-        try:
-            from .grid_mode import GridMode
-            grid = GridMode()
-            grid.activate()
-        except Exception as e:
-            print(f"❌ Failed to activate Grid mode: {e}")
-
     def _click_element(self, element):
         """
         Click the selected element
 
         Args:
-            element: Element dictionary
+            element: ElementRecord
         """
         try:
-            # Destroy overlay first
-            self.overlay.destroy()
+            # Hide overlay first
+            self.overlay.hide()
 
-            # Click using pywinauto
-            element['element'].click_input()
-            print(f"✅ Clicked: {element['name']}")
+            # Resolve live wrapper now and click using pywinauto
+            wrapper = self.detector.resolve(element, self.target_hwnd)
+            if wrapper is None:
+                raise RuntimeError("element no longer available")
+            wrapper.click_input()
+            print(f"✅ Clicked: {element.name}")
 
         except Exception as e:
             print(f"❌ Click failed: {e}")
             # Try alternative click method
             try:
-                rect = element['rect']
-                x = rect.left + rect.width() // 2
-                y = rect.top + rect.height() // 2
+                x, y = element.center()
 
                 # Move mouse and click
                 win32api.SetCursorPos((x, y))
@@ -162,4 +527,8 @@ class HintMode:
                 win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, x, y, 0, 0)
                 print(f"✅ Clicked at position ({x}, {y})")
             except Exception as e2:
-                print(f"❌ Alternative click also failed: {e2}")
\ No newline at end of file
+                print(f"❌ Alternative click also failed: {e2}")
+
+        # Off the click path: overlay hidden and click sent
+        if self.history:
+            self.history.record_click(self._app, element, self._origin)
@@ -2,6 +2,10 @@
 HEMouse Mode Manager
 Manages mode transitions (IDLE, HINT, GRID)
 """
+import bisect
+import threading
+import time
+from collections import namedtuple
 from enum import Enum
 
 
@@ -12,15 +16,56 @@ class Mode(Enum):
     GRID = "grid"
 
 
-class ModeManager:
-    """Mode state manager"""
+# (mode, event) -> next mode; anything else is rejected
+TRANSITIONS = {
+    (Mode.IDLE, 'hint'): Mode.HINT,     # CapsLock ON
+    (Mode.IDLE, 'grid'): Mode.GRID,     # Grid hotkey
+    (Mode.HINT, 'grid'): Mode.GRID,     # Space in Hint mode
+    (Mode.HINT, 'cancel'): Mode.IDLE,   # CapsLock OFF
+    (Mode.HINT, 'exit'): Mode.IDLE,     # Activation ended (match, ESC)
+    (Mode.GRID, 'exit'): Mode.IDLE,
+}
+
+# Upper bounds (ms) of the transition latency histogram buckets
+LATENCY_BUCKETS_MS = (0.01, 0.1, 1, 10, 100)
+
+# An accepted transition; `cancel` is set once `new` is left again
+Transition = namedtuple('Transition', ['old', 'event', 'new', 'cancel'])
+
 
-    def __init__(self):
-        self.current_mode = Mode.IDLE
+class ModeManager:
+    """
+    Mode state machine
+
+    Events are looked up in a transition table and processed one at a time
+    (a lock serializes callers on any thread), so fast CapsLock toggles from
+    the hotkey threads cannot interleave. Events with no entry for the current
+    mode are rejected. Each entered mode gets a cancel Event that is set as
+    soon as the mode is left, so work started for it (e.g. a Hint activation)
+    can stop. Events fired from inside an enter/exit callback run after the
+    current transition has completed.
+    """
+
+    def __init__(self, transitions=None, initial=Mode.IDLE, verbose=True):
+        """
+        Args:
+            transitions: Dict (mode, event) -> mode (default: TRANSITIONS)
+            initial: Starting mode
+            verbose: Print every mode change
+        """
+        self.transitions = dict(TRANSITIONS if transitions is None else transitions)
+        self.current_mode = initial
+        self.verbose = verbose
         self.callbacks = {
             'on_mode_enter': {},
             'on_mode_exit': {}
         }
+        self.metrics = {'accepted': 0, 'rejected': 0, 'stale': 0}
+        self._cancel = threading.Event()  # Of the current mode
+        self._histograms = {}  # (old, new) -> bucket counts
+        self._lock = threading.Lock()
+        self._owner = None  # Thread running a transition
+        self._deferred = []  # Events fired from callbacks
 
     def register_callback(self, event, mode, callback):
         """
@@ -35,17 +80,61 @@ class ModeManager:
             self.callbacks[event] = {}
         self.callbacks[event][mode] = callback
 
-    def switch_mode(self, new_mode):
+    @property
+    def cancel_event(self):
+        """Cancel Event of the current mode (set when it is left)"""
+        return self._cancel
+
+    def can_fire(self, event):
+        """True if `event` is legal in the current mode"""
+        return (self.current_mode, event) in self.transitions
+
+    def fire(self, event, cancel=None):
         """
-        Switch to new mode
+        Process an event
 
         Args:
-            new_mode: Mode enum value
+            event: Event name (see TRANSITIONS)
+            cancel: Optional cancel Event of the Transition that entered the
+                    mode the event is meant for; if that mode was left in the
+                    meantime, the event is stale and dropped
+
+        Returns:
+            The Transition, or None if rejected (or deferred, when fired from a callback)
         """
-        if new_mode == self.current_mode:
-            return
+        return self._process(lambda mode: event, cancel)
+
+    def _process(self, resolve, cancel=None):
+        """Serialize one event; resolve(current mode) gives its name (under the lock)"""
+        start = time.perf_counter()
+        if self._owner is threading.current_thread():
+            self._deferred.append((resolve, cancel))
+            return None
 
+        with self._lock:
+            self._owner = threading.current_thread()
+            try:
+                transition = self._apply(resolve, cancel, start)
+                while self._deferred:
+                    self._apply(*self._deferred.pop(0), time.perf_counter())
+            finally:
+                self._owner = None
+        return transition
+
+    def _apply(self, resolve, cancel, start):
+        """Run one transition (lock held)"""
+        if cancel is not None and cancel is not self._cancel:
+            self.metrics['stale'] += 1
+            return None
         old_mode = self.current_mode
+        event = resolve(old_mode)
+        new_mode = self.transitions.get((old_mode, event))
+        if new_mode is None:
+            self.metrics['rejected'] += 1
+            return None
+
+        # Stop whatever the old mode was doing before its exit callback
+        self._cancel.set()
 
         # Trigger exit callback
         if old_mode in self.callbacks['on_mode_exit']:
@@ -56,7 +145,10 @@ class ModeManager:
 
         # Switch mode
         self.current_mode = new_mode
-        print(f"🔄 Mode changed: {old_mode.value} → {new_mode.value}")
+        self._cancel = threading.Event()
+        transition = Transition(old_mode, event, new_mode, self._cancel)
+        if self.verbose:
+            print(f"🔄 Mode changed: {old_mode.value} → {new_mode.value} ({event})")
 
         # Trigger enter callback
         if new_mode in self.callbacks['on_mode_enter']:
@@ -65,10 +157,54 @@ class ModeManager:
             except Exception as e:
                 print(f"❌ Enter callback error: {e}")
 
+        self.metrics['accepted'] += 1
+        counts = self._histograms.setdefault((old_mode, new_mode), [0] * (len(LATENCY_BUCKETS_MS) + 1))
+        counts[bisect.bisect_left(LATENCY_BUCKETS_MS, (time.perf_counter() - start) * 1000)] += 1
+        return transition
+
+    def switch_mode(self, new_mode):
+        """
+        Switch to new mode through the transition table
+
+        Args:
+            new_mode: Mode enum value
+
+        Returns:
+            The Transition, or None if already there or no event leads to new_mode
+        """
+        def event_to(current):
+            for (mode, event), target in self.transitions.items():
+                if mode == current and target == new_mode:
+                    return event
+            return None
+
+        return self._process(event_to)
+
     def get_current_mode(self):
         """Get current mode"""
         return self.current_mode
 
+    def histograms(self):
+        """
+        Latency histogram per transition (fire() call to callbacks done, lock wait included)
+
+        Returns:
+            Dict 'old→new' -> {'<=0.01ms': count, ..., '>100ms': count}
+        """
+        names = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        with self._lock:
+            return {f"{old.value}→{new.value}": dict(zip(names, counts))
+                    for (old, new), counts in self._histograms.items()}
+
+    def report(self):
+        """One line per transition with its latency histogram"""
+        lines = [f"accepted {self.metrics['accepted']}, rejected {self.metrics['rejected']}, "
+                 f"stale {self.metrics['stale']}"]
+        for name, buckets in self.histograms().items():
+            counts = ' '.join(f"{bucket}:{count}" for bucket, count in buckets.items() if count)
+            lines.append(f"{name}: {counts}")
+        return '\n'.join(lines)
+
 
 # Test code
 if __name__ == "__main__":
@@ -92,4 +228,5 @@ if __name__ == "__main__":
     print(f"Current mode: {manager.get_current_mode()}")
     manager.switch_mode(Mode.GRID)
     print(f"Current mode: {manager.get_current_mode()}")
-    manager.switch_mode(Mode.IDLE)
\ No newline at end of file
+    manager.switch_mode(Mode.IDLE)
+    print(manager.report())
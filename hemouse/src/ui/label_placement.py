@@ -0,0 +1,133 @@
+"""
+HEMouse Label Placement
+Chooses a label position per element that avoids other labels and elements
+"""
+from core.spatial_index import SpatialGrid
+from ui.monitors import monitor_index
+
+
+# Tried in order; the first free one wins
+CANDIDATES = ('left', 'right', 'above', 'below', 'inside')
+
+
+def count_overlaps(rects, cell_size=64):
+    """
+    Number of overlapping pairs among (left, top, right, bottom) rects
+
+    Args:
+        rects: Rect tuples
+        cell_size: Spatial hash cell size
+
+    Returns:
+        Pair count
+    """
+    grid = SpatialGrid(cell_size)
+    overlaps = 0
+    for index, rect in enumerate(rects):
+        overlaps += len(grid.query(rect))
+        grid.insert(rect, index)
+    return overlaps
+
+
+def _clamp(rect, bounds):
+    left, top, right, bottom = rect
+    dx = max(bounds[0] - left, 0) or min(bounds[2] - right, 0)
+    dy = max(bounds[1] - top, 0) or min(bounds[3] - bottom, 0)
+    return (left + dx, top + dy, right + dx, bottom + dy)
+
+
+class LabelPlacer:
+    """
+    Greedy collision-avoiding label placement over spatial hashes
+
+    For each element the candidates left, right, above, below and inside are
+    tried in that order, each clamped to the element's monitor. A candidate is free
+    when it overlaps no placed label and no other element; otherwise the one
+    with the fewest label collisions (then element collisions) is taken.
+    Both hashes answer a query in near-constant time, so placement is
+    near-linear in the number of labels. Placed labels persist across calls
+    until reset(), so streamed batches avoid earlier labels too.
+    """
+
+    def __init__(self, label_size=(35, 26), gap=5, monitors=None, cell_size=64):
+        """
+        Initialize placer
+
+        Args:
+            label_size: (width, height) of a label box
+            gap: Distance between element and label in px
+            monitors: Monitor rects (left, top, right, bottom) in screen coordinates;
+                      labels are kept inside the element's monitor (None: no clamping)
+            cell_size: Spatial hash cell size
+        """
+        self.label_size = label_size
+        self.gap = gap
+        self.monitors = list(monitors or ())
+        self.cell_size = cell_size
+        self.reset()
+
+    def reset(self):
+        """Forget placed labels and elements (new activation)"""
+        self._labels = SpatialGrid(self.cell_size)
+        self._elements = SpatialGrid(self.cell_size)
+        self._element_count = 0
+        self.stats = {'placed': 0, 'moved': 0, 'label_collisions': 0, 'element_collisions': 0}
+
+    def _candidate(self, name, rect):
+        width, height = self.label_size
+        left, top, right, bottom = rect
+        if name == 'left':
+            x, y = left - width - self.gap, top
+        elif name == 'right':
+            x, y = right + self.gap, top
+        elif name == 'above':
+            x, y = left, top - height - self.gap
+        elif name == 'below':
+            x, y = left, bottom + self.gap
+        else:  # inside, top-left corner
+            x, y = left, top
+        return (x, y, x + width, y + height)
+
+    def place(self, elements, offset=(0, 0)):
+        """
+        Place labels for elements (on top of the ones already placed)
+
+        Args:
+            elements: List of ElementRecord (screen coordinates)
+            offset: (x, y) subtracted from the result (canvas origin)
+
+        Returns:
+            List of (x, y) label top-left corners aligned with elements
+        """
+        rects = [(e.left, e.top, e.right, e.bottom) for e in elements]
+        first = self._element_count
+        for index, rect in enumerate(rects, first):
+            self._elements.insert(rect, index)
+        self._element_count += len(rects)
+
+        positions = []
+        for index, rect in enumerate(rects, first):
+            monitor = monitor_index(rect, self.monitors)
+            if monitor is not None:
+                monitor = self.monitors[monitor]
+            best = None
+            for rank, name in enumerate(CANDIDATES):
+                candidate = self._candidate(name, rect)
+                if monitor is not None:
+                    candidate = _clamp(candidate, monitor)
+                label_hits = len(self._labels.query(candidate))
+                element_hits = sum(1 for _, other in self._elements.query(candidate) if other != index)
+                cost = (label_hits, element_hits, rank)
+                if best is None or cost < best[0]:
+                    best = (cost, candidate)
+                if label_hits == 0 and element_hits == 0:
+                    break
+
+            (label_hits, element_hits, rank), chosen = best
+            self._labels.insert(chosen, index)
+            self.stats['placed'] += 1
+            self.stats['moved'] += rank > 0
+            self.stats['label_collisions'] += label_hits
+            self.stats['element_collisions'] += element_hits
+            positions.append((chosen[0] - offset[0], chosen[1] - offset[1]))
+        return positions
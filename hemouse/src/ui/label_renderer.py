@@ -0,0 +1,265 @@
+"""
+HEMouse Label Renderer
+Pre-rendered label sprites composed into one image buffer (no Tk, testable headless)
+"""
+from PIL import Image, ImageDraw, ImageFont
+
+from core.spatial_index import SpatialGrid
+
+
+LABEL_SIZE = (35, 26)  # Width x Height of label box at 96 DPI
+LABEL_FILL = (255, 255, 0)  # yellow
+HIGHLIGHT_FILL = (0, 128, 0)  # green
+TEXT_FILL = (0, 0, 0)
+BORDER_WIDTH = 2
+BACKGROUND = (0, 0, 0)
+COLOR_KEY = (255, 0, 255)  # Background of color-keyed overlays, shown fully transparent
+DEFAULT_FONT = "arialbd.ttf"
+
+
+def load_font(size, font_path=DEFAULT_FONT):
+    """TrueType font at size px (None or a missing file: Pillow's bundled font)"""
+    if font_path:
+        try:
+            return ImageFont.truetype(font_path, size)
+        except OSError:
+            pass
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:
+        # Pillow < 10.1: bitmap font without sizes
+        return ImageFont.load_default()
+
+
+def upload_plan(rects, size, max_patches, max_fraction=0.25):
+    """
+    Regions of the buffer to upload as patch images after a partial redraw
+
+    Args:
+        rects: Changed rectangles (left, top, right, bottom), possibly off the buffer
+        size: (width, height) of the buffer
+        max_patches: Patch images that may still be added
+        max_fraction: Changed share of the buffer above which one full upload is cheaper
+
+    Returns:
+        List of clipped, non-empty, distinct rectangles (one patch each), or
+        None when the whole buffer should be uploaded instead
+    """
+    width, height = size
+    plan = []
+    area = 0
+    for left, top, right, bottom in rects:
+        clip = (max(left, 0), max(top, 0), min(right, width), min(bottom, height))
+        if clip[0] >= clip[2] or clip[1] >= clip[3] or clip in plan:
+            continue
+        plan.append(clip)
+        area += (clip[2] - clip[0]) * (clip[3] - clip[1])
+    if len(plan) > max_patches or area > width * height * max_fraction:
+        return None
+    return plan
+
+
+class GlyphAtlas:
+    """
+    Glyph masks and finished label sprites for one font size and DPI scale
+
+    Every character is rasterized once; a label sprite (box, border and
+    centred text) is assembled from those glyphs the first time the label is
+    drawn in a given state and then reused. Use GlyphAtlas.get() to share one
+    atlas per (font size, scale, font).
+    """
+
+    _atlases = {}
+
+    @classmethod
+    def get(cls, font_size=14, scale=1.0, font_path=DEFAULT_FONT):
+        """Shared atlas for a font size and DPI scale (1.0 = 96 DPI)"""
+        key = (font_size, round(scale, 2), font_path)
+        atlas = cls._atlases.get(key)
+        if atlas is None:
+            atlas = cls._atlases[key] = cls(font_size, scale, font_path)
+        return atlas
+
+    def __init__(self, font_size=14, scale=1.0, font_path=DEFAULT_FONT, max_sprites=4096):
+        """
+        Args:
+            font_size: Font size in px at 96 DPI
+            scale: DPI scale (dpi / 96)
+            font_path: TrueType font file (default: Arial Bold; None: Pillow's bundled font)
+            max_sprites: Sprites cached before the cache is reset
+        """
+        self.scale = scale
+        self.size = (round(LABEL_SIZE[0] * scale), round(LABEL_SIZE[1] * scale))
+        self.border = max(1, round(BORDER_WIDTH * scale))
+        self.font = load_font(max(1, round(font_size * scale)), font_path)
+        self.max_sprites = max_sprites
+        self._glyphs = {}  # char -> (mask, bbox, advance)
+        self._sprites = {}  # (label, highlighted) -> RGB image
+
+    def glyph(self, char):
+        """
+        Rasterized character
+
+        Returns:
+            (mask, bbox, advance): 'L' mask, its bbox relative to the pen
+            position and the advance width
+        """
+        entry = self._glyphs.get(char)
+        if entry is None:
+            bbox = self.font.getbbox(char)
+            mask = Image.new('L', (max(bbox[2] - bbox[0], 1), max(bbox[3] - bbox[1], 1)), 0)
+            ImageDraw.Draw(mask).text((-bbox[0], -bbox[1]), char, font=self.font, fill=255)
+            entry = self._glyphs[char] = (mask, bbox, self.font.getlength(char))
+        return entry
+
+    def sprite(self, label, highlighted=False):
+        """
+        Finished label image
+
+        Args:
+            label: Label string (drawn upper case)
+            highlighted: Matching the current input
+
+        Returns:
+            RGB image of self.size
+        """
+        key = (label, highlighted)
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            return sprite
+
+        width, height = self.size
+        sprite = Image.new('RGB', self.size, TEXT_FILL)
+        sprite.paste(HIGHLIGHT_FILL if highlighted else LABEL_FILL,
+                     (self.border, self.border, width - self.border, height - self.border))
+
+        # Lay out glyphs along the pen position, then centre the ink box
+        placed = []
+        pen = 0.0
+        for char in label.upper():
+            mask, bbox, advance = self.glyph(char)
+            placed.append((mask, round(pen) + bbox[0], bbox[1]))
+            pen += advance
+        if placed:
+            left = min(x for _, x, _ in placed)
+            top = min(y for _, _, y in placed)
+            right = max(x + mask.width for mask, x, _ in placed)
+            bottom = max(y + mask.height for mask, _, y in placed)
+            origin_x = (width - (right - left)) // 2 - left
+            origin_y = (height - (bottom - top)) // 2 - top
+            for mask, x, y in placed:
+                sprite.paste(TEXT_FILL, (origin_x + x, origin_y + y), mask)
+
+        if len(self._sprites) >= self.max_sprites:
+            self._sprites.clear()
+        self._sprites[key] = sprite
+        return sprite
+
+
+class LabelCompositor:
+    """
+    All labels of an activation composed into one off-screen RGB buffer
+
+    Labels are blitted (C-level PIL paste) from the atlas in draw order.
+    A highlight change re-blits only the changed labels' rectangles: every
+    label intersecting a dirty rectangle (found through a SpatialGrid) is
+    pasted again in draw order, clipped to that rectangle, so overlaps stay
+    exactly as a full recompose would draw them.
+    """
+
+    def __init__(self, size, atlas, background=BACKGROUND):
+        """
+        Args:
+            size: (width, height) of the buffer (canvas size)
+            atlas: GlyphAtlas
+            background: Buffer colour where there is no label
+        """
+        self.atlas = atlas
+        self.background = background
+        self.buffer = Image.new('RGB', size, background)
+        self._labels = []
+        self._rects = []
+        self._highlighted = []
+        self._grid = SpatialGrid(cell_size=64)
+        self._bbox = None  # Area covered by labels
+
+    def __len__(self):
+        return len(self._labels)
+
+    def clear(self):
+        """Erase all labels"""
+        if self._bbox is not None:
+            self.buffer.paste(self.background, self._bbox)
+            self._bbox = None
+        self._labels = []
+        self._rects = []
+        self._highlighted = []
+        self._grid.clear()
+
+    def add(self, positions, labels):
+        """
+        Draw labels on top of the existing ones
+
+        Args:
+            positions: (x, y) top-left corners (see LabelPlacer)
+            labels: Label strings
+
+        Returns:
+            Bounding box (left, top, right, bottom) of the new labels, or None
+        """
+        width, height = self.atlas.size
+        buffer = self.buffer
+        bbox = None
+        for (x, y), label in zip(positions, labels):
+            rect = (x, y, x + width, y + height)
+            self._grid.insert(rect, len(self._labels))
+            self._labels.append(label)
+            self._rects.append(rect)
+            self._highlighted.append(False)
+            buffer.paste(self.atlas.sprite(label), (x, y))
+            bbox = rect if bbox is None else _union(bbox, rect)
+        if bbox is not None:
+            self._bbox = bbox if self._bbox is None else _union(self._bbox, bbox)
+        return bbox
+
+    def compose(self, positions, labels):
+        """Redraw from scratch (clear + add)"""
+        self.clear()
+        return self.add(positions, labels)
+
+    def update_highlight(self, added, removed):
+        """
+        Change highlight state and re-blit the dirty rectangles
+
+        Args:
+            added: Indices of labels to highlight
+            removed: Indices of labels to clear
+
+        Returns:
+            List of dirty rectangles (left, top, right, bottom)
+        """
+        dirty = []
+        for indices, state in ((added, True), (removed, False)):
+            for index in indices:
+                if self._highlighted[index] != state:
+                    self._highlighted[index] = state
+                    dirty.append(self._rects[index])
+
+        for rect in dirty:
+            self._redraw(rect)
+        return dirty
+
+    def _redraw(self, rect):
+        """Re-blit every label intersecting rect, clipped to rect, in draw order"""
+        left, top, right, bottom = rect
+        for index in sorted(index for _, index in self._grid.query(rect)):
+            x0, y0, x1, y1 = self._rects[index]
+            clip = (max(x0, left), max(y0, top), min(x1, right), min(y1, bottom))
+            if clip[0] >= clip[2] or clip[1] >= clip[3]:
+                continue
+            sprite = self.atlas.sprite(self._labels[index], self._highlighted[index])
+            self.buffer.paste(sprite.crop((clip[0] - x0, clip[1] - y0, clip[2] - x0, clip[3] - y0)), clip[:2])
+
+
+def _union(a, b):
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
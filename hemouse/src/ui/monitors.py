@@ -0,0 +1,76 @@
+"""
+HEMouse Monitor Layout
+Cached monitor rects and the mapping of screen rects to monitors (no Win32 here)
+"""
+
+
+def monitor_index(rect, monitors):
+    """
+    Monitor holding a rect
+
+    Args:
+        rect: (left, top, right, bottom) in screen coordinates
+        monitors: Monitor rects (left, top, right, bottom)
+
+    Returns:
+        Index of the monitor containing the rect's centre (the nearest one if
+        none does), None without monitors
+    """
+    if not monitors:
+        return None
+    x = (rect[0] + rect[2]) // 2
+    y = (rect[1] + rect[3]) // 2
+    best, best_distance = None, None
+    for index, (left, top, right, bottom) in enumerate(monitors):
+        distance = max(left - x, 0, x - right + 1) + max(top - y, 0, y - bottom + 1)
+        if distance == 0:
+            return index
+        if best is None or distance < best_distance:
+            best, best_distance = index, distance
+    return best
+
+
+def surface_bytes(rect):
+    """Memory of a 32-bit window surface covering rect"""
+    return max(rect[2] - rect[0], 0) * max(rect[3] - rect[1], 0) * 4
+
+
+class MonitorCache:
+    """
+    Monitor rects, enumerated again only when the display configuration changes
+
+    The signature (e.g. virtual screen metrics + monitor count) is a few
+    cheap metric reads, so it can be checked on every activation while the
+    enumeration itself runs only after a display change.
+    """
+
+    def __init__(self, enumerate_monitors, signature):
+        """
+        Args:
+            enumerate_monitors: Function returning monitor rects (left, top, right, bottom)
+            signature: Function returning a value that changes with the display configuration
+        """
+        self._enumerate = enumerate_monitors
+        self._signature = signature
+        self._current = None
+        self.monitors = []
+        self.refreshes = 0
+
+    def refresh(self):
+        """
+        Re-enumerate if the display configuration changed
+
+        Returns:
+            True if the monitors were (re)enumerated
+        """
+        signature = self._signature()
+        if self.refreshes and signature == self._current:
+            return False
+        self.monitors = [tuple(rect) for rect in self._enumerate()]
+        self._current = signature
+        self.refreshes += 1
+        return True
+
+    def invalidate(self):
+        """Force enumeration on the next refresh() (e.g. on WM_DISPLAYCHANGE)"""
+        self.refreshes = 0
@@ -1,191 +1,638 @@
 """
 HEMouse Overlay Window
-Transparent overlay window for displaying labels
+Transparent overlay windows (one per monitor) for displaying labels
 """
+import time
 import tkinter as tk
 from tkinter import font as tkfont
 import win32gui
 import win32con
 import win32api
 
+from ui.monitors import MonitorCache, monitor_index, surface_bytes
 
-class OverlayWindow:
-    """Transparent overlay window for Hint mode labels"""
 
-    def __init__(self):
-        self.root = None
-        self.canvas = None
-        self.labels = []
-        self.previous_focus = None
-        self.label_size = (35, 26)  # Width x Height of label box
-        self.screen_offset_x = 0  # Virtual screen offset
-        self.screen_offset_y = 0
+def virtual_screen():
+    """(left, top, width, height) of the virtual screen (all monitors combined)"""
+    return (win32api.GetSystemMetrics(win32con.SM_XVIRTUALSCREEN),
+            win32api.GetSystemMetrics(win32con.SM_YVIRTUALSCREEN),
+            win32api.GetSystemMetrics(win32con.SM_CXVIRTUALSCREEN),
+            win32api.GetSystemMetrics(win32con.SM_CYVIRTUALSCREEN))
+
+
+def display_signature():
+    """Changes whenever monitors are added, removed, moved or resized"""
+    return virtual_screen() + (win32api.GetSystemMetrics(win32con.SM_CMONITORS),)
+
+
+def color_key_hex():
+    """COLOR_KEY as a Tk colour string"""
+    from ui.label_renderer import COLOR_KEY
+    return '#%02x%02x%02x' % COLOR_KEY
+
+
+def _contains(outer, inner):
+    """True if rectangle inner lies within rectangle outer"""
+    return (outer[0] <= inner[0] and outer[1] <= inner[1] and
+            inner[2] <= outer[2] and inner[3] <= outer[3])
 
-    def create(self):
-        """Create fullscreen transparent overlay window spanning all monitors"""
-        # Save current focus window
-        self.previous_focus = win32gui.GetForegroundWindow()
 
-        # Create transparent fullscreen window
-        self.root = tk.Tk()
+def monitor_rects():
+    """(left, top, right, bottom) of every monitor in screen coordinates"""
+    return [tuple(rect) for _, _, rect in win32api.EnumDisplayMonitors()]
 
-        # Performance: Batch window setup to reduce redraws
-        self.root.withdraw()  # Hide window during setup
-        self.root.attributes('-alpha', 0.3)  # 30% transparency
-        self.root.attributes('-topmost', True)  # Always on top
-        self.root.overrideredirect(True)  # No window borders
 
-        # Get virtual screen bounds (all monitors combined)
-        virtual_screen_left = win32api.GetSystemMetrics(win32con.SM_XVIRTUALSCREEN)
-        virtual_screen_top = win32api.GetSystemMetrics(win32con.SM_YVIRTUALSCREEN)
-        virtual_screen_width = win32api.GetSystemMetrics(win32con.SM_CXVIRTUALSCREEN)
-        virtual_screen_height = win32api.GetSystemMetrics(win32con.SM_CYVIRTUALSCREEN)
+class _Surface:
+    """Overlay window covering one monitor, in monitor-local canvas coordinates"""
 
-        # Store offset for coordinate adjustment
-        self.screen_offset_x = virtual_screen_left
-        self.screen_offset_y = virtual_screen_top
+    def __init__(self, root, rect, renderer, label_font, atlas, color_key=False):
+        self.rect = rect
+        self.offset = rect[:2]  # Screen position of canvas (0, 0)
+        self.visible = False
+        self.color_key = color_key
+        self._click_through = False
+        left, top, right, bottom = rect
 
-        # Position window to cover entire virtual desktop
-        self.root.geometry(f"{virtual_screen_width}x{virtual_screen_height}+{virtual_screen_left}+{virtual_screen_top}")
+        self.window = tk.Toplevel(root)
+        self.window.withdraw()  # Hide window during setup
+        self.window.attributes('-topmost', True)  # Always on top
+        self.window.overrideredirect(True)  # No window borders
+        self.window.geometry(f"{right - left}x{bottom - top}+{left}+{top}")
+        background = 'black'
+        if color_key:
+            # Background pixels are not drawn at all, labels stay opaque
+            background = color_key_hex()
+            self.window.attributes('-transparentcolor', background)
 
         # Create canvas with performance optimizations
         self.canvas = tk.Canvas(
-            self.root,
-            bg='black',
+            self.window,
+            bg=background,
             highlightthickness=0,
             bd=0  # No border for faster rendering
         )
         self.canvas.pack(fill=tk.BOTH, expand=True)
 
+        self.label_font = label_font
+        self.label_size = atlas.size if atlas else (35, 26)
+        self.count = 0  # Labels drawn this activation
+        self.pool = []  # (bg_id, text_id) pairs, reused across activations
+        self.extra_items = []  # Other items drawn for the current activation (grid lines...)
+        self.compositor = None
+        self.photo = None
+        self.patches = []  # (item id, PhotoImage, rect) on top of the base image
+
+        if renderer == 'image':
+            from PIL import ImageTk
+            from ui.label_renderer import BACKGROUND, COLOR_KEY, LabelCompositor
+            self.compositor = LabelCompositor((right - left, bottom - top), atlas,
+                                              COLOR_KEY if color_key else BACKGROUND)
+            self.photo = ImageTk.PhotoImage(self.compositor.buffer)
+            self.canvas.create_image(0, 0, anchor='nw', image=self.photo)
+
+    def show(self, alpha):
+        self.window.attributes('-alpha', alpha)
+        if not self.visible:
+            self.window.deiconify()
+            self.visible = True
+            if self.color_key and not self._click_through:
+                self._make_click_through()
+
+    def _make_click_through(self):
+        """Let mouse input pass through to the windows below (WS_EX_TRANSPARENT)"""
+        self.window.update_idletasks()  # Tk creates the wrapper window when first mapped
+        hwnd = win32gui.GetParent(self.window.winfo_id())
+        style = win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE)
+        win32gui.SetWindowLong(hwnd, win32con.GWL_EXSTYLE,
+                               style | win32con.WS_EX_LAYERED | win32con.WS_EX_TRANSPARENT)
+        self._click_through = True
+
+    def hide(self):
+        if self.visible:
+            self.window.withdraw()
+            self.visible = False
+
+    def clear(self):
+        """Hide label items (kept for reuse) and delete other items"""
+        if self.compositor is not None and len(self.compositor):
+            self.compositor.clear()
+            self.upload()
+        for bg_id, text_id in self.pool[:self.count]:
+            self.canvas.itemconfig(bg_id, state='hidden')
+            self.canvas.itemconfig(text_id, state='hidden')
+        for item in self.extra_items:
+            self.canvas.delete(item)
+        self.extra_items = []
+        self.count = 0
+
+    def upload(self, rects=None):
+        """
+        Show the compositor buffer (image renderer)
+
+        Each changed rectangle becomes a small patch image on top of the base
+        image (a patch replaces older ones it covers); many patches or a large
+        changed area fall back to one full upload (see upload_plan).
+
+        Args:
+            rects: Changed regions (left, top, right, bottom); None uploads the whole buffer
+        """
+        from PIL import ImageTk
+        from ui.label_renderer import upload_plan
+
+        plan = None
+        if rects is not None:
+            plan = upload_plan(rects, self.compositor.buffer.size,
+                               OverlayWindow.MAX_PATCHES - len(self.patches), OverlayWindow.PATCH_AREA)
+        if plan is not None:
+            for rect in plan:
+                covered = [p for p in self.patches if _contains(rect, p[2])]
+                for item, _, _ in covered:
+                    self.canvas.delete(item)
+                self.patches = [p for p in self.patches if p not in covered]
+                patch = ImageTk.PhotoImage(self.compositor.buffer.crop(rect))
+                item = self.canvas.create_image(rect[0], rect[1], anchor='nw', image=patch)
+                self.patches.append((item, patch, rect))
+            return
+
+        self.photo.paste(self.compositor.buffer)
+        for item, _, _ in self.patches:
+            self.canvas.delete(item)
+        self.patches = []
+
+    def draw(self, positions, labels):
+        """
+        Draw labels at canvas positions
+
+        Returns:
+            Surface index of the first label drawn
+        """
+        first = self.count
+        self.count += len(labels)
+
+        if self.compositor is not None:
+            bbox = self.compositor.add(positions, labels)
+            if bbox is not None:
+                self.upload([bbox])
+            return first
+
+        canvas = self.canvas
+        width, height = self.label_size
+        for index, ((label_x, label_y), label) in enumerate(zip(positions, labels), first):
+            bg_coords = (label_x, label_y, label_x + width, label_y + height)
+            text_coords = (label_x + width // 2, label_y + height // 2)
+
+            if index < len(self.pool):
+                # Reuse pooled items
+                bg_id, text_id = self.pool[index]
+                canvas.coords(bg_id, *bg_coords)
+                canvas.itemconfig(bg_id, fill='yellow', state='normal')
+                canvas.coords(text_id, *text_coords)
+                canvas.itemconfig(text_id, text=label.upper(), state='normal')
+            else:
+                # Draw label background
+                bg_id = canvas.create_rectangle(
+                    *bg_coords,
+                    fill='yellow',
+                    outline='black',
+                    width=2
+                )
+
+                # Draw label text
+                text_id = canvas.create_text(
+                    *text_coords,
+                    text=label.upper(),
+                    font=self.label_font,
+                    fill='black'
+                )
+                self.pool.append((bg_id, text_id))
+        return first
+
+    def update_highlight(self, added, removed):
+        """Repaint labels by surface index"""
+        if self.compositor is not None:
+            dirty = self.compositor.update_highlight(added, removed)
+            if dirty:
+                self.upload(dirty)
+            return
+
+        for index in added:
+            self.canvas.itemconfig(self.pool[index][0], fill='green')
+        for index in removed:
+            self.canvas.itemconfig(self.pool[index][0], fill='yellow')
+
+    def destroy(self):
+        try:
+            self.window.destroy()
+        except tk.TclError:
+            pass
+
+
+class OverlayWindow:
+    """
+    Transparent overlay for Hint mode labels, one window per monitor
+
+    One long-lived Tk root, always withdrawn, owns the event loop. Each
+    monitor gets its own overlay window sized to that monitor, created the
+    first time it is needed and kept for later activations; only monitors
+    holding labels (plus the one under the cursor, which takes keyboard
+    input) are shown and painted, instead of one window spanning the whole
+    virtual desktop. The monitor list is cached and re-enumerated, rebuilding
+    the windows, only when the display configuration changes. prepare()
+    builds the root (ideally at startup, on the thread that runs the modes),
+    create() shows the cursor's window cleared, hide() withdraws everything
+    again. destroy() tears everything down.
+
+    Renderers:
+    - 'canvas': two Tk canvas items (box + text) per label
+    - 'image': labels composed from a glyph atlas into one off-screen buffer
+      per monitor (label_renderer.py) shown as a single canvas image;
+      highlight changes upload only the dirty rectangles as small patch images
+
+    Transparency:
+    - 'alpha': the whole window is blended at `alpha` over a black
+      background (dims the screen, fades the labels too)
+    - 'colorkey': the background is the transparent colour key, so only
+      label pixels are drawn, opaque, and the windows are click-through;
+      the compositor no longer blends every pixel of the monitor. Falls
+      back to 'alpha' where Tk has no -transparentcolor
+
+    `metrics` holds the windows shown, their surface memory next to what one
+    virtual-desktop window would take, and the paint time of the activation.
+    """
+
+    MAX_PATCHES = 64  # Patch images on top of the base image before a full upload
+    PATCH_AREA = 0.25  # Changed share of a monitor above which a full upload is cheaper
+
+    def __init__(self, alpha=0.3, renderer='canvas', transparency='alpha'):
+        """
+        Args:
+            alpha: Overlay opacity for Hint mode ('alpha' transparency)
+            renderer: 'canvas' or 'image'
+            transparency: 'alpha' or 'colorkey'
+        """
+        if renderer not in ('canvas', 'image'):
+            raise ValueError(f"Unknown renderer: {renderer}")
+        if transparency not in ('alpha', 'colorkey'):
+            raise ValueError(f"Unknown transparency: {transparency}")
+        self.root = None
+        self.labels = []
+        self.label_font = None
+        self.previous_focus = None
+        self.alpha = alpha
+        self.label_size = (35, 26)  # Width x Height of label box
+        self.renderer = renderer
+        self.requested_transparency = transparency
+        self.transparency = transparency  # In effect (after fallback)
+        self.monitor_cache = MonitorCache(monitor_rects, display_signature)
+        self.placer = None
+        self.metrics = {}
+        self._atlas = None
+        self._surfaces = {}  # Monitor index -> _Surface
+        self._focus = None  # Surface taking keyboard input
+        self._current_alpha = alpha
+        self._host_root = None  # Root owned by the UI thread (see prepare)
+        self._on_hidden = None  # Callback run once the overlay is hidden
+        self._nested = 0  # Depth of run_event_loop() mainloops
+
+    @property
+    def monitors(self):
+        """Cached monitor rects (left, top, right, bottom)"""
+        return self.monitor_cache.monitors
+
+    @property
+    def canvas(self):
+        """Canvas of the window under the cursor"""
+        return self._focus.canvas if self._focus else None
+
+    @property
+    def screen_offset_x(self):
+        """Screen x of self.canvas (0, 0)"""
+        return self._focus.offset[0] if self._focus else 0
+
+    @property
+    def screen_offset_y(self):
+        """Screen y of self.canvas (0, 0)"""
+        return self._focus.offset[1] if self._focus else 0
+
+    def prepare(self, root=None):
+        """
+        Build the hidden root if missing or the display configuration changed
+
+        Args:
+            root: Hidden Tk root to draw from (e.g. the UIThread's); kept across
+                  rebuilds and never destroyed here. Default: own root
+
+        Returns:
+            True if the root was (re)built
+        """
+        if root is not None and root is not self._host_root:
+            if self.root:
+                self._teardown()
+            self._host_root = root
+        changed = self.monitor_cache.refresh()
+        if self.root and not changed:
+            return False
+        if self.root:
+            print("🖥️ Display configuration changed - rebuilding overlay")
+            self._teardown()
+
+        # Hidden root: owns the event loop and the font, never shown
+        if self._host_root is not None:
+            self.root = self._host_root
+        else:
+            self.root = tk.Tk()
+            self.root.withdraw()
+
+        self.transparency = self.requested_transparency
+        if self.transparency == 'colorkey' and not self._color_key_supported():
+            print("⚠️ Color-key transparency not supported - falling back to alpha")
+            self.transparency = 'alpha'
+
+        # Create font once per root
+        self.label_font = tkfont.Font(root=self.root, family="Arial", size=14, weight="bold")
+
+        if self.renderer == 'image':
+            from ui.label_renderer import GlyphAtlas
+            # One atlas per font size and DPI, shared across rebuilds
+            self._atlas = GlyphAtlas.get(14, self.root.winfo_fpixels('1i') / 96)
+            self.label_size = self._atlas.size
+
+        # Collision-avoiding placement, clamped to each monitor
+        from ui.label_placement import LabelPlacer
+        self.placer = LabelPlacer(self.label_size, monitors=self.monitors)
+
         # Bind ESC key to exit
-        self.root.bind('<Escape>', lambda e: self.destroy())
+        self.bind('<Escape>', lambda e: self.hide())
+
+        print(f"✅ Overlay prepared ({len(self.monitors)} monitor(s))")
+        return True
+
+    def _color_key_supported(self):
+        """True if Tk can make a colour transparent (Windows only)"""
+        probe = tk.Toplevel(self.root)
+        try:
+            probe.withdraw()
+            probe.attributes('-transparentcolor', color_key_hex())
+            return True
+        except tk.TclError:
+            return False
+        finally:
+            probe.destroy()
+
+    def _surface(self, index):
+        """Window of a monitor, created on first use"""
+        surface = self._surfaces.get(index)
+        if surface is None:
+            surface = _Surface(self.root, self.monitors[index], self.renderer, self.label_font, self._atlas,
+                               color_key=self.transparency == 'colorkey')
+            self._surfaces[index] = surface
+        return surface
+
+    def _show(self, surface):
+        if surface.visible:
+            return
+        surface.show(self._current_alpha)
+        shown = [s for s in self._surfaces.values() if s.visible]
+        self.metrics['surfaces'] = len(shown)
+        self.metrics['surface_bytes'] = sum(surface_bytes(s.rect) for s in shown)
 
-        # Show window and force focus
-        self.root.deiconify()  # Show window after setup complete
-        self.root.focus_force()
+    def create(self, alpha=None):
+        """
+        Show the overlay, cleared, on the cursor's monitor (builds it first if prepare() was not called)
 
-        print("✅ Overlay window created")
+        Args:
+            alpha: Opacity for this activation (default: self.alpha, opaque labels with 'colorkey')
+        """
+        # Save current focus window
+        self.previous_focus = win32gui.GetForegroundWindow()
+
+        self.prepare()
+        self.clear()
+        if alpha is None:
+            alpha = 1.0 if self.transparency == 'colorkey' else self.alpha
+        self._current_alpha = alpha
+        left, top, width, height = virtual_screen()
+        self.metrics = {'transparency': self.transparency, 'surfaces': 0, 'surface_bytes': 0,
+                        'virtual_bytes': width * height * 4, 'paint_ms': 0.0}
+
+        # Keyboard input goes to the window under the cursor
+        self.focus_at(*win32api.GetCursorPos())
+
+    def focus_at(self, x, y):
+        """
+        Show and focus the window of the monitor holding a screen point
+
+        Returns:
+            (canvas, (offset_x, offset_y)): That window's canvas and its screen position
+        """
+        index = monitor_index((x, y, x + 1, y + 1), self.monitors)
+        self._focus = self._surface(index)
+        self._show(self._focus)
+        self._focus.window.focus_force()
+        return self._focus.canvas, self._focus.offset
+
+    def bind(self, sequence, func):
+        """Bind a key event on every overlay window"""
+        if self.root:
+            self.root.bind_all(sequence, func)
+
+    def unbind(self, sequence):
+        """Remove a binding made with bind()"""
+        if self.root:
+            self.root.unbind_all(sequence)
+
+    def clear(self):
+        """Hide all label items (kept for reuse) and delete other items"""
+        for surface in self._surfaces.values():
+            surface.clear()
+        if self.placer is not None:
+            self.placer.reset()
+        self.labels = []
+
+    def add_item(self, item):
+        """Register an item a mode created on self.canvas (deleted by the next clear())"""
+        self._focus.extra_items.append(item)
+        return item
 
     def draw_labels(self, elements, labels):
         """
         Draw labels on overlay
 
         Args:
-            elements: List of element dictionaries
+            elements: List of ElementRecord
             labels: List of label strings
         """
-        if not self.canvas:
+        if not self.root:
             return
 
-        self.canvas.delete("all")  # Clear canvas
-        self.labels = []
+        self.clear()
+        self.draw_batch(elements, labels)
 
-        # Create font
-        label_font = tkfont.Font(family="Arial", size=14, weight="bold")
-
-        for i, (elem, label) in enumerate(zip(elements, labels)):
-            rect = elem['rect']
-
-            # Convert screen coordinates to canvas coordinates
-            # Canvas origin is at virtual screen top-left
-            canvas_x = rect.left - self.screen_offset_x
-            canvas_y = rect.top - self.screen_offset_y
-
-            # Label position (to the left of element)
-            label_x = canvas_x - self.label_size[0] - 5
-            label_y = canvas_y
-
-            # Ensure label is visible - check against element bounds, not screen bounds
-            if label_x < canvas_x - 200:  # Too far left
-                label_x = canvas_x + (rect.width() if hasattr(rect, 'width') else 50) + 5
-            if label_y < 0:
-                label_y = 0
-
-            # Draw label background
-            bg_id = self.canvas.create_rectangle(
-                label_x, label_y,
-                label_x + self.label_size[0], label_y + self.label_size[1],
-                fill='yellow',
-                outline='black',
-                width=2
-            )
-
-            # Draw label text
-            text_id = self.canvas.create_text(
-                label_x + self.label_size[0] // 2,
-                label_y + self.label_size[1] // 2,
-                text=label.upper(),
-                font=label_font,
-                fill='black'
-            )
-
-            self.labels.append({
-                'label': label,
-                'element': elem,
-                'bg_id': bg_id,
-                'text_id': text_id
-            })
-
-        print(f"✅ Drew {len(self.labels)} labels")
+        stats = self.placer.stats
+        print(f"✅ Drew {len(self.labels)} labels ({stats['moved']} moved, "
+              f"{stats['label_collisions']} overlapping)")
+        print(f"   {self.report()}")
 
-    def highlight_matches(self, matching_labels):
+    def draw_batch(self, elements, labels):
         """
-        Highlight matching labels
+        Add labels to overlay without clearing existing ones (streaming detection)
 
         Args:
-            matching_labels: List of label strings to highlight
+            elements: List of ElementRecord
+            labels: List of label strings
         """
-        if not self.canvas:
+        if not self.root:
             return
 
-        for item in self.labels:
-            if item['label'] in matching_labels:
-                self.canvas.itemconfig(item['bg_id'], fill='green')
-            else:
-                self.canvas.itemconfig(item['bg_id'], fill='yellow')
+        start = time.perf_counter()
+        positions = self.placer.place(elements)
+
+        # Each label goes to its element's monitor, in that window's coordinates
+        groups = {}
+        for i, elem in enumerate(elements):
+            index = monitor_index((elem.left, elem.top, elem.right, elem.bottom), self.monitors)
+            groups.setdefault(index, []).append(i)
+
+        entries = [None] * len(elements)
+        for index, members in groups.items():
+            surface = self._surface(index)
+            self._show(surface)
+            offset_x, offset_y = surface.offset
+            first = surface.draw([(positions[i][0] - offset_x, positions[i][1] - offset_y) for i in members],
+                                 [labels[i] for i in members])
+            for local, i in enumerate(members, first):
+                entries[i] = {'label': labels[i], 'element': elements[i], 'surface': surface, 'local': local}
+        self.labels.extend(entries)
+
+        self.metrics['paint_ms'] = self.metrics.get('paint_ms', 0.0) + (time.perf_counter() - start) * 1000
+
+    def report(self):
+        """One-line summary of self.metrics"""
+        metrics = self.metrics
+        return (f"{metrics.get('surfaces', 0)} {metrics.get('transparency', self.transparency)} overlay window(s), "
+                f"{metrics.get('surface_bytes', 0) / 2 ** 20:.1f}MB surface "
+                f"(virtual desktop: {metrics.get('virtual_bytes', 0) / 2 ** 20:.1f}MB), "
+                f"paint {metrics.get('paint_ms', 0.0):.1f}ms")
 
-    def destroy(self):
-        """Destroy overlay window"""
+    def highlight_matches(self, matching_labels):
+        """
+        Highlight matching labels (repaints every label)
+
+        Args:
+            matching_labels: Label strings to highlight
+        """
+        matching = set(matching_labels)
+        added = [i for i, item in enumerate(self.labels) if item['label'] in matching]
+        removed = [i for i, item in enumerate(self.labels) if item['label'] not in matching]
+        self.update_highlight(added, removed)
+
+    def update_highlight(self, added, removed):
+        """
+        Repaint only labels whose highlight changed (see LabelMatcher)
+
+        Args:
+            added: Indices of labels to highlight
+            removed: Indices of labels to clear
+        """
+        if not self.root:
+            return
+
+        start = time.perf_counter()
+        changes = {}  # Surface -> (added, removed) surface indices
+        for indices, slot in ((added, 0), (removed, 1)):
+            for index in indices:
+                item = self.labels[index]
+                changes.setdefault(item['surface'], ([], []))[slot].append(item['local'])
+        for surface, (surface_added, surface_removed) in changes.items():
+            surface.update_highlight(surface_added, surface_removed)
+        self.metrics['paint_ms'] = self.metrics.get('paint_ms', 0.0) + (time.perf_counter() - start) * 1000
+
+    def hide(self):
+        """Withdraw all overlay windows (kept for the next activation) and end the event loop"""
         if self.root:
             try:
-                self.root.destroy()
-                self.root = None
-                print("✅ Overlay window destroyed")
-            except:
+                self.clear()
+                for surface in self._surfaces.values():
+                    surface.hide()
+                if self._on_hidden:
+                    # Run once the current event handler has returned
+                    on_hidden, self._on_hidden = self._on_hidden, None
+                    self.root.after_idle(on_hidden)
+                elif self._nested:
+                    self.root.quit()
+            except tk.TclError:
                 pass
 
+        # Drop references to the snapshot
+        self.labels = []
+
         # Restore focus
         if self.previous_focus:
             try:
                 win32gui.SetForegroundWindow(self.previous_focus)
             except:
                 pass
+            self.previous_focus = None
+
+    def _teardown(self):
+        for surface in self._surfaces.values():
+            surface.destroy()
+        if self.root is not self._host_root:
+            try:
+                self.root.destroy()
+            except tk.TclError:
+                pass
+        self.root = None
+        self.label_font = None
+        self.placer = None
+        self._surfaces = {}
+        self._focus = None
 
-    def run_event_loop(self):
-        """Run Tkinter event loop (blocking)"""
+    def destroy(self):
+        """Destroy overlay windows (use hide() between activations)"""
+        self.hide()
         if self.root:
+            self._teardown()
+            print("✅ Overlay window destroyed")
+
+    def run_event_loop(self, on_hidden=None):
+        """
+        Wait for the overlay to be hidden
+
+        Args:
+            on_hidden: Function called (on the Tk thread) after the next hide().
+                       If given, returns at once: the caller's event loop (e.g.
+                       UIThread's) keeps running. Default: block in a Tkinter
+                       event loop until hide()
+        """
+        if not self.root:
+            return
+        if on_hidden is not None:
+            self._on_hidden = on_hidden
+            return
+        self._nested += 1
+        try:
             self.root.mainloop()
+        finally:
+            self._nested -= 1
 
 
 # Test code
 if __name__ == "__main__":
-    import time
+    import os
+    import sys
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    from core.element_record import ElementRecord
 
     overlay = OverlayWindow()
     overlay.create()
 
     # Mock elements and labels
-    class MockRect:
-        def __init__(self, left, top, width, height):
-            self.left = left
-            self.top = top
-            self.width = width
-            self.height = height
-
     mock_elements = [
-        {'rect': MockRect(100, 100, 80, 30), 'name': 'Button 1'},
-        {'rect': MockRect(200, 150, 80, 30), 'name': 'Button 2'},
-        {'rect': MockRect(300, 200, 80, 30), 'name': 'Button 3'},
+        ElementRecord(100, 100, 180, 130, 'Button', 'Button 1'),
+        ElementRecord(200, 150, 280, 180, 'Button', 'Button 2'),
+        ElementRecord(300, 200, 380, 230, 'Button', 'Button 3'),
     ]
     mock_labels = ['a', 's', 'd']
 
@@ -199,4 +646,4 @@ if __name__ == "__main__":
     import threading
     threading.Thread(target=test_highlight, daemon=True).start()
 
-    overlay.run_event_loop()
\ No newline at end of file
+    overlay.run_event_loop()
@@ -0,0 +1,166 @@
+"""
+HEMouse UI Thread
+One thread owns the Tk interpreter; other threads send it commands through a queue
+"""
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+def _tk_root():
+    import tkinter as tk
+    root = tk.Tk()
+    root.withdraw()
+    return root
+
+
+class UIThread:
+    """
+    Dedicated UI thread with the only Tk root
+
+    Tk is not thread-safe, so nothing outside this thread touches it: other
+    threads submit commands (callables) to a thread-safe queue, which the
+    UI thread drains from an after() timer and runs in order. The Tk
+    mainloop runs for the life of the thread; modes no longer start nested
+    loops but report their end through a callback (see run_mode()).
+    """
+
+    def __init__(self, setup=None, poll_interval=0.01, root_factory=_tk_root):
+        """
+        Args:
+            setup: Optional function(root) run on the UI thread before the first
+                   command (e.g. OverlayWindow.prepare)
+            poll_interval: Seconds between queue checks
+            root_factory: Function creating the hidden Tk root (on the UI thread)
+        """
+        self.setup = setup
+        self.poll_interval = poll_interval
+        self.root_factory = root_factory
+        self.root = None
+        self.thread = None
+        self.running = False
+        self.latencies = deque(maxlen=200)  # Submit-to-run seconds of recent commands
+        self._commands = queue.Queue()
+        self._ready = threading.Event()
+        self._error = None
+
+    def start(self, timeout=5.0):
+        """
+        Start the UI thread and wait until Tk is up
+
+        Raises:
+            RuntimeError: Tk root or setup failed
+        """
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True, name="HEMouse UI")
+        self.thread.start()
+        if not self._ready.wait(timeout) or self._error:
+            self.running = False
+            raise RuntimeError(f"UI thread failed to start: {self._error}")
+        print("🟢 UI thread started")
+
+    def _run(self):
+        try:
+            self.root = self.root_factory()
+            if self.setup:
+                self.setup(self.root)
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+            return
+
+        self.root.after(0, self._poll)
+        self._ready.set()
+        self.root.mainloop()
+
+        try:
+            self.root.destroy()
+        except Exception:
+            pass
+        self.root = None
+
+    def on_ui_thread(self):
+        """True when called from the UI thread"""
+        return threading.current_thread() is self.thread
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Queue a command for the UI thread
+
+        Returns:
+            concurrent.futures.Future with the command's result
+        """
+        future = Future()
+        self._commands.put((func, args, kwargs, future, time.perf_counter()))
+        return future
+
+    def call(self, func, *args, timeout=None, **kwargs):
+        """Run a command on the UI thread and wait for its result (runs directly on the UI thread)"""
+        if self.on_ui_thread():
+            return func(*args, **kwargs)
+        return self.submit(func, *args, **kwargs).result(timeout)
+
+    def run_mode(self, activate, timeout=None):
+        """
+        Run a mode on the UI thread and block until it has ended
+
+        Args:
+            activate: Function(on_exit) starting the mode (e.g. HintMode.activate);
+                      it returns once the mode is shown and calls on_exit() when it ends
+            timeout: Max seconds to wait for the end
+
+        Returns:
+            True if the mode ended, False on timeout
+        """
+        ended = threading.Event()
+        self.call(activate, ended.set)
+        return ended.wait(timeout)
+
+    def _poll(self):
+        """Run queued commands (UI thread, every poll_interval)"""
+        while True:
+            try:
+                func, args, kwargs, future, submitted = self._commands.get_nowait()
+            except queue.Empty:
+                break
+            if not future.set_running_or_notify_cancel():
+                continue
+            self.latencies.append(time.perf_counter() - submitted)
+            try:
+                future.set_result(func(*args, **kwargs))
+            except Exception as e:
+                print(f"❌ UI command error: {e}")
+                future.set_exception(e)
+
+        if self.running:
+            self.root.after(max(1, int(self.poll_interval * 1000)), self._poll)
+
+    def latency_stats(self):
+        """
+        Submit-to-run latency of recent commands
+
+        Returns:
+            Dict with 'count', 'mean_ms', 'max_ms' and 'queue_depth'
+        """
+        stats = {'count': len(self.latencies), 'mean_ms': 0.0, 'max_ms': 0.0, 'queue_depth': self._commands.qsize()}
+        if self.latencies:
+            stats['mean_ms'] = sum(self.latencies) / len(self.latencies) * 1000
+            stats['max_ms'] = max(self.latencies) * 1000
+        return stats
+
+    def _quit(self):
+        self.running = False
+        self.root.quit()
+
+    def stop(self, timeout=1.0):
+        """End the Tk mainloop and the thread"""
+        if not self.running:
+            return
+        self.submit(self._quit)
+        if self.thread and not self.on_ui_thread():
+            self.thread.join(timeout)
+        print("🔴 UI thread stopped")
@@ -54,6 +54,27 @@ def test_label_generator():
     print("\n✅ Label Generator: ALL TESTS PASSED\n")
 
 
+def test_label_streaming():
+    """Test labels generated for a growing set"""
+    print("\n" + "=" * 60)
+    print("TEST: Label streaming")
+    print("=" * 60)
+
+    from core.label_generator import LabelGenerator
+
+    gen = LabelGenerator()
+    stream = gen.iter_labels()
+    labels = [next(stream) for _ in range(300)]
+
+    assert len(set(labels)) == 300, "Duplicate labels"
+    assert gen.verify_no_prefix_conflicts(labels), "Prefix conflict in streamed labels"
+    assert labels[:6] == ['a', 's', 'd', 'f', 'g', 'h'], f"Unexpected first labels: {labels[:6]}"
+    assert max(len(label) for label in labels) <= 5, "Labels grow too fast"
+    print(f"   ✅ 300 streamed labels, max length {max(len(label) for label in labels)}")
+
+    print("\n✅ Label streaming: ALL TESTS PASSED\n")
+
+
 def test_mode_manager():
     """Test mode manager"""
     print("\n" + "=" * 60)
@@ -167,7 +188,7 @@ def test_element_detector():
     if len(elements) > 0:
         print(f"\n   Sample elements (first 5):")
         for i, elem in enumerate(elements[:5]):
-            print(f"   {i+1}. {elem['type']}: {elem['name'][:40]}")
+            print(f"   {i+1}. {elem.control_type}: {elem.name[:40]}")
         print("\n✅ Element Detector: TEST PASSED\n")
     else:
         print("\n   ⚠️ No elements detected (window may not be supported)\n")
@@ -182,6 +203,7 @@ def main():
     try:
         # Automated tests
         test_label_generator()
+        test_label_streaming()
         test_mode_manager()
 
         # Manual tests
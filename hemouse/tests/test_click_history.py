@@ -0,0 +1,132 @@
+"""
+HEMouse Click History Tests
+Usage-weighted labels from a local click-history store
+"""
+import sys
+import os
+import random
+import tempfile
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.click_history import ClickHistory, element_fingerprint
+from core.element_record import ElementRecord
+from core.label_generator import LabelGenerator
+
+
+def make_elements(count, window_left=0):
+    return [ElementRecord(window_left + 10 + (i % 40) * 45, 10 + (i // 40) * 35,
+                          window_left + 50 + (i % 40) * 45, 40 + (i // 40) * 35,
+                          'Button', f"Button {i}") for i in range(count)]
+
+
+def test_fingerprint_stable():
+    """Same target in a moved window and after a restart (new runtime id)"""
+    a = ElementRecord(100, 100, 140, 130, 'Button', 'Save', (42, 1))
+    b = ElementRecord(700, 300, 740, 330, 'Button', 'Save', (42, 99))
+    assert element_fingerprint(a) == element_fingerprint(b)
+
+    unnamed = ElementRecord(100, 100, 140, 130, 'Button', '')
+    moved = ElementRecord(600, 100, 640, 130, 'Button', '')
+    assert element_fingerprint(unnamed, (0, 0)) == element_fingerprint(moved, (500, 0))
+    assert element_fingerprint(unnamed) != element_fingerprint(moved)
+
+
+def test_weighted_labels():
+    gen = LabelGenerator()
+    weights = [0.0] * 200
+    weights[150] = 40.0
+    weights[77] = 12.0
+    labels = gen.generate_weighted_labels(weights)
+
+    assert gen.verify_no_prefix_conflicts(labels) and len(set(labels)) == 200
+    assert len(labels[150]) == 1 and len(labels[77]) == 1, "Most used targets get single keys"
+    assert gen.charset.index(labels[150]) < gen.charset.index(labels[77]), "Heavier target gets the easier key"
+    assert max(len(label) for label in labels) <= 4
+    assert gen.generate_weighted_labels([0.0] * 50) == gen.generate_labels(50), "No history -> default"
+    assert gen.generate_weighted_labels([1.0, 5.0, 0.0]) == ['s', 'a', 'd']
+
+
+def test_store_bounds_decay_persistence():
+    now = 1_000_000.0
+    history = ClickHistory(path='', max_apps=2, max_targets=3, half_life_days=1.0)
+    elements = make_elements(5)
+
+    for i, element in enumerate(elements):
+        for _ in range(i + 1):
+            history.record_click('App.exe', element, now=now)
+    assert len(history) == 3, "Weakest targets evicted"
+    assert history.weights('app.exe', elements, now=now) == [0.0, 0.0, 3.0, 4.0, 5.0]
+
+    one_day_later = history.weights('app.exe', elements, now=now + 86400)
+    assert abs(one_day_later[4] - 2.5) < 1e-9, "Clicks decay with the half-life"
+
+    history.record_click('b.exe', elements[0], now=now)
+    history.record_click('c.exe', elements[0], now=now)
+    assert history.weights('app.exe', elements, now=now) == [0.0] * 5, "LRU application evicted"
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'clicks.json')
+        stored = ClickHistory(path=path, save_delay=0.05)
+        stored.record_click('notepad.exe', elements[2])
+        assert not os.path.exists(path), "record_click() must not write the file itself"
+        deadline = time.monotonic() + 2.0
+        while not os.path.exists(path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert ClickHistory(path=path).weights('notepad.exe', elements)[2] > 0.99, "Background save"
+        stored.record_click('notepad.exe', elements[3])
+        stored.flush()  # On exit
+        assert ClickHistory(path=path).weights('notepad.exe', elements)[3] > 0.99
+        stored.reset()
+        assert len(ClickHistory(path=path)) == 0
+
+
+def test_replay_benchmark():
+    """Benchmark: average keystrokes per click on a replayed Zipf history"""
+    print("\n" + "=" * 60)
+    print("BENCHMARK: Usage-weighted labels (replayed history)")
+    print("=" * 60)
+
+    rng = random.Random(5)
+    gen = LabelGenerator()
+    elements = make_elements(300)
+    # Frequently used targets sit anywhere in traversal order
+    popularity = list(range(len(elements)))
+    rng.shuffle(popularity)
+    zipf = [1.0 / (rank + 1) for rank in range(len(elements))]
+    clicks = rng.choices(popularity, weights=zipf, k=2000)
+
+    history = ClickHistory(path='', autosave=False)
+    baseline = gen.generate_labels(len(elements))
+    plain_keys = weighted_keys = 0
+    lookup_time = 0.0
+    now = 0.0
+
+    for target in clicks:
+        now += 60
+        start = time.perf_counter()
+        weights = history.weights('app.exe', elements, now=now)
+        labels = gen.generate_weighted_labels(weights) if any(weights) else baseline
+        lookup_time += time.perf_counter() - start
+
+        plain_keys += len(baseline[target])
+        weighted_keys += len(labels[target])
+        history.record_click('app.exe', elements[target], now=now)
+
+    plain = plain_keys / len(clicks)
+    weighted = weighted_keys / len(clicks)
+    print(f"   traversal order: {plain:.2f} keys/click")
+    print(f"   usage weighted:  {weighted:.2f} keys/click ({(1 - weighted / plain) * 100:.0f}% fewer)")
+    print(f"   weights + labels: {lookup_time / len(clicks) * 1000:.2f}ms per activation (300 elements)")
+    assert weighted < plain * 0.85, "Weighted labels should save keystrokes"
+    assert lookup_time / len(clicks) < 0.02
+
+
+if __name__ == "__main__":
+    test_fingerprint_stable()
+    test_weighted_labels()
+    test_store_bounds_decay_persistence()
+    test_replay_benchmark()
+    print("✅ Click history tests passed")
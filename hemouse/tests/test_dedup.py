@@ -0,0 +1,114 @@
+"""
+HEMouse Deduplication Tests
+Spatial grid queries and overlapping-clickable suppression
+"""
+import sys
+import os
+import random
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.element_record import ElementRecord
+from core.spatial_index import SpatialGrid, iou
+from core.dedup import dedupe_elements, StreamingDeduper
+
+
+def record(control_type, left, top, right, bottom, name="item"):
+    return ElementRecord(left, top, right, bottom, control_type, name)
+
+
+def test_grid_matches_brute_force():
+    """Grid query returns exactly the overlapping rects"""
+    rng = random.Random(7)
+    rects = []
+    for _ in range(500):
+        x, y = rng.randrange(0, 1900), rng.randrange(0, 1060)
+        rects.append((x, y, x + rng.randrange(1, 300), y + rng.randrange(1, 120)))
+
+    grid = SpatialGrid(cell_size=50)
+    for index, rect in enumerate(rects):
+        grid.insert(rect, index)
+    assert len(grid) == len(rects)
+
+    for _ in range(100):
+        x, y = rng.randrange(0, 1900), rng.randrange(0, 1060)
+        query = (x, y, x + 80, y + 40)
+        expected = {i for i, r in enumerate(rects)
+                    if r[0] < query[2] and r[2] > query[0] and r[1] < query[3] and r[3] > query[1]}
+        assert {item for _, item in grid.query(query)} == expected
+
+
+def test_wrapper_keeps_most_actionable():
+    """ListItem/TabItem wrapping a Button with nearly the same rect -> one Button"""
+    elements = [
+        record('ListItem', 0, 0, 200, 30, "Row"),
+        record('Button', 2, 1, 198, 29, "Row"),
+        record('TabItem', 0, 100, 80, 130, "Tab"),
+        record('Button', 0, 100, 80, 130, "Tab"),
+        record('Hyperlink', 300, 0, 400, 20, "Link"),
+    ]
+    kept = dedupe_elements(elements)
+    assert [(e.control_type, e.top) for e in kept] == [('Button', 1), ('Button', 100), ('Hyperlink', 0)]
+
+
+def test_distinct_and_small_nested_kept():
+    """Neighbours and small controls inside a large item are separate targets"""
+    elements = [
+        record('ListItem', 0, 0, 400, 40, "Row"),
+        record('CheckBox', 5, 10, 25, 30, "Done"),   # Small, IoU far below threshold
+        record('Button', 0, 50, 100, 80, "A"),
+        record('Button', 100, 50, 200, 80, "B"),     # Touching, not overlapping
+    ]
+    assert len(dedupe_elements(elements)) == 4
+    # A threshold of 0 merges anything that overlaps at all
+    assert len(dedupe_elements(elements, iou_threshold=0.0)) == 3
+
+
+def test_iou():
+    assert iou((0, 0, 10, 10), (0, 0, 10, 10)) == 1.0
+    assert iou((0, 0, 10, 10), (10, 0, 20, 10)) == 0.0
+    assert abs(iou((0, 0, 10, 10), (5, 0, 15, 10)) - 1 / 3) < 1e-9
+
+
+def test_streaming_deduper():
+    """Later batches cannot replace emitted labels, only drop duplicates"""
+    deduper = StreamingDeduper()
+    first = deduper.filter([record('ListItem', 0, 0, 200, 30), record('Button', 1, 1, 199, 29)])
+    assert [e.control_type for e in first] == ['Button']
+    second = deduper.filter([record('ListItem', 0, 0, 200, 31), record('Button', 0, 40, 100, 70)])
+    assert [e.top for e in second] == [40]
+    assert deduper.stats == {'seen': 4, 'kept': 2}
+
+
+def test_dedup_benchmark():
+    """Benchmark: 5k elements with wrapper duplicates"""
+    print("\n" + "=" * 60)
+    print("BENCHMARK: Dedup (5000 elements)")
+    print("=" * 60)
+
+    elements = []
+    for i in range(2500):
+        x, y = (i % 50) * 38, (i // 50) * 21
+        elements.append(record('ListItem', x, y, x + 36, y + 20))
+        elements.append(record('Button', x + 1, y + 1, x + 35, y + 19))
+
+    start = time.perf_counter()
+    kept = dedupe_elements(elements)
+    elapsed = time.perf_counter() - start
+
+    print(f"   {len(elements)} → {len(kept)} labels in {elapsed * 1000:.1f}ms")
+    assert len(kept) == 2500
+    assert all(e.control_type == 'Button' for e in kept)
+    assert elapsed < 1.0, "Dedup should be far below a second for 5k elements"
+
+
+if __name__ == "__main__":
+    test_grid_matches_brute_force()
+    test_wrapper_keeps_most_actionable()
+    test_distinct_and_small_nested_kept()
+    test_iou()
+    test_streaming_deduper()
+    test_dedup_benchmark()
+    print("✅ Dedup tests passed")
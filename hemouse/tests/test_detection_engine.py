@@ -0,0 +1,297 @@
+"""
+HEMouse Detection Engine Tests
+Runs the detection engines against the fake UIA provider (no Windows needed)
+"""
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.detection_engine import TreeWalkEngine, BulkQueryEngine, ParallelTreeWalkEngine, create_engine
+from core.fake_provider import FakeElement, FakeUIAProvider, make_synthetic_tree
+
+
+def make_sample_window():
+    """Small window with every kind of element the filters care about"""
+    return FakeElement('Window', 'Sample', (0, 0, 800, 600), children=[
+        FakeElement('ToolBar', rect=(0, 0, 800, 40), children=[
+            FakeElement('Button', 'Back', (5, 5, 45, 35)),
+            FakeElement('SplitButton', 'Forward', (50, 5, 90, 35)),
+            FakeElement('Button', 'Tiny', (95, 5, 100, 10)),  # Too small
+        ]),
+        FakeElement('Pane', rect=(0, 40, 800, 600), children=[
+            FakeElement('Edit', 'User', (10, 50, 210, 80)),
+            FakeElement('Edit', 'Password', (10, 90, 210, 120), is_password=True),
+            FakeElement('ListItem', '', (10, 130, 210, 160)),  # No name
+            FakeElement('ListItem', 'Row 1', (10, 170, 210, 200)),
+            FakeElement('Text', 'Label', (10, 210, 210, 240)),
+            FakeElement('Hyperlink', 'Offscreen', (5000, 50, 5100, 80)),
+        ]),
+    ])
+
+
+def test_bulk_matches_tree_walk():
+    """Bulk engine returns the same records as the tree walk"""
+    print("\n" + "=" * 60)
+    print("TEST: Bulk engine vs tree walk")
+    print("=" * 60)
+
+    for root in (make_sample_window(), make_synthetic_tree(breadth=3, depth=4)):
+        tree = TreeWalkEngine(FakeUIAProvider(root)).detect(root)
+        bulk = BulkQueryEngine(FakeUIAProvider(root)).detect(root)
+
+        assert len(tree) > 0, "Tree walk found nothing"
+        assert [e.to_tuple() for e in tree] == [e.to_tuple() for e in bulk], "Records differ"
+        print(f"   ✅ {len(tree)} identical records")
+
+    names = [e.name for e in BulkQueryEngine(FakeUIAProvider(make_sample_window())).detect(make_sample_window())]
+    assert names == ['Back', 'Forward', 'User', 'Row 1'], f"Unexpected elements: {names}"
+
+    passwords = BulkQueryEngine(FakeUIAProvider(make_sample_window())).detect(
+        make_sample_window(), exclude_password=False)
+    assert 'Password' in [e.name for e in passwords], "Password field should be included on request"
+
+
+def test_bulk_round_trips():
+    """Bulk engine makes O(1) round-trips, the tree walk O(nodes x properties)"""
+    print("\n" + "=" * 60)
+    print("TEST: Round-trip count")
+    print("=" * 60)
+
+    for depth in (2, 3, 4):
+        root = make_synthetic_tree(breadth=4, depth=depth)
+        node_count = sum(4 ** level for level in range(depth + 1))
+
+        tree_provider = FakeUIAProvider(root)
+        TreeWalkEngine(tree_provider).detect(root)
+        bulk_provider = FakeUIAProvider(root)
+        BulkQueryEngine(bulk_provider).detect(root)
+
+        print(f"   {node_count} nodes: tree={tree_provider.round_trips} bulk={bulk_provider.round_trips}")
+        assert tree_provider.round_trips >= 2 * node_count, "Tree walk should touch every node"
+        assert bulk_provider.round_trips == 1, "Bulk engine should need a single request"
+
+    print("   ✅ Bulk engine round-trips are constant")
+
+
+def test_streaming_batches():
+    """Streaming walk yields the same elements breadth-first, near the cursor first"""
+    print("\n" + "=" * 60)
+    print("TEST: Streaming detection")
+    print("=" * 60)
+
+    root = make_synthetic_tree(breadth=3, depth=4)
+    expected = TreeWalkEngine(FakeUIAProvider(root)).detect(root)
+    batches = list(TreeWalkEngine(FakeUIAProvider(root)).iter_batches(root, batch_size=10))
+
+    streamed = [e for batch in batches for e in batch]
+    assert len(batches) == 9 and all(len(b) <= 10 for b in batches), f"Unexpected batching: {len(batches)}"
+    assert sorted(e.name for e in streamed) == sorted(e.name for e in expected), "Streamed set differs"
+
+    # Shallow elements first
+    shallow = FakeElement('Button', 'Shallow', (900, 10, 960, 40))
+    root.children.append(shallow)
+    first = next(TreeWalkEngine(FakeUIAProvider(root)).iter_batches(root, batch_size=5))
+    assert first[0].name == 'Shallow', f"Shallow element should come first, got {first[0].name}"
+    root.children.pop()
+
+    # Subtree near the cursor first
+    left = FakeElement('Pane', rect=(0, 0, 400, 400), children=[FakeElement('Button', 'Left', (10, 10, 60, 40))])
+    right = FakeElement('Pane', rect=(1000, 0, 1400, 400), children=[FakeElement('Button', 'Right', (1010, 10, 1060, 40))])
+    window = FakeElement('Window', children=[left, right])
+    engine = TreeWalkEngine(FakeUIAProvider(window))
+    near_left = [e.name for b in engine.iter_batches(window, batch_size=1, cursor=(100, 100)) for e in b]
+    near_right = [e.name for b in engine.iter_batches(window, batch_size=1, cursor=(1200, 100)) for e in b]
+    assert near_left == ['Left', 'Right'] and near_right == ['Right', 'Left'], f"{near_left} / {near_right}"
+    print(f"   ✅ {len(streamed)} elements in {len(batches)} batches, cursor ordering works")
+
+
+def test_time_to_first_label():
+    """First batch arrives long before the walk completes"""
+    root = make_synthetic_tree(breadth=4, depth=3)
+    provider = FakeUIAProvider(root, latency=0.0002)
+
+    start = time.time()
+    first = None
+    for batch in TreeWalkEngine(provider).iter_batches(root, batch_size=8):
+        if first is None:
+            first = time.time() - start
+    complete = time.time() - start
+
+    print(f"   ⏱️ time-to-first-label {first * 1000:.1f}ms, time-to-complete {complete * 1000:.1f}ms")
+    assert first < complete / 2, "First batch should not wait for the whole walk"
+
+
+def test_parallel_matches_sequential():
+    """Parallel walk returns the sequential records in the same order"""
+    for root in (make_sample_window(), make_synthetic_tree(breadth=3, depth=5)):
+        expected = TreeWalkEngine(FakeUIAProvider(root)).detect(root)
+        for split_depth in (1, 2, 3):
+            engine = ParallelTreeWalkEngine(FakeUIAProvider(root), workers=3, split_depth=split_depth)
+            result = engine.detect(root)
+            engine.close()
+            assert [e.to_tuple() for e in result] == [e.to_tuple() for e in expected], \
+                f"Order differs at split depth {split_depth}"
+
+
+def test_parallel_shared_deadline():
+    """All workers stop at the shared deadline"""
+    root = make_synthetic_tree(breadth=4, depth=4)
+    engine = ParallelTreeWalkEngine(FakeUIAProvider(root, latency=0.002), workers=4, split_depth=1)
+    start = time.time()
+    result = engine.detect(root, timeout=0.1)
+    elapsed = time.time() - start
+    engine.close()
+    assert elapsed < 0.5, f"Deadline not enforced: {elapsed:.2f}s"
+    assert len(result) < 256, "Walk should have been cut short"
+
+
+def test_parallel_speedup_benchmark():
+    """Benchmark: speedup against worker count on a latency-injecting provider"""
+    print("\n" + "=" * 60)
+    print("BENCHMARK: Parallel traversal (0.2ms per round-trip)")
+    print("=" * 60)
+
+    root = make_synthetic_tree(breadth=4, depth=4)
+
+    provider = FakeUIAProvider(root, latency=0.0002)
+    start = time.time()
+    expected = TreeWalkEngine(provider).detect(root, timeout=30)
+    sequential = time.time() - start
+    print(f"   sequential: {sequential * 1000:.0f}ms ({provider.round_trips} round-trips)")
+
+    speedups = {}
+    for workers in (1, 2, 4, 8):
+        engine = ParallelTreeWalkEngine(FakeUIAProvider(root, latency=0.0002), workers=workers, split_depth=2)
+        engine.detect(root, timeout=30)  # Warm up pool threads
+        start = time.time()
+        result = engine.detect(root, timeout=30)
+        elapsed = time.time() - start
+        engine.close()
+
+        assert len(result) == len(expected)
+        speedups[workers] = sequential / elapsed
+        print(f"   {workers} workers: {elapsed * 1000:.0f}ms (x{speedups[workers]:.1f})")
+
+    assert speedups[4] > 2.0, f"Expected >2x speedup with 4 workers, got x{speedups[4]:.1f}"
+
+
+def make_scrolled_window():
+    """Window with a collapsed menu, a scrolled list and offscreen document content"""
+    def deep(control_type, depth, rect, offscreen=False):
+        if depth == 0:
+            return FakeElement('Button', 'Deep', rect, is_offscreen=offscreen)
+        return FakeElement(control_type, rect=rect, is_offscreen=offscreen,
+                           children=[deep(control_type, depth - 1, rect, offscreen) for _ in range(3)])
+
+    rows = []
+    for i in range(60):
+        top = 100 + i * 30
+        rows.append(FakeElement('ListItem', f'Row {i}', (0, top, 780, top + 30), children=[
+            FakeElement('Group', rect=(0, top, 780, top + 30), children=[
+                FakeElement('Button', f'Row {i} action', (700, top + 2, 770, top + 28)),
+            ]),
+        ]))
+
+    return FakeElement('Window', 'Scrolled', (0, 0, 1000, 800), children=[
+        FakeElement('ToolBar', rect=(0, 0, 1000, 40), children=[
+            FakeElement('Button', f'Tool {i}', (i * 50, 5, i * 50 + 40, 35)) for i in range(3)
+        ]),
+        FakeElement('Menu', rect=(0, 40, 200, 600), is_offscreen=True,
+                    children=[deep('MenuItem', 4, (0, 40, 200, 70), offscreen=True)]),
+        FakeElement('List', rect=(0, 100, 800, 400), children=rows),
+        FakeElement('Document', rect=(0, 5000, 800, 9000),
+                    children=[deep('Pane', 5, (0, 5000, 800, 5030))]),
+    ])
+
+
+def test_subtree_pruning():
+    """Offscreen and clipped subtrees are skipped before visiting their children"""
+    print("\n" + "=" * 60)
+    print("TEST: Viewport pruning")
+    print("=" * 60)
+
+    root = make_scrolled_window()
+    full = TreeWalkEngine(FakeUIAProvider(root), prune=False)
+    pruned_provider = FakeUIAProvider(root)
+    pruned = TreeWalkEngine(pruned_provider)
+
+    all_elements = full.detect(root, max_depth=10)
+    visible = pruned.detect(root, max_depth=10)
+    names = [e.name for e in visible]
+
+    expected = [f'Tool {i}' for i in range(3)]
+    for i in range(10):  # Rows 0-9 lie inside the list viewport (100-400)
+        expected += [f'Row {i}', f'Row {i} action']
+    assert names == expected, f"Unexpected elements: {names}"
+    assert 'Deep' not in names and 'Row 10' not in names
+
+    print(f"   visited {full.stats['visited']} nodes without pruning, "
+          f"{pruned.stats['visited']} with ({pruned.stats['pruned']} subtrees pruned)")
+    assert pruned.stats['visited'] * 5 < full.stats['visited'], "Pruning should skip most of the tree"
+    assert pruned.stats['pruned'] == 1 + 50 + 1, f"Expected menu, 50 rows and document pruned: {pruned.stats}"
+    assert len(all_elements) > len(visible)
+
+    # Streaming and parallel walks prune the same way
+    streamed = [e.name for b in TreeWalkEngine(FakeUIAProvider(root)).iter_batches(root, max_depth=10) for e in b]
+    assert sorted(streamed) == sorted(names)
+    parallel = ParallelTreeWalkEngine(FakeUIAProvider(root), workers=2, split_depth=2)
+    assert [e.name for e in parallel.detect(root, max_depth=10)] == names
+    parallel.close()
+    print(f"   ✅ {len(visible)} visible elements, {len(all_elements) - len(visible)} hidden ones skipped")
+
+
+def test_pruning_round_trips():
+    """Pruning fetches control type, rect and IsOffscreen in one round-trip per node"""
+    root = make_synthetic_tree(breadth=4, depth=4)
+    plain_provider = FakeUIAProvider(root)
+    plain = TreeWalkEngine(plain_provider, prune=False).detect(root)
+    pruned_provider = FakeUIAProvider(root)
+    engine = TreeWalkEngine(pruned_provider)
+    pruned = engine.detect(root)
+
+    print(f"   round-trips: {plain_provider.round_trips} without pruning, {pruned_provider.round_trips} with")
+    assert [e.to_tuple() for e in pruned] == [e.to_tuple() for e in plain]
+    assert pruned_provider.round_trips <= plain_provider.round_trips, "Pruning should not add round-trips"
+    assert pruned_provider.calls['visit_properties'] == engine.stats['visited']
+    assert not any(pruned_provider.calls[m] for m in ('is_offscreen', 'rectangle', 'control_type'))
+
+
+def test_bulk_drops_offscreen():
+    """Bulk engine filters on the cached IsOffscreen flag"""
+    root = make_scrolled_window()
+    engine = BulkQueryEngine(FakeUIAProvider(root))
+    offscreen_menu = [e for e in engine.detect(root) if e.control_type == 'MenuItem']
+    assert offscreen_menu == [], "Offscreen menu items should be dropped"
+    assert engine.stats['pruned'] > 0
+
+
+def test_create_engine():
+    """Backends are selectable by name"""
+    provider = FakeUIAProvider(make_sample_window())
+    assert isinstance(create_engine('tree', provider), TreeWalkEngine)
+    assert isinstance(create_engine('bulk', provider), BulkQueryEngine)
+    parallel = create_engine('parallel', provider, workers=2, split_depth=1)
+    assert isinstance(parallel, ParallelTreeWalkEngine) and parallel.workers == 2
+    try:
+        create_engine('nope', provider)
+        assert False, "Unknown backend should raise"
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    test_bulk_matches_tree_walk()
+    test_bulk_round_trips()
+    test_streaming_batches()
+    test_time_to_first_label()
+    test_parallel_matches_sequential()
+    test_parallel_shared_deadline()
+    test_parallel_speedup_benchmark()
+    test_subtree_pruning()
+    test_pruning_round_trips()
+    test_bulk_drops_offscreen()
+    test_create_engine()
+    print("✅ Detection engine tests passed")
@@ -0,0 +1,143 @@
+"""
+HEMouse Detection Profile Tests
+Per-application depth / timeout / type tuning learned from past runs
+"""
+import sys
+import os
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.detection_engine import TreeWalkEngine, HIGH_PRIORITY_TYPES
+from core.detection_profiles import ProfileStore
+from core.fake_provider import FakeElement, FakeUIAProvider, make_synthetic_tree
+
+
+def make_deep_window(depth):
+    """Window whose only clickables sit `depth` levels down (Explorer-like)"""
+    node = FakeElement('Button', "Deep", (10, 10, 50, 40))
+    for _ in range(depth - 1):
+        node = FakeElement('Pane', children=[node])
+    return FakeElement('Window', children=[FakeElement('Button', "Top", (60, 10, 100, 40)), node])
+
+
+def test_engine_reports_found_depth():
+    engine = TreeWalkEngine(FakeUIAProvider(make_synthetic_tree(breadth=2, depth=3)))
+    engine.detect(engine.provider.root)
+    assert engine.stats['found_depth'] == 3
+    assert engine.stats['cut'] == 0
+
+    engine.detect(engine.provider.root, max_depth=2)
+    assert engine.stats['found_depth'] is None, "Nothing found above the leaves"
+    assert engine.stats['cut'] == 8, "Leaves left unexplored by the depth limit"
+
+
+def test_type_filter_skips_name_fetches():
+    """Types filtered out by a profile cost no name round-trip"""
+    root = FakeElement('Window', children=[
+        FakeElement('ListItem', f"Row {i}", (10, 10 + i * 30, 200, 38 + i * 30)) for i in range(10)
+    ] + [FakeElement('Button', "OK", (300, 10, 360, 40))])
+
+    provider = FakeUIAProvider(root)
+    engine = TreeWalkEngine(provider)
+    assert len(engine.detect(root)) == 11
+    names_all = provider.calls['name']
+
+    provider.calls.clear()
+    filtered = engine.detect(root, control_types=HIGH_PRIORITY_TYPES)
+    assert [e.name for e in filtered] == ["OK"]
+    assert provider.calls['name'] < names_all - 5, "ListItems should not fetch names"
+
+
+def test_depth_adapts_to_application():
+    """Depth grows for deep apps and shrinks for shallow ones"""
+    print("\n" + "=" * 60)
+    print("TEST: Adaptive detection depth")
+    print("=" * 60)
+
+    store = ProfileStore(path='')
+    deep = make_deep_window(10)
+    engine = TreeWalkEngine(FakeUIAProvider(deep))
+
+    history = []
+    for _ in range(4):
+        options = store.tuned('explorer.exe')
+        found = engine.detect(deep, **options)
+        history.append((options['max_depth'], len(found)))
+        store.record('explorer.exe', engine.stats['found_depth'], engine.stats['cut'],
+                     engine.stats['visited'], 0.1, {e.control_type for e in found})
+
+    print(f"   explorer.exe (max_depth, found): {history}")
+    assert history[0] == (6, 1), "First run uses the default depth"
+    assert history[1] == (store.max_depth_cap, 2), "Cut-off tree triggers a probing run"
+    assert history[2:] == [(11, 2), (11, 2)], "Depth settles just below the deepest clickable"
+
+    shallow = make_synthetic_tree(breadth=2, depth=2)
+    engine = TreeWalkEngine(FakeUIAProvider(shallow))
+    engine.detect(shallow)
+    store.record('chrome.exe', engine.stats['found_depth'], engine.stats['cut'], engine.stats['visited'],
+                 0.1, {'Button'})
+    assert store.tuned('chrome.exe')['max_depth'] == 3
+
+
+def test_timeout_and_type_tuning():
+    store = ProfileStore(path='', min_runs=3)
+    for _ in range(3):
+        store.record('slow.exe', 3, 0, 5000, 2.5, {'Button', 'ListItem'})
+    tuned = store.tuned('slow.exe')
+    assert tuned['timeout'] == store.max_timeout, "Slow app gets a longer deadline (capped)"
+    assert 'ListItem' in tuned['control_types'] and 'Edit' not in tuned['control_types']
+    assert set(HIGH_PRIORITY_TYPES) <= set(tuned['control_types'])
+
+    # Filtered types are looked for again on the exploration schedule
+    explored = []
+    for run in range(3, 3 + store.explore_every):
+        tuned = store.tuned('slow.exe')
+        explored.append(tuned['control_types'] is None)
+        found = {'Button', 'ListItem'} | ({'TreeItem'} if tuned['control_types'] is None else set())
+        store.record('slow.exe', 3, 0, 5000, 2.5, found)
+    assert explored.count(True) == 1, "One unfiltered probe per explore_every runs"
+    assert 'TreeItem' in store.tuned('slow.exe')['control_types'], "Type found by the probe is kept"
+
+    store.record('fast.exe', 3, 0, 50, 0.02, {'Button'})
+    assert store.tuned('fast.exe')['timeout'] == store.min_timeout
+    assert store.tuned('fast.exe')['control_types'] is None, "Too few runs for a type filter"
+
+    assert store.expected_elements('fast.exe') is None, "Element count not recorded"
+    store.record('counted.exe', 3, 0, 50, 0.02, {'Button'}, found=300)
+    store.record('counted.exe', 3, 0, 50, 0.02, {'Button'}, found=200)
+    assert store.expected_elements('counted.exe') == 270, "Smoothed element count"
+
+
+def test_persistence_inspect_reset():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'HEMouse', 'profiles.json')
+        store = ProfileStore(path=path)
+        store.record('Explorer.EXE', 6, 12, 800, 0.4, {'ListItem'})
+        store.record('notepad.exe', 2, 0, 40, 0.05, {'MenuItem'})
+
+        reloaded = ProfileStore(path=path)
+        assert len(reloaded) == 2
+        assert reloaded.get('explorer.exe')['depth'] == 6, "Keys are case-insensitive"
+        report = reloaded.inspect()
+        print(report)
+        assert 'explorer.exe' in report and 'notepad.exe' in report
+
+        reloaded.reset('notepad.exe')
+        assert ProfileStore(path=path).get('notepad.exe') is None
+        reloaded.reset()
+        assert len(ProfileStore(path=path)) == 0
+
+        with open(path, 'w') as f:
+            f.write("{not json")
+        assert len(ProfileStore(path=path)) == 0, "Corrupt file is ignored"
+
+
+if __name__ == "__main__":
+    test_engine_reports_found_depth()
+    test_type_filter_skips_name_fetches()
+    test_depth_adapts_to_application()
+    test_timeout_and_type_tuning()
+    test_persistence_inspect_reset()
+    print("✅ Detection profile tests passed")
@@ -0,0 +1,99 @@
+"""
+HEMouse Detection Worker Tests
+Parent/worker protocol with a fake provider that deliberately hangs
+"""
+import sys
+import os
+import time
+from functools import partial
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.detection_engine import TreeWalkEngine
+from core.detection_worker import DetectionWorker, DetectionTimeout
+from core.fake_provider import synthetic_provider, make_synthetic_tree, FakeUIAProvider
+
+HUNG_HWND = 666
+
+
+def make_worker(deadline=1.0):
+    factory = partial(synthetic_provider, breadth=3, depth=3, hang_hwnds=(HUNG_HWND,))
+    return DetectionWorker(factory, "tree", deadline=deadline)
+
+
+def test_worker_detects_like_in_process():
+    """Records from the worker equal those of an in-process engine"""
+    worker = make_worker()
+    try:
+        records = worker.detect(1, max_depth=6)
+        tree = make_synthetic_tree(3, 3)
+        expected = TreeWalkEngine(FakeUIAProvider(tree)).detect(tree, max_depth=6)
+        # Runtime ids differ between processes, geometry and names must not
+        assert [r.to_tuple()[:6] for r in records] == [r.to_tuple()[:6] for r in expected]
+        assert worker.stats['visited'] > 0
+
+        batches = list(worker.iter_batches(1, batch_size=5))
+        assert sum(len(b) for b in batches) == len(records)
+        assert all(len(b) <= 5 for b in batches)
+
+        assert worker.fingerprint(1)[0] == 3
+    finally:
+        worker.stop()
+
+
+def test_hung_provider_killed_and_restarted():
+    """A provider stuck in a call is killed at the deadline, the next request works"""
+    print("\n" + "=" * 60)
+    print("TEST: Hung provider")
+    print("=" * 60)
+
+    worker = make_worker(deadline=0.5)
+    try:
+        worker.start()
+        stuck_pid = worker._process.pid
+
+        start = time.monotonic()
+        try:
+            worker.detect(HUNG_HWND, timeout=0.2)  # Deadline max(0.5, 0.2 + 1.0)
+            assert False, "Hung detection should time out"
+        except DetectionTimeout:
+            pass
+        elapsed = time.monotonic() - start
+
+        assert elapsed < 1.2 + 0.5, f"Parent blocked for {elapsed:.1f}s past the deadline"
+        assert worker.stats['timeouts'] == 1 and worker.stats['restarts'] == 0
+        assert worker._process is None, "Hung worker killed, not respawned inline"
+
+        assert len(worker.detect(1)) == 27, "Next request starts a new worker"
+        assert worker.stats['restarts'] == 1 and worker._process.pid != stuck_pid
+        print(f"   ✅ Timed out after {elapsed:.2f}s, worker restarted by the next request")
+    finally:
+        worker.stop()
+
+
+def test_abandoned_stream_keeps_worker():
+    """Stopping a stream early cancels it; its late replies are skipped, the worker stays"""
+    worker = make_worker()
+    try:
+        worker.start()
+        pid = worker._process.pid
+        for _ in range(3):
+            start = time.monotonic()
+            for _ in worker.iter_batches(1, batch_size=1):
+                break
+            assert time.monotonic() - start < 0.5, "Abandoning must not block"
+        assert worker.stats['abandoned'] == 3 and worker.stats['restarts'] == 0
+
+        assert len(worker.detect(1)) == 27, "Stale batches must not leak into the next job"
+        assert [len(b) for b in worker.iter_batches(1, batch_size=27)] == [27]
+        assert worker._process.pid == pid
+    finally:
+        worker.stop()
+
+
+if __name__ == "__main__":
+    test_worker_detects_like_in_process()
+    test_hung_provider_killed_and_restarted()
+    test_abandoned_stream_keeps_worker()
+    print("✅ Detection worker tests passed")
@@ -0,0 +1,105 @@
+"""
+HEMouse Element Record Tests
+Compact records, lazy wrapper resolution and memory footprint
+"""
+import sys
+import os
+import tracemalloc
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.element_record import ElementRecord
+from core.detection_engine import TreeWalkEngine
+from core.fake_provider import FakeUIAProvider, make_synthetic_tree
+
+
+def test_record_basics():
+    """Rect helpers, interning and tuple round-trip"""
+    record = ElementRecord(10, 20, 110, 50, ''.join(['But', 'ton']), 'OK', [42, 7])
+    assert record.width() == 100 and record.height() == 30
+    assert record.center() == (60, 35)
+    assert record.runtime_id == (42, 7)
+    assert record.control_type is sys.intern('Button'), "Control type should be interned"
+    assert ElementRecord.from_tuple(record.to_tuple()).to_tuple() == record.to_tuple()
+    assert not hasattr(record, '__dict__'), "Record should use __slots__"
+
+
+def test_lazy_resolution():
+    """Records hold no live element; the clicked one is resolved by runtime id"""
+    root = make_synthetic_tree(breadth=3, depth=3)
+    provider = FakeUIAProvider(root)
+    records = TreeWalkEngine(provider).detect(root)
+
+    target = records[5]
+    before = provider.round_trips
+    element = provider.find_by_runtime_id(root, target.runtime_id, target.control_type)
+    assert element is not None and element.name == target.name
+    assert provider.round_trips - before == 1, "Resolution should be a single request"
+    assert provider.find_by_runtime_id(root, (0, 0)) is None
+
+
+class _LegacyWrapper:
+    """Stand-in for the pywinauto wrapper previously held by every record"""
+
+    def __init__(self, element):
+        self.element_info = element
+        self.handle = None
+        self.backend = 'uia'
+        self.ref = None
+
+
+class _LegacyRect:
+    """Stand-in for pywinauto's RECT"""
+
+    def __init__(self, left, top, right, bottom):
+        self.left = left
+        self.top = top
+        self.right = right
+        self.bottom = bottom
+
+
+def _measure(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return items, after - before
+
+
+def test_memory_benchmark():
+    """Benchmark: 5k compact records vs 5k legacy dicts"""
+    print("\n" + "=" * 60)
+    print("BENCHMARK: Element record memory (5000 elements)")
+    print("=" * 60)
+
+    count = 5000
+    names = [f"Button {i}" for i in range(count)]
+    types = ['Button', 'ListItem', 'MenuItem', 'TabItem']
+
+    def build_dicts():
+        return [{
+            'element': _LegacyWrapper(object()),
+            'rect': _LegacyRect(i, i, i + 40, i + 30),
+            'type': ''.join(types[i % 4]),  # Fresh string per element, as returned over COM
+            'name': names[i],
+        } for i in range(count)]
+
+    def build_records():
+        return [ElementRecord(i, i, i + 40, i + 30, ''.join(types[i % 4]), names[i], (42, i))
+                for i in range(count)]
+
+    _, dict_bytes = _measure(build_dicts)
+    _, record_bytes = _measure(build_records)
+
+    print(f"   dicts:   {dict_bytes / 1024:.0f} KB ({dict_bytes / count:.0f} B/element)")
+    print(f"   records: {record_bytes / 1024:.0f} KB ({record_bytes / count:.0f} B/element)")
+    assert record_bytes < dict_bytes / 2, "Records should use less than half the memory"
+
+
+if __name__ == "__main__":
+    test_record_basics()
+    test_lazy_resolution()
+    test_memory_benchmark()
+    print("✅ Element record tests passed")
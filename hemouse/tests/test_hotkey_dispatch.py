@@ -0,0 +1,150 @@
+"""
+HEMouse Hotkey Dispatch Tests
+Capture keeps running while a callback blocks: interrupts, coalescing, bounded queue
+"""
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.hotkey_manager import HotkeyManager, QueueKeySource
+
+
+def wait_until(predicate, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.002)
+    return True
+
+
+class BlockingActivation:
+    """capslock_on callback that blocks like Hint mode's Tk loop until released"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = []
+
+    def on(self):
+        self.calls.append('on')
+        self.started.set()
+        self.release.wait(2.0)
+
+    def off(self):
+        self.calls.append('off')
+
+
+def start(max_queue=8):
+    source = QueueKeySource()
+    manager = HotkeyManager(source=source, max_queue=max_queue)
+    activation = BlockingActivation()
+    manager.register_hotkey('capslock_on', activation.on)
+    manager.register_hotkey('capslock_off', activation.off)
+    manager.start_monitoring()
+    return source, manager, activation
+
+
+def test_off_interrupts_blocked_activation():
+    source, manager, activation = start()
+    # Interrupt ends the activation, as main.py does through HintMode's cancel_event
+    manager.register_interrupt('capslock_off', activation.release.set)
+
+    source.push('capslock_on')
+    assert activation.started.wait(1.0)
+    source.push('capslock_off')
+    assert activation.release.wait(1.0), "OFF seen while the ON callback blocks"
+
+    assert wait_until(lambda: manager.metrics['coalesced'] == 1)
+    assert activation.calls == ['on'], "OFF handled by the interrupt, not dispatched again"
+
+    # Next press activates again
+    activation.started.clear()
+    activation.release.clear()
+    source.push('capslock_on')
+    assert activation.started.wait(1.0)
+    activation.release.set()
+    manager.stop_monitoring()
+    assert activation.calls == ['on', 'on']
+    assert manager.metrics['interrupted'] == 1
+
+
+def test_rapid_toggles_coalesced():
+    source, manager, activation = start()
+    source.push('capslock_on')
+    assert activation.started.wait(1.0)
+
+    # Tapped twice during the activation: net state unchanged
+    for name in ('capslock_off', 'capslock_on', 'capslock_off', 'capslock_on'):
+        source.push(name)
+    assert wait_until(lambda: manager.queue_depth == 4)
+    activation.release.set()
+    assert wait_until(lambda: manager.metrics['coalesced'] == 4)
+
+    source.push('capslock_off')
+    assert wait_until(lambda: activation.calls == ['on', 'off'])
+    manager.stop_monitoring()
+    assert manager.metrics['dispatched'] == 2
+
+
+def test_queue_is_bounded():
+    source, manager, activation = start(max_queue=2)
+    presses = []
+    manager.register_hotkey('other', lambda: presses.append(1))
+
+    source.push('capslock_on')
+    assert activation.started.wait(1.0)
+    for _ in range(5):
+        source.push('other')
+    assert wait_until(lambda: manager.metrics['dropped'] == 3)
+    assert manager.queue_depth == 2 and manager.metrics['max_queue_depth'] == 2
+
+    activation.release.set()
+    assert wait_until(lambda: len(presses) == 2), "Non-toggle events are not coalesced"
+    manager.stop_monitoring()
+
+
+def test_dispatch_lag_benchmark():
+    """Benchmark: dispatch lag and queue depth with a callback blocking for 50ms"""
+    print("\n" + "=" * 60)
+    print("BENCHMARK: Hotkey dispatch while a callback blocks")
+    print("=" * 60)
+
+    source = QueueKeySource()
+    manager = HotkeyManager(source=source)
+    seen = []
+    manager.register_hotkey('capslock_on', lambda: time.sleep(0.05))
+    manager.register_hotkey('capslock_off', lambda: None)
+    manager.register_interrupt('capslock_off', lambda: seen.append(time.perf_counter()))
+    manager.start_monitoring()
+
+    lags = []
+    for _ in range(10):
+        source.push('capslock_on')
+        time.sleep(0.005)
+        pressed = time.perf_counter()
+        source.push('capslock_off', pressed)
+        assert wait_until(lambda: len(seen) == len(lags) + 1)
+        lags.append(seen[-1] - pressed)
+        time.sleep(0.06)
+    stats = manager.latency_stats()
+    manager.stop_monitoring()
+
+    print(f"   OFF seen during a blocked ON callback: mean {sum(lags) / len(lags) * 1000:.2f}ms "
+          f"(inline dispatch: after the 50ms callback)")
+    print(f"   dispatch lag: mean {stats['mean_ms']:.2f}ms, max {stats['max_ms']:.2f}ms, "
+          f"max queue depth {stats['max_queue_depth']}, coalesced {stats['coalesced']}")
+    assert max(lags) < 0.02
+    assert stats['queue_depth'] == 0
+
+
+if __name__ == "__main__":
+    test_off_interrupts_blocked_activation()
+    test_rapid_toggles_coalesced()
+    test_queue_is_bounded()
+    test_dispatch_lag_benchmark()
+    print("✅ Hotkey dispatch tests passed")
@@ -0,0 +1,149 @@
+"""
+HEMouse Hotkey Source Tests
+Event-driven vs polled CapsLock detection with synthetic key sources (no Windows needed)
+"""
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.hotkey_manager import HotkeyManager, PollingKeySource, QueueKeySource
+
+
+class CapsLock:
+    """Synthetic CapsLock toggle state for PollingKeySource"""
+
+    def __init__(self):
+        self.state = 0
+        self.reads = 0
+
+    def __call__(self):
+        self.reads += 1
+        return self.state
+
+
+def start(source, on_start=None):
+    """Manager recording callback times and threads"""
+    manager = HotkeyManager(source=source)
+    calls = []
+    fired = threading.Event()
+
+    def callback(name):
+        def run():
+            calls.append((name, time.perf_counter(), threading.get_ident()))
+            fired.set()
+        return run
+
+    manager.register_hotkey('capslock_on', callback('on'))
+    manager.register_hotkey('capslock_off', callback('off'))
+    manager.start_monitoring(on_start=on_start)
+    return manager, calls, fired
+
+
+def test_synthetic_events_reach_callbacks():
+    source = QueueKeySource()
+    setup = []
+    manager, calls, fired = start(source, on_start=lambda: setup.append(threading.get_ident()))
+
+    for name in ('capslock_on', 'capslock_off', 'capslock_on'):
+        fired.clear()
+        source.push(name)
+        assert fired.wait(1.0)
+
+    manager.stop_monitoring()
+    assert [name for name, _, _ in calls] == ['on', 'off', 'on']
+    # Callbacks run on the monitoring thread, after on_start
+    assert {thread for _, _, thread in calls} == set(setup)
+    stats = manager.latency_stats()
+    assert stats['count'] == 3 and 0 <= stats['mean_ms'] <= stats['max_ms']
+    assert not manager.thread.is_alive()
+
+
+def test_polling_source():
+    caps = CapsLock()
+    source = PollingKeySource(get_state=caps, interval=0.002)
+    assert source.wait_for_event(timeout=0.01) is None
+
+    caps.state = 1
+    assert source.wait_for_event(timeout=0.1).name == 'capslock_on'
+    caps.state = 0
+    assert source.wait_for_event(timeout=0.1).name == 'capslock_off'
+
+    source.close()
+    start_time = time.perf_counter()
+    assert source.wait_for_event() is None
+    assert time.perf_counter() - start_time < 0.1
+
+
+def test_idle_wakeups():
+    """Idle: the event-driven source never wakes up, the poller wakes every interval"""
+    caps = CapsLock()
+    polling, _, _ = start(PollingKeySource(get_state=caps, interval=0.015))
+
+    waits = []
+    queued = QueueKeySource()
+    wait = queued.wait_for_event
+    queued.wait_for_event = lambda timeout=None: (waits.append(1), wait(timeout))[1]
+    event_driven, _, _ = start(queued)
+
+    time.sleep(0.3)
+    polling.stop_monitoring()
+    event_driven.stop_monitoring()
+
+    print(f"\n   idle 300ms: poller read the key state {caps.reads}x, event source waited {len(waits)}x")
+    assert caps.reads >= 10
+    assert len(waits) <= 2  # Initial wait, plus the one woken by stop_monitoring
+
+
+def test_latency_benchmark():
+    """Benchmark: press-to-callback latency, 15ms polling vs event-driven"""
+    print("\n" + "=" * 60)
+    print("BENCHMARK: CapsLock press-to-callback latency (20 presses)")
+    print("=" * 60)
+
+    presses = 20
+    results = {}
+
+    caps = CapsLock()
+    manager, calls, fired = start(PollingKeySource(get_state=caps, interval=0.015))
+    latencies = []
+    for i in range(presses):
+        time.sleep(0.003 * (i % 5))  # Presses fall anywhere within the poll interval
+        fired.clear()
+        pressed = time.perf_counter()
+        caps.state ^= 1
+        assert fired.wait(1.0)
+        latencies.append(calls[-1][1] - pressed)
+    manager.stop_monitoring()
+    results['polling (15ms)'] = latencies
+
+    source = QueueKeySource()
+    manager, calls, fired = start(source)
+    latencies = []
+    for i in range(presses):
+        time.sleep(0.003 * (i % 5))
+        fired.clear()
+        pressed = time.perf_counter()
+        source.push('capslock_on' if i % 2 == 0 else 'capslock_off', pressed)
+        assert fired.wait(1.0)
+        latencies.append(calls[-1][1] - pressed)
+    manager.stop_monitoring()
+    results['event-driven'] = latencies
+
+    for name, values in results.items():
+        print(f"   {name:15s} mean {sum(values) / len(values) * 1000:.2f}ms, max {max(values) * 1000:.2f}ms")
+    polling_mean = sum(results['polling (15ms)']) / presses
+    event_mean = sum(results['event-driven']) / presses
+    assert event_mean < polling_mean
+    assert event_mean < 0.005
+
+
+if __name__ == "__main__":
+    test_synthetic_events_reach_callbacks()
+    test_polling_source()
+    test_idle_wakeups()
+    test_latency_benchmark()
+    print("✅ Hotkey source tests passed")
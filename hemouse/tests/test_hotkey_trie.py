@@ -0,0 +1,221 @@
+"""
+HEMouse Hotkey Trie Tests
+Chord/sequence registration and matching on synthetic key streams
+"""
+import sys
+import os
+import itertools
+import random
+import threading
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.hotkey_manager import HotkeyManager, QueueKeySource
+from core.hotkey_trie import HotkeyMatcher, HotkeyTrie, key_name, parse_sequence
+
+
+class Keyboard:
+    """Synthetic key stream with a clock"""
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.now = 0.0
+        self.events = []
+        self.swallowed = []
+        self.reinjected = 0
+
+    def _feed(self, key, down):
+        result = self.matcher.feed(key, down, self.now)
+        self.events.extend(result.events)
+        if result.swallow:
+            self.swallowed.append((key, down))
+        self.reinjected += result.reinject_caps
+
+    def down(self, *keys):
+        for key in keys:
+            self._feed(key, True)
+
+    def up(self, *keys):
+        for key in keys:
+            self._feed(key, False)
+
+    def tap(self, *keys):
+        """Press keys in order, release in reverse (a chord)"""
+        self.down(*keys)
+        self.up(*reversed(keys))
+
+    def wait(self, seconds):
+        self.now += seconds
+
+
+def test_parse_sequence():
+    assert parse_sequence('Caps+F') == ((frozenset({'caps'}), 'f'),)
+    assert parse_sequence('ctrl+alt+g 1') == ((frozenset({'ctrl', 'alt'}), 'g'), (frozenset(), '1'))
+    for bad in ('caps+nope', 'ctrl+shift', 'ctrl+a+b', 'f', 'g caps+g', ''):
+        try:
+            parse_sequence(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad!r} accepted")
+    assert key_name(0x41) == 'a' and key_name(0xA2) == 'ctrl' and key_name(0x14) == 'caps' and key_name(0xFF) is None
+
+
+def test_prefix_conflicts_rejected():
+    trie = HotkeyTrie()
+    trie.add('ctrl+alt+g 1', 'grid1')
+    trie.add('ctrl+alt+g 2', 'grid2')
+    for sequence, name in (('ctrl+alt+g', 'grid'), ('ctrl+alt+g 1 2', 'deep'), ('caps+x', 'grid1')):
+        try:
+            trie.add(sequence, name)
+        except ValueError:
+            continue
+        raise AssertionError(f"{sequence!r} accepted")
+    assert len(trie) == 2 and trie.modifiers == {'ctrl', 'alt'}
+
+
+def test_caps_chords_are_dual_role():
+    trie = HotkeyTrie()
+    trie.add('caps+f', 'fast')
+    trie.add('caps+g', 'grid')
+    keys = Keyboard(HotkeyMatcher(trie))
+
+    # Caps held as a modifier: chord fires, CapsLock does not toggle, keys never reach applications
+    keys.tap('caps', 'f')
+    assert keys.events == ['fast'] and keys.reinjected == 0
+    assert ('caps', True) in keys.swallowed and ('f', True) in keys.swallowed and ('f', False) in keys.swallowed
+
+    # Caps tapped alone: toggles on release and is replayed to the system
+    keys.tap('caps')
+    keys.tap('caps')
+    assert keys.events == ['fast', 'capslock_on', 'capslock_off'] and keys.reinjected == 2
+
+    # Held caps with auto-repeat, then grid
+    keys.down('caps', 'caps', 'caps', 'g', 'g')
+    keys.up('g', 'caps')
+    assert keys.events[-1] == 'grid' and keys.events.count('grid') == 1
+
+    # Unbound keys pass through, caps+x does not toggle CapsLock either
+    before = len(keys.swallowed)
+    keys.tap('caps', 'x')
+    keys.tap('a')
+    assert keys.swallowed[before:] == [('caps', True), ('caps', False)]
+    assert keys.events[-1] == 'grid' and keys.reinjected == 2
+
+
+def test_caps_toggles_on_press_without_caps_chords():
+    trie = HotkeyTrie()
+    trie.add('ctrl+alt+g', 'grid')
+    keys = Keyboard(HotkeyMatcher(trie, caps_on=1))
+    keys.down('caps')
+    assert keys.events == ['capslock_off'] and not keys.swallowed
+    keys.down('caps')  # Auto-repeat
+    keys.up('caps')
+    assert keys.events == ['capslock_off']
+
+    keys.tap('ctrl', 'alt', 'g')
+    assert keys.events == ['capslock_off', 'grid']
+    assert keys.swallowed == [('g', True), ('g', False)], "Only the chord's key is swallowed"
+
+
+def test_sequence_timeout_and_restart():
+    trie = HotkeyTrie(timeout=1.0)
+    trie.add('ctrl+alt+g 1', 'grid1')
+    trie.add('ctrl+alt+g 2', 'grid2')
+    trie.add('ctrl+alt+h', 'help')
+    keys = Keyboard(HotkeyMatcher(trie))
+
+    keys.tap('ctrl', 'alt', 'g')
+    keys.wait(0.5)
+    keys.tap('2')
+    assert keys.events == ['grid2']
+
+    # Too slow: '1' is typed normally
+    keys.tap('ctrl', 'alt', 'g')
+    keys.wait(1.5)
+    keys.tap('1')
+    assert keys.events == ['grid2'] and ('1', True) not in keys.swallowed
+
+    # Wrong continuation abandons the sequence; a new chord starts over
+    keys.tap('ctrl', 'alt', 'g')
+    keys.tap('x')
+    keys.tap('ctrl', 'alt', 'h')
+    assert keys.events == ['grid2', 'help'] and ('x', True) not in keys.swallowed
+
+
+def test_manager_dispatches_registered_chords():
+    source = QueueKeySource()
+    manager = HotkeyManager(source=source)
+    fired = threading.Event()
+    calls = []
+
+    def on(name):
+        def run():
+            calls.append(name)
+            fired.set()
+        return run
+
+    manager.register_hotkey('capslock_on', on('capslock_on'))
+    manager.register_hotkey('fast', on('fast'), keys='caps+f')
+    manager.register_hotkey('grid', on('grid'), keys='caps+g')
+    try:
+        manager.register_hotkey('other', on('other'), keys='caps+f')
+        raise AssertionError("Conflicting binding accepted")
+    except ValueError:
+        pass
+    manager.start_monitoring()
+
+    for key, down in (('caps', True), ('g', True), ('g', False), ('caps', False)):
+        assert source.feed_key(key, down).swallow
+    assert fired.wait(1.0)
+    fired.clear()
+    source.feed_key('caps', True)
+    source.feed_key('caps', False)
+    assert fired.wait(1.0)
+    manager.stop_monitoring()
+    assert calls == ['grid', 'capslock_on']
+
+
+def test_matching_benchmark():
+    """Benchmark: per-key matching cost with 10 vs 1000 registered sequences"""
+    print("\n" + "=" * 60)
+    print("BENCHMARK: Hotkey trie matching (10 vs 1000 sequences)")
+    print("=" * 60)
+
+    rng = random.Random(23)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    sequences = [f"ctrl+{a} {b} {c}" for a, b, c in itertools.product(letters, letters, '0123456789')]
+    stream = []
+    for _ in range(5000):
+        a, b, c = rng.choice(letters), rng.choice(letters), rng.choice('0123456789')
+        stream.extend([('ctrl', True), (a, True), (a, False), ('ctrl', False)])
+        stream.extend([(b, True), (b, False)] if rng.random() < 0.8 else [(c, True), (c, False)])
+        stream.extend([(c, True), (c, False)])
+
+    timings = {}
+    for count in (10, 1000):
+        trie = HotkeyTrie()
+        for index, sequence in enumerate(sequences[:count]):
+            trie.add(sequence, f"hotkey{index}")
+        matcher = HotkeyMatcher(trie)
+        start = time.perf_counter()
+        for now, (key, down) in enumerate(stream):
+            matcher.feed(key, down, now * 0.001)
+        timings[count] = (time.perf_counter() - start) / len(stream)
+
+    for count, per_key in timings.items():
+        print(f"   {count:5d} bindings: {per_key * 1e6:.2f}us per key event ({len(stream)} events)")
+    assert timings[1000] < timings[10] * 3, "Matching cost must not grow with bindings"
+    assert timings[1000] < 50e-6
+
+
+if __name__ == "__main__":
+    test_parse_sequence()
+    test_prefix_conflicts_rejected()
+    test_caps_chords_are_dual_role()
+    test_caps_toggles_on_press_without_caps_chords()
+    test_sequence_timeout_and_restart()
+    test_manager_dispatches_registered_chords()
+    test_matching_benchmark()
+    print("✅ Hotkey trie tests passed")
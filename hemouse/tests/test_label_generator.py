@@ -0,0 +1,129 @@
+"""
+HEMouse Label Generator Tests
+Property tests for the optimal prefix-free label tables
+"""
+import sys
+import os
+import heapq
+import random
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.label_generator import LabelGenerator, build_labels
+
+
+def optimal_total_length(count, k):
+    """Minimal total codeword length for count equally likely symbols (k-ary Huffman)"""
+    if count <= 1:
+        return count
+    dummies = (-(count - 1)) % (k - 1)  # Pad so every merge takes k nodes
+    heap = [(1, 0)] * count + [(0, 0)] * dummies  # (weight, weighted depth sum)
+    heapq.heapify(heap)
+    while len(heap) > 1:
+        merged = [heapq.heappop(heap) for _ in range(k)]
+        weight = sum(w for w, _ in merged)
+        heapq.heappush(heap, (weight, sum(cost for _, cost in merged) + weight))
+    return heap[0][1]
+
+
+def check_table(charset, count):
+    labels = build_labels(charset, count)
+    gen = LabelGenerator(charset)
+    assert len(labels) == count, f"{charset}/{count}: got {len(labels)} labels"
+    assert len(set(labels)) == count, f"{charset}/{count}: duplicates"
+    assert gen.verify_no_prefix_conflicts(labels), f"{charset}/{count}: prefix conflict"
+    assert all(set(label) <= set(charset) for label in labels)
+    lengths = [len(label) for label in labels]
+    assert max(lengths) - min(lengths) <= 1, f"{charset}/{count}: uneven lengths"
+    assert lengths == sorted(lengths), "Shortest labels come first"
+    assert sum(lengths) == optimal_total_length(count, len(charset)), \
+        f"{charset}/{count}: total length {sum(lengths)} not optimal"
+
+
+def test_optimal_for_all_small_counts():
+    """Every count up to 800 on the default charset"""
+    for count in range(1, 801):
+        check_table("asdfghjkl", count)
+
+
+def test_optimal_for_random_charsets():
+    """Random charset sizes and counts"""
+    rng = random.Random(11)
+    alphabet = "asdfghjklqwertyuiopzxcvbnm"
+    for _ in range(200):
+        charset = ''.join(rng.sample(alphabet, rng.randint(2, len(alphabet))))
+        check_table(charset, rng.randint(1, 3000))
+
+
+def test_generator_interface():
+    gen = LabelGenerator()
+    assert gen.generate_labels(0) == []
+    assert gen.generate_labels(9) == list("asdfghjkl")
+    assert gen.generate_labels(10)[:8] == list("asdfghjk"), "Unsplit keys stay single letters"
+
+    # Memoized table must not leak caller mutations
+    labels = gen.generate_labels(30)
+    labels.append("zzz")
+    assert len(gen.generate_labels(30)) == 30
+
+    assert not gen.verify_no_prefix_conflicts(['as', 'a'])
+    assert not gen.verify_no_prefix_conflicts(['ab', 'ab'])
+    try:
+        build_labels("a", 3)
+        assert False, "Single-character charset cannot be prefix-free"
+    except ValueError:
+        pass
+
+
+def test_streamed_labels_sized_for_expected_count():
+    """iter_labels with an expected count: short labels for it, still prefix-free past it"""
+    gen = LabelGenerator()
+    for expected in (5, 60, 300, 2000):
+        stream = gen.iter_labels(expected)
+        labels = [next(stream) for _ in range(expected * 2)]
+        assert len(set(labels)) == len(labels) and gen.verify_no_prefix_conflicts(labels)
+        longest = max(len(label) for label in labels[:expected])
+        assert longest <= len(gen.generate_labels(expected)[-1]) + 1, f"{expected}: length {longest}"
+
+    stream = gen.iter_labels(300)
+    sized = max(len(next(stream)) for _ in range(300))
+    stream = gen.iter_labels()
+    fixed = max(len(next(stream)) for _ in range(300))
+    assert (sized, fixed) == (3, 5), "A fixed third of the charset reserved wastes two characters"
+
+
+def test_label_benchmark():
+    """Benchmark: table construction and verification up to 10k labels"""
+    print("\n" + "=" * 60)
+    print("BENCHMARK: Label generation")
+    print("=" * 60)
+
+    gen = LabelGenerator()
+    for count in (100, 1000, 10000):
+        build_labels.cache_clear()
+        start = time.perf_counter()
+        labels = gen.generate_labels(count)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        gen.generate_labels(count)
+        warm = time.perf_counter() - start
+
+        start = time.perf_counter()
+        assert gen.verify_no_prefix_conflicts(labels)
+        verify = time.perf_counter() - start
+
+        print(f"   {count:>5} labels: build {cold * 1000:.2f}ms, memoized {warm * 1000:.3f}ms, "
+              f"verify {verify * 1000:.2f}ms, max length {max(len(label) for label in labels)}")
+        assert cold < 0.5, "Build should be linear"
+
+
+if __name__ == "__main__":
+    test_optimal_for_all_small_counts()
+    test_optimal_for_random_charsets()
+    test_generator_interface()
+    test_streamed_labels_sized_for_expected_count()
+    test_label_benchmark()
+    print("✅ Label generator tests passed")
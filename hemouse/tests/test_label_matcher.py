@@ -0,0 +1,130 @@
+"""
+HEMouse Label Matcher Tests
+Incremental trie matching, backspace and highlight deltas
+"""
+import sys
+import os
+import random
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.label_generator import LabelGenerator, build_labels
+from core.label_matcher import LabelMatcher
+
+
+def expected_highlight(labels, typed):
+    if not typed:
+        return set()
+    return {i for i, label in enumerate(labels) if label.startswith(typed)}
+
+
+def apply(highlighted, delta):
+    assert not (set(delta.added) & highlighted), "Added label was already highlighted"
+    assert set(delta.removed) <= highlighted, "Removed label was not highlighted"
+    highlighted |= set(delta.added)
+    highlighted -= set(delta.removed)
+
+
+def test_deltas_match_brute_force():
+    """Random typing with backspace: deltas keep the highlight set exact"""
+    rng = random.Random(3)
+    charset = "asdfghjkl"
+    for count in (5, 9, 10, 80, 300, 2000):
+        labels = list(build_labels(charset, count))
+        matcher = LabelMatcher(labels)
+        highlighted = set()
+        typed = ""
+        for _ in range(300):
+            if typed and rng.random() < 0.35:
+                delta = matcher.pop()
+                typed = typed[:-1]
+            elif len(typed) < 6:
+                key = rng.choice(charset + "z")  # 'z' is never in a label
+                delta = matcher.push(key)
+                typed += key
+            else:
+                delta = matcher.reset()
+                typed = ""
+            apply(highlighted, delta)
+            assert matcher.input == typed
+            assert highlighted == expected_highlight(labels, typed), f"{count} labels, input {typed!r}"
+            assert matcher.count == len([label for label in labels if label.startswith(typed)])
+
+
+def test_streaming_add():
+    """Labels arriving after typed-ahead input light up and become matchable"""
+    gen = LabelGenerator()
+    stream = gen.iter_labels()
+    matcher = LabelMatcher([next(stream) for _ in range(6)])
+
+    typed = "kd"  # Not generated yet
+    highlighted = set()
+    for key in typed:
+        apply(highlighted, matcher.push(key))
+    assert matcher.count == 0
+
+    for _ in range(10):
+        batch = [next(stream) for _ in range(20)]
+        apply(highlighted, matcher.add(batch))
+        assert highlighted == expected_highlight(matcher.labels, typed)
+    assert matcher.count == 1 and matcher.labels[matcher.matches()[0]] == "kd"
+
+    apply(highlighted, matcher.pop())
+    assert highlighted == expected_highlight(matcher.labels, "k")
+
+
+def test_keystroke_benchmark():
+    """Benchmark: keystroke to canvas update at 2k labels"""
+    print("\n" + "=" * 60)
+    print("BENCHMARK: Keystroke matching (2000 labels)")
+    print("=" * 60)
+
+    gen = LabelGenerator()
+    labels = gen.generate_labels(2000)
+    keys = labels[1234]
+
+    class RecordingCanvas:
+        """Stand-in for the Tk canvas: counts item updates"""
+
+        def __init__(self):
+            self.updates = 0
+
+        def itemconfig(self, item, **options):
+            self.updates += 1
+
+    # Before: startswith scan + itemconfig for every label on every key
+    canvas = RecordingCanvas()
+    start = time.perf_counter()
+    for i in range(1, len(keys) + 1):
+        matching = set(labels[j] for j in gen.match_label(keys[:i], labels))
+        for label in labels:
+            canvas.itemconfig(label, fill='green' if label in matching else 'yellow')
+    full_time = (time.perf_counter() - start) / len(keys)
+    full_updates = canvas.updates
+
+    # After: trie step + changed items only
+    canvas = RecordingCanvas()
+    matcher = LabelMatcher(labels)
+    start = time.perf_counter()
+    for key in keys:
+        delta = matcher.push(key)
+        for index in delta.added:
+            canvas.itemconfig(index, fill='green')
+        for index in delta.removed:
+            canvas.itemconfig(index, fill='yellow')
+    delta_time = (time.perf_counter() - start) / len(keys)
+
+    print(f"   full repaint: {full_time * 1000:.3f}ms/key, {full_updates} item updates")
+    print(f"   delta:        {delta_time * 1000:.3f}ms/key, {canvas.updates} item updates")
+    assert matcher.count == 1
+    assert canvas.updates < full_updates / 2, "Only changed items should be updated"
+    assert delta_time < 0.005, "Keystroke handling should stay far below a frame"
+
+
+if __name__ == "__main__":
+    test_deltas_match_brute_force()
+    test_streaming_add()
+    test_keystroke_benchmark()
+    print("✅ Label matcher tests passed")
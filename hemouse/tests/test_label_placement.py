@@ -0,0 +1,114 @@
+"""
+HEMouse Label Placement Tests
+Collision-avoiding label positions, monitor clamping and overlap metrics
+"""
+import sys
+import os
+import random
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.element_record import ElementRecord
+from ui.label_placement import LabelPlacer, count_overlaps
+
+
+LABEL = (35, 26)
+
+
+def fixed_left(elem):
+    """Label left of the element, no collision avoidance"""
+    return elem.left - LABEL[0] - 5, elem.top
+
+
+def label_rects(positions):
+    return [(x, y, x + LABEL[0], y + LABEL[1]) for x, y in positions]
+
+
+def toolbar(count, left=100, top=200, size=24, spacing=2):
+    return [ElementRecord(left + i * (size + spacing), top, left + i * (size + spacing) + size, top + size,
+                          'Button', '') for i in range(count)]
+
+
+def test_toolbar_labels_do_not_overlap():
+    # Two stacked toolbars of small icons: fixed left placement overlaps everywhere
+    elements = toolbar(20) + toolbar(20, top=260)
+    naive = label_rects(fixed_left(e) for e in elements)
+    placer = LabelPlacer(LABEL)
+    placed = label_rects(placer.place(elements))
+
+    assert count_overlaps(naive) > 30
+    assert count_overlaps(placed) < count_overlaps(naive) / 4
+    assert placer.stats['placed'] == 40 and placer.stats['moved'] > 0
+
+
+def test_isolated_label_stays_left():
+    placer = LabelPlacer(LABEL)
+    button = ElementRecord(300, 300, 380, 330, 'Button', 'OK')
+    assert placer.place([button]) == [(300 - 35 - 5, 300)]
+    assert placer.place([button], offset=(-1920, 0)) != [(260, 300)], "Offset converts to canvas coordinates"
+
+
+def test_clamped_to_monitor():
+    monitors = [(0, 0, 1920, 1080), (1920, 0, 3840, 1080)]
+    placer = LabelPlacer(LABEL, monitors=monitors)
+    # Left edge of the second monitor: the label must not spill onto the first one
+    edge = ElementRecord(1922, 500, 1990, 530, 'Button', 'Back')
+    # Bottom-right corner of the first monitor
+    corner = ElementRecord(1890, 1070, 1919, 1079, 'Button', 'Clock')
+    (x1, y1), (x2, y2) = placer.place([edge, corner])
+
+    assert x1 >= 1920
+    assert x2 + LABEL[0] <= 1920 and y2 + LABEL[1] <= 1080 and x2 >= 0
+
+
+def test_batches_avoid_earlier_labels():
+    placer = LabelPlacer(LABEL)
+    first = placer.place(toolbar(10))
+    second = placer.place(toolbar(10, top=230))
+    assert count_overlaps(label_rects(first + second)) <= placer.stats['label_collisions']
+
+    placer.reset()
+    assert placer.stats['placed'] == 0
+    assert placer.place(toolbar(1)) == [(100 - 40, 200)]
+
+
+def test_placement_benchmark():
+    """Benchmark: place 3000 labels, overlaps before and after"""
+    print("\n" + "=" * 60)
+    print("BENCHMARK: Label placement (3000 elements)")
+    print("=" * 60)
+
+    rng = random.Random(4)
+    elements = []
+    # Dense toolbars and ribbons
+    for row in range(40):
+        elements.extend(toolbar(40, left=rng.randrange(0, 800), top=row * 52 + 10, size=rng.choice([24, 32]),
+                                spacing=4))
+    # Scattered controls
+    for _ in range(3000 - len(elements)):
+        x, y = rng.randrange(0, 3700), rng.randrange(0, 2100)
+        elements.append(ElementRecord(x, y, x + rng.randrange(20, 160), y + rng.randrange(16, 40), 'Button', ''))
+
+    naive = label_rects(fixed_left(e) for e in elements)
+    placer = LabelPlacer(LABEL, monitors=[(0, 0, 3840, 2160)])
+    start = time.perf_counter()
+    placed = label_rects(placer.place(elements))
+    place_time = time.perf_counter() - start
+
+    before, after = count_overlaps(naive), count_overlaps(placed)
+    print(f"   fixed left:  {before} overlapping label pairs")
+    print(f"   placed:      {after} overlapping label pairs ({placer.stats['moved']} labels moved)")
+    print(f"   placement:   {place_time * 1000:.1f}ms")
+    assert after < before * 0.6
+    assert place_time < 0.5
+
+
+if __name__ == "__main__":
+    test_toolbar_labels_do_not_overlap()
+    test_isolated_label_stays_left()
+    test_clamped_to_monitor()
+    test_batches_avoid_earlier_labels()
+    test_placement_benchmark()
+    print("✅ Label placement tests passed")
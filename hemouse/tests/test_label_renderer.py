@@ -0,0 +1,181 @@
+"""
+HEMouse Label Renderer Tests
+Glyph atlas and single-buffer compositing, checked against golden images (headless)
+
+Set HEMOUSE_UPDATE_GOLDEN=1 to rewrite the golden images after an intended change.
+"""
+import sys
+import os
+import random
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from PIL import Image, ImageChops
+
+from core.element_record import ElementRecord
+from core.label_generator import LabelGenerator
+from ui.label_renderer import COLOR_KEY, GlyphAtlas, LabelCompositor, upload_plan
+
+
+GOLDEN_DIR = os.path.join(os.path.dirname(__file__), 'golden')
+
+
+def left_of(elem):
+    """Label position left of the element (LabelPlacer's first candidate)"""
+    return elem.left - 40, elem.top
+
+
+def atlas():
+    # Pillow's bundled font: same glyphs on every platform
+    return GlyphAtlas.get(14, 1.0, font_path=None)
+
+
+def scene():
+    """A few labels, two of them overlapping"""
+    elements = [ElementRecord(60 + col * 70, 10 + row * 40, 110 + col * 70, 35 + row * 40, 'Button', '')
+                for row in range(3) for col in range(4)]
+    elements.append(ElementRecord(75, 20, 120, 40, 'Button', 'Overlapping'))
+    labels = LabelGenerator().generate_labels(len(elements))
+    positions = [left_of(e) for e in elements]
+    return positions, labels
+
+
+def assert_matches_golden(image, name):
+    path = os.path.join(GOLDEN_DIR, name)
+    if os.environ.get('HEMOUSE_UPDATE_GOLDEN'):
+        os.makedirs(GOLDEN_DIR, exist_ok=True)
+        image.save(path)
+    golden = Image.open(path).convert('RGB')
+    assert golden.size == image.size, f"{name}: size {image.size} != {golden.size}"
+
+    # Tolerate anti-aliasing differences between FreeType builds
+    diff = ImageChops.difference(image, golden).convert('L').point(lambda v: 255 if v > 48 else 0)
+    differing = diff.histogram()[255]
+    assert differing <= image.size[0] * image.size[1] * 0.005, f"{name}: {differing} pixels differ"
+
+
+def paint(positions, labels, highlighted, size):
+    """Reference: paint every sprite in order onto a fresh buffer"""
+    reference = Image.new('RGB', size, (0, 0, 0))
+    for (x, y), label, state in zip(positions, labels, highlighted):
+        reference.paste(atlas().sprite(label, state), (x, y))
+    return reference
+
+
+def test_atlas_caches_sprites():
+    assert GlyphAtlas.get(14, 1.0, font_path=None) is atlas()
+    sprite = atlas().sprite('as')
+    assert atlas().sprite('as') is sprite, "Sprite built once"
+    assert atlas().sprite('as', highlighted=True) is not sprite
+    assert sprite.size == (35, 26) and sprite.getpixel((10, 2)) == (255, 255, 0)
+
+    hidpi = GlyphAtlas.get(14, 1.5, font_path=None)
+    assert hidpi.size == (52, 39) and hidpi.sprite('as').size == (52, 39)
+
+
+def test_golden_images():
+    positions, labels = scene()
+    compositor = LabelCompositor((360, 130), atlas())
+    compositor.compose(positions, labels)
+    assert_matches_golden(compositor.buffer, 'labels.png')
+
+    compositor.update_highlight([i for i, label in enumerate(labels) if label.startswith('a')], [])
+    assert_matches_golden(compositor.buffer, 'labels_highlighted.png')
+
+
+def test_dirty_updates_match_full_paint():
+    """Random highlight deltas re-blit only dirty rects, result equals a full repaint"""
+    rng = random.Random(8)
+    size = (640, 400)
+    positions = [(rng.randrange(-20, 600), rng.randrange(-10, 380)) for _ in range(150)]
+    labels = LabelGenerator().generate_labels(len(positions))
+    compositor = LabelCompositor(size, atlas())
+    compositor.compose(positions, labels)
+    highlighted = [False] * len(labels)
+
+    for _ in range(30):
+        chosen = rng.sample(range(len(labels)), 20)
+        added = [i for i in chosen if not highlighted[i]]
+        removed = [i for i in chosen if highlighted[i]]
+        dirty = compositor.update_highlight(added, removed)
+        assert len(dirty) == len(chosen)
+        for i in chosen:
+            highlighted[i] = not highlighted[i]
+        assert compositor.buffer.tobytes() == paint(positions, labels, highlighted, size).tobytes()
+
+    assert compositor.update_highlight([], []) == []
+    compositor.clear()
+    assert compositor.buffer.getbbox() is None
+
+
+def test_upload_plan():
+    """Dirty rects become one patch each; many or large ones mean a full upload"""
+    size = (1920, 1080)
+    corners = [(0, 0, 35, 26), (1885, 1054, 1920, 1080)]
+    assert upload_plan(corners, size, max_patches=64) == corners, "No near-monitor-size union"
+    assert upload_plan([(-10, -5, 25, 21), (0, 0, 35, 26), (0, 0, 35, 26), (1920, 0, 1955, 26)], size, 64) == \
+        [(0, 0, 25, 21), (0, 0, 35, 26)], "Clipped, deduplicated, off-buffer rects dropped"
+    assert upload_plan(corners, size, max_patches=1) is None, "Patch budget exhausted"
+    assert upload_plan([(0, 0, 1920, 600)], size, max_patches=64) is None, "Large area: full upload"
+    assert upload_plan([], size, max_patches=0) == []
+
+
+def test_color_key_background():
+    """Color-keyed overlays: only label pixels are opaque, no label pixel is the key"""
+    positions, labels = scene()
+    compositor = LabelCompositor((360, 130), atlas(), background=COLOR_KEY)
+    compositor.compose(positions, labels)
+    compositor.update_highlight([i for i, label in enumerate(labels) if label.startswith('a')], [])
+
+    width, height = atlas().size
+    covered = set()
+    for x, y in positions:
+        covered.update((px, py) for px in range(max(x, 0), min(x + width, 360))
+                       for py in range(max(y, 0), min(y + height, 130)))
+    pixels = compositor.buffer.load()
+    for py in range(130):
+        for px in range(360):
+            assert (pixels[px, py] == COLOR_KEY) != ((px, py) in covered), (px, py)
+
+    compositor.clear()
+    assert compositor.buffer.getcolors() == [(360 * 130, COLOR_KEY)]
+
+
+def test_compose_benchmark():
+    """Benchmark: compose 300 labels and re-blit a keystroke's highlight delta"""
+    print("\n" + "=" * 60)
+    print("BENCHMARK: Label compositing (300 labels, 1920x1080 buffer)")
+    print("=" * 60)
+
+    elements = [ElementRecord(60 + (i % 25) * 72, 20 + (i // 25) * 80, 100 + (i % 25) * 72, 50 + (i // 25) * 80,
+                              'Button', '') for i in range(300)]
+    labels = LabelGenerator().generate_labels(len(elements))
+    positions = [left_of(e) for e in elements]
+    compositor = LabelCompositor((1920, 1080), atlas())
+    compositor.compose(positions, labels)  # Warm the atlas
+
+    start = time.perf_counter()
+    compositor.compose(positions, labels)
+    compose_time = time.perf_counter() - start
+
+    first_key = [i for i, label in enumerate(labels) if label.startswith('a')]
+    start = time.perf_counter()
+    dirty = compositor.update_highlight(first_key, [])
+    update_time = time.perf_counter() - start
+
+    print(f"   compose:          {compose_time * 1000:.2f}ms for {len(labels)} labels (one image)")
+    print(f"   first key update: {update_time * 1000:.2f}ms for {len(dirty)} dirty rects")
+    assert compose_time < 0.05
+    assert update_time < compose_time
+
+
+if __name__ == "__main__":
+    test_atlas_caches_sprites()
+    test_golden_images()
+    test_dirty_updates_match_full_paint()
+    test_upload_plan()
+    test_color_key_background()
+    test_compose_benchmark()
+    print("✅ Label renderer tests passed")
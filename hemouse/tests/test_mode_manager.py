@@ -0,0 +1,152 @@
+"""
+HEMouse Mode Manager Tests
+Transition table, cancellation, serialized events and a concurrent toggle stress test
+"""
+import sys
+import os
+import random
+import threading
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from modes.mode_manager import TRANSITIONS, Mode, ModeManager
+
+
+def test_transition_table():
+    manager = ModeManager(verbose=False)
+    assert manager.fire('exit') is None, "Nothing to exit from IDLE"
+    transition = manager.fire('hint')
+    assert (transition.old, transition.event, transition.new) == (Mode.IDLE, 'hint', Mode.HINT)
+    assert manager.fire('hint') is None and manager.can_fire('grid') and not manager.can_fire('hint')
+    assert manager.fire('grid').new == Mode.GRID
+    assert manager.fire('cancel') is None, "CapsLock OFF does not end Grid mode"
+    assert manager.switch_mode(Mode.IDLE).event == 'exit'
+    assert manager.switch_mode(Mode.IDLE) is None
+    assert manager.metrics == {'accepted': 3, 'rejected': 4, 'stale': 0}
+
+    # Future modes only need table entries
+    custom = dict(TRANSITIONS)
+    custom[(Mode.GRID, 'hint')] = Mode.HINT
+    manager = ModeManager(transitions=custom, verbose=False)
+    manager.fire('grid')
+    assert manager.fire('hint').new == Mode.HINT
+
+
+def test_leaving_a_mode_cancels_its_work():
+    manager = ModeManager(verbose=False)
+    hint = manager.fire('hint')
+    assert not hint.cancel.is_set() and manager.cancel_event is hint.cancel
+
+    # CapsLock OFF (capture thread) ends the activation ...
+    assert manager.fire('cancel').new == Mode.IDLE
+    assert hint.cancel.is_set()
+
+    # ... and the handler thread's late 'exit' for it is dropped, even after a new activation
+    again = manager.fire('hint')
+    assert manager.fire('exit', cancel=hint.cancel) is None
+    assert manager.get_current_mode() == Mode.HINT and manager.metrics['stale'] == 1
+    assert manager.fire('exit', cancel=again.cancel).new == Mode.IDLE
+
+
+def test_hint_hands_over_to_grid():
+    """Space in Hint mode: 'grid' then 'exit' with the Grid session's cancel, as HintMode fires them"""
+    manager = ModeManager(verbose=False)
+    hint = manager.fire('hint')
+    grid = manager.fire('grid', cancel=hint.cancel)
+    assert (grid.old, grid.new) == (Mode.HINT, Mode.GRID) and hint.cancel.is_set()
+    assert manager.fire('cancel') is None, "CapsLock OFF does not end the Grid session"
+    assert manager.fire('exit', cancel=grid.cancel).new == Mode.IDLE and grid.cancel.is_set()
+    assert manager.fire('exit', cancel=hint.cancel) is None, "main.py's late Hint exit is stale"
+
+    # CapsLock OFF before the Grid overlay came up: the handoff is stale
+    hint = manager.fire('hint')
+    manager.fire('cancel')
+    assert manager.fire('grid', cancel=hint.cancel) is None
+    assert manager.get_current_mode() == Mode.IDLE and manager.metrics['stale'] == 2
+
+
+def test_events_from_callbacks_are_deferred():
+    manager = ModeManager(verbose=False)
+    log = []
+    manager.register_callback('on_mode_enter', Mode.HINT,
+                              lambda: log.append(('enter hint', manager.fire('exit'))))
+    manager.register_callback('on_mode_exit', Mode.HINT, lambda: log.append(('exit hint', None)))
+
+    assert manager.fire('hint').new == Mode.HINT
+    assert log == [('enter hint', None), ('exit hint', None)], "Nested event ran after the transition"
+    assert manager.get_current_mode() == Mode.IDLE
+
+
+def test_concurrent_toggle_stress():
+    """Stress: 8 threads firing 2000 events each; transitions never interleave or break the table"""
+    print("\n" + "=" * 60)
+    print("STRESS: 16000 concurrent mode events (8 threads)")
+    print("=" * 60)
+
+    manager = ModeManager(verbose=False)
+    inside = []  # Threads currently in a transition
+    overlaps = []
+    entered = []
+
+    def on_exit():
+        inside.append(threading.current_thread())
+        if len(inside) > 1:
+            overlaps.append(len(inside))
+        time.sleep(0)  # Let other threads run mid-transition
+
+    def on_enter():
+        entered.append(manager.get_current_mode())
+        inside.pop()
+
+    for mode in Mode:
+        manager.register_callback('on_mode_exit', mode, on_exit)
+        manager.register_callback('on_mode_enter', mode, on_enter)
+
+    results = []
+    barrier = threading.Barrier(8)
+
+    def toggler(seed):
+        rng = random.Random(seed)
+        barrier.wait()
+        for _ in range(2000):
+            if rng.random() < 0.6:
+                transition = manager.fire(rng.choice(('hint', 'cancel', 'grid', 'exit')))
+            else:
+                # Like main.py: end only the activation seen last (stale if another thread got there first)
+                transition = manager.fire('exit', cancel=results[-1].cancel if results else None)
+            if transition:
+                results.append(transition)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=toggler, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"   {elapsed * 1000:.0f}ms; {manager.report()}".replace('\n', '\n   '))
+    metrics = manager.metrics
+    assert not overlaps, "Transitions interleaved"
+    assert metrics['accepted'] + metrics['rejected'] + metrics['stale'] == 16000
+    assert metrics['accepted'] == len(results) == len(entered) > 1000
+
+    # Modes entered (in order, under the lock) form a path through the table
+    assert all(TRANSITIONS[(t.old, t.event)] == t.new for t in results)
+    legal = {(old, new) for (old, _), new in TRANSITIONS.items()}
+    assert all(step in legal for step in zip([Mode.IDLE] + entered, entered))
+    # Only the current mode's cancel event is still clear
+    assert sum(not t.cancel.is_set() for t in results) == 1
+    assert manager.cancel_event is next(t.cancel for t in results if not t.cancel.is_set())
+    assert sum(sum(buckets.values()) for buckets in manager.histograms().values()) == metrics['accepted']
+
+
+if __name__ == "__main__":
+    test_transition_table()
+    test_leaving_a_mode_cancels_its_work()
+    test_hint_hands_over_to_grid()
+    test_events_from_callbacks_are_deferred()
+    test_concurrent_toggle_stress()
+    print("✅ Mode manager tests passed")
@@ -0,0 +1,105 @@
+"""
+HEMouse Monitor Tests
+Monitor mapping, cached enumeration and per-monitor surface memory
+"""
+import sys
+import os
+import random
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.element_record import ElementRecord
+from ui.label_placement import LabelPlacer
+from ui.monitors import MonitorCache, monitor_index, surface_bytes
+
+
+# Primary 1920x1080, a 2560x1440 monitor to its left and a portrait one to its right
+MONITORS = [(0, 0, 1920, 1080), (-2560, -360, 0, 1080), (1920, -200, 3000, 1720)]
+
+# Three 4K monitors side by side
+TRIPLE_4K = [(i * 3840, 0, (i + 1) * 3840, 2160) for i in range(3)]
+
+
+def test_monitor_index():
+    assert monitor_index((100, 100, 200, 130), MONITORS) == 0
+    assert monitor_index((-500, -300, -400, -280), MONITORS) == 1
+    assert monitor_index((2500, 1500, 2600, 1530), MONITORS) == 2
+    # Straddling two monitors: the centre decides
+    assert monitor_index((1900, 500, 1960, 530), MONITORS) == 2
+    assert monitor_index((1880, 500, 1930, 530), MONITORS) == 0
+    # Off every monitor (e.g. a stale rect): the nearest one
+    assert monitor_index((500, 1200, 600, 1230), MONITORS) == 0
+    assert monitor_index((100, 100, 200, 130), []) is None
+
+
+def test_surface_bytes():
+    assert surface_bytes((0, 0, 1920, 1080)) == 1920 * 1080 * 4
+    assert surface_bytes((-2560, -360, 0, 1080)) == 2560 * 1440 * 4
+    assert surface_bytes((10, 10, 5, 5)) == 0
+
+
+def test_cache_enumerates_only_on_display_change():
+    calls = []
+    layout = {'monitors': MONITORS[:1], 'signature': 1}
+
+    def enumerate_monitors():
+        calls.append(1)
+        return [list(rect) for rect in layout['monitors']]
+
+    cache = MonitorCache(enumerate_monitors, lambda: layout['signature'])
+    assert cache.refresh() and cache.monitors == [MONITORS[0]]
+    for _ in range(10):
+        assert not cache.refresh()
+    assert len(calls) == 1
+
+    # Monitor plugged in
+    layout['monitors'], layout['signature'] = MONITORS, 2
+    assert cache.refresh() and cache.monitors == MONITORS
+    assert len(calls) == 2
+
+    cache.invalidate()
+    assert cache.refresh() and len(calls) == 3
+
+
+def test_labels_in_monitor_coordinates():
+    """Placement in screen coordinates, then each label moves into its own monitor's window"""
+    placer = LabelPlacer((35, 26), monitors=MONITORS)
+    elements = [ElementRecord(-2400, -300, -2300, -270, 'Button', 'Left'),
+                ElementRecord(2000, -150, 2100, -120, 'Button', 'Right')]
+    for elem, (x, y) in zip(elements, placer.place(elements)):
+        left, top, right, bottom = MONITORS[monitor_index((elem.left, elem.top, elem.right, elem.bottom), MONITORS)]
+        local_x, local_y = x - left, y - top
+        assert 0 <= local_x <= right - left - 35 and 0 <= local_y <= bottom - top - 26
+
+
+def test_surface_memory_triple_4k():
+    """Metric: surface memory when labels sit on one monitor of three"""
+    print("\n" + "=" * 60)
+    print("METRIC: Overlay surface memory (3x 4K, labels on one monitor)")
+    print("=" * 60)
+
+    rng = random.Random(19)
+    elements = []
+    for _ in range(300):
+        x, y = rng.randrange(3840, 7600), rng.randrange(0, 2100)
+        elements.append(ElementRecord(x, y, x + 60, y + 30, 'Button', ''))
+
+    # Windows shown: monitors holding labels (the window under the cursor is one of them)
+    shown = {monitor_index((e.left, e.top, e.right, e.bottom), TRIPLE_4K) for e in elements}
+    per_monitor = sum(surface_bytes(TRIPLE_4K[i]) for i in shown)
+    virtual = surface_bytes((0, 0, 3 * 3840, 2160))
+
+    print(f"   virtual desktop window: {virtual / 2 ** 20:.1f}MB")
+    print(f"   per-monitor windows:    {per_monitor / 2 ** 20:.1f}MB ({len(shown)} shown)")
+    assert shown == {1}
+    assert per_monitor * 3 == virtual
+
+
+if __name__ == "__main__":
+    test_monitor_index()
+    test_surface_bytes()
+    test_cache_enumerates_only_on_display_change()
+    test_labels_in_monitor_coordinates()
+    test_surface_memory_triple_4k()
+    print("✅ Monitor tests passed")
@@ -0,0 +1,117 @@
+"""
+HEMouse Overlay Reuse Tests
+Activation-to-first-paint with a fresh Tk root vs the persistent overlay,
+alpha-blended vs color-keyed overlay windows
+"""
+import sys
+import os
+import time
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.element_record import ElementRecord
+from core.label_generator import LabelGenerator
+
+
+def make_elements(count):
+    return [ElementRecord(60 + (i % 30) * 60, 20 + (i // 30) * 40, 100 + (i % 30) * 60, 50 + (i // 30) * 40,
+                          'Button', f"Button {i}") for i in range(count)]
+
+
+def overlay_class():
+    """OverlayWindow, or skip the test where there is no Windows display"""
+    try:
+        import tkinter as tk
+        from ui.overlay_window import OverlayWindow
+        tk.Tk().destroy()
+    except Exception as e:
+        pytest.skip(f"overlay needs Windows with a display ({e})")
+    return OverlayWindow
+
+
+def test_activation_benchmark():
+    """Benchmark: activation to first paint, 300 labels (needs Windows and a display)"""
+    print("\n" + "=" * 60)
+    print("BENCHMARK: Overlay activation to first paint (300 labels)")
+    print("=" * 60)
+
+    OverlayWindow = overlay_class()
+
+    elements = make_elements(300)
+    labels = LabelGenerator().generate_labels(len(elements))
+    runs = 10
+
+    # Before: new Tk root, canvas and font per activation
+    cold = 0.0
+    for _ in range(runs):
+        start = time.perf_counter()
+        overlay = OverlayWindow()
+        overlay.create()
+        overlay.draw_labels(elements, labels)
+        overlay.root.update()
+        cold += time.perf_counter() - start
+        overlay.destroy()
+
+    # After: root prepared once, shown and cleared per activation
+    overlay = OverlayWindow()
+    overlay.prepare()
+    warm = 0.0
+    for _ in range(runs):
+        start = time.perf_counter()
+        overlay.create()
+        overlay.draw_labels(elements, labels)
+        overlay.root.update()
+        warm += time.perf_counter() - start
+        overlay.hide()
+    assert not overlay.prepare(), "Root is only rebuilt when the screen layout changes"
+    overlay.destroy()
+
+    print(f"   new root per activation: {cold / runs * 1000:.1f}ms")
+    print(f"   persistent root:         {warm / runs * 1000:.1f}ms")
+    assert warm < cold, "Reusing the root should be faster"
+
+
+def test_transparency_benchmark():
+    """Benchmark: paint time and CPU, alpha vs color-keyed overlay (needs Windows and a display)"""
+    print("\n" + "=" * 60)
+    print("BENCHMARK: Alpha vs color-keyed overlay (300 labels, 20 highlight updates)")
+    print("=" * 60)
+
+    OverlayWindow = overlay_class()
+
+    elements = make_elements(300)
+    labels = LabelGenerator().generate_labels(len(elements))
+    runs = 10
+    results = {}
+
+    for transparency in ('alpha', 'colorkey'):
+        overlay = OverlayWindow(renderer='image', transparency=transparency)
+        overlay.prepare()
+        wall = cpu = 0.0
+        for _ in range(runs):
+            start, start_cpu = time.perf_counter(), time.process_time()
+            overlay.create()
+            overlay.draw_labels(elements, labels)
+            for i in range(20):
+                overlay.highlight_matches(labels[i::20])
+                overlay.root.update()
+            wall += time.perf_counter() - start
+            cpu += time.process_time() - start_cpu
+            overlay.hide()
+        results[transparency] = (overlay.transparency, wall / runs, cpu / runs)
+        overlay.destroy()
+
+    for requested, (used, wall, cpu) in results.items():
+        print(f"   {requested:8s} ({used}): paint {wall * 1000:.1f}ms, CPU {cpu * 1000:.1f}ms per activation")
+    # Desktop composition cost (DWM) is outside this process; watch it in Task Manager
+    assert results['alpha'][0] == 'alpha'
+    assert results['colorkey'][0] in ('colorkey', 'alpha'), "Falls back to alpha where unsupported"
+
+
+if __name__ == "__main__":
+    test_activation_benchmark()
+    test_transparency_benchmark()
+    print("✅ Overlay reuse tests passed")
@@ -0,0 +1,181 @@
+"""
+HEMouse Prefetch Worker Tests
+Background detection driven by a scripted foreground source
+"""
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.prefetch import PrefetchWorker, PollingForegroundSource
+from core.label_generator import LabelGenerator
+
+
+def wait_until(condition, timeout=2.0):
+    """Poll condition until true or timeout"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def make_worker(focus, detect, **kwargs):
+    source = PollingForegroundSource(get_foreground=lambda: focus['hwnd'], interval=0.005)
+    return PrefetchWorker(detect, LabelGenerator().generate_labels, source,
+                          on_battery=lambda: False, **kwargs)
+
+
+def test_prefetch_on_focus_change():
+    """Result for the focused window is ready before activation"""
+    print("\n" + "=" * 60)
+    print("TEST: Prefetch on focus change")
+    print("=" * 60)
+
+    focus = {'hwnd': 100}
+    detected = []
+
+    def detect(hwnd):
+        detected.append(hwnd)
+        return [f"element-{hwnd}-{i}" for i in range(hwnd // 100)]
+
+    worker = make_worker(focus, detect, cpu_budget=1.0)
+    worker.start()
+    try:
+        assert wait_until(lambda: worker.take(100) is not None), "Initial window not prefetched"
+        result = worker.take(100)
+        assert result.elements == ['element-100-0'] and result.labels == ['a']
+
+        focus['hwnd'] = 300
+        assert wait_until(lambda: worker.take(300) is not None), "New window not prefetched"
+        assert worker.take(100) is None, "Result for the old window must be dropped"
+        assert len(worker.take(300).labels) == 3
+        print(f"   ✅ Prefetched windows: {detected}")
+    finally:
+        worker.stop()
+
+
+def test_stale_prefetch_dropped():
+    """Focus moving during detection discards the result"""
+    focus = {'hwnd': 100}
+
+    def detect(hwnd):
+        if hwnd == 100:
+            time.sleep(0.05)
+            focus['hwnd'] = 200  # User switched away mid-detection
+        return ['x']
+
+    worker = make_worker(focus, detect, cpu_budget=1.0)
+    worker.start()
+    try:
+        assert wait_until(lambda: worker.take(200) is not None), "Follow-up window not prefetched"
+        assert worker.take(100) is None
+        assert worker.stats['stale'] >= 1, f"Stale result not counted: {worker.stats}"
+    finally:
+        worker.stop()
+
+
+def test_cpu_budget():
+    """Worker idles long enough to respect its CPU budget"""
+    print("\n" + "=" * 60)
+    print("TEST: Prefetch CPU budget")
+    print("=" * 60)
+
+    focus = {'hwnd': 1}
+    job_times = []
+
+    def busy_detect(hwnd):
+        job_times.append(time.monotonic())
+        end = time.thread_time() + 0.02
+        while time.thread_time() < end:
+            pass
+        focus['hwnd'] += 1  # Keep the worker busy with new windows
+        return []
+
+    worker = make_worker(focus, busy_detect, cpu_budget=0.25)
+    worker.start()
+    time.sleep(0.6)
+    worker.stop()
+
+    gaps = [b - a for a, b in zip(job_times, job_times[1:])]
+    assert len(job_times) >= 2, "Worker should have run several jobs"
+    # 20ms of CPU at 25% budget -> at least 80ms between job starts
+    assert min(gaps) >= 0.07, f"CPU budget not respected: gaps {gaps}"
+    print(f"   ✅ {len(job_times)} jobs, min gap {min(gaps) * 1000:.0f}ms, "
+          f"throttled {worker.stats['throttled_time'] * 1000:.0f}ms")
+
+
+def test_budget_counts_out_of_thread_work():
+    """Detection in another process (sleeping here) is budgeted like local CPU work"""
+    focus = {'hwnd': 1}
+    job_times = []
+
+    def isolated_detect(hwnd):
+        job_times.append(time.monotonic())
+        time.sleep(0.02)  # Waiting on the worker subprocess: no CPU on this thread
+        focus['hwnd'] += 1
+        return []
+
+    worker = make_worker(focus, isolated_detect, cpu_budget=0.25)
+    worker.start()
+    time.sleep(0.6)
+    worker.stop()
+
+    gaps = [b - a for a, b in zip(job_times, job_times[1:])]
+    assert len(job_times) >= 2 and min(gaps) >= 0.07, f"Budget ignored out-of-thread work: gaps {gaps}"
+    assert worker.stats['throttled_time'] > 0
+
+
+def test_changed_window_not_used():
+    """A result whose window changed since detection is dropped, not painted"""
+    focus = {'hwnd': 100}
+    state = {'scroll': 0}
+    worker = make_worker(focus, lambda hwnd: [f"element-{state['scroll']}"], cpu_budget=1.0,
+                         fingerprint=lambda hwnd: (hwnd, state['scroll']))
+    worker.start()
+    try:
+        assert wait_until(lambda: worker.take(100) is not None), "Window not prefetched"
+        assert worker.take(100).elements == ['element-0']
+
+        state['scroll'] = 1  # Window scrolled after prefetch
+        assert worker.take(100) is None, "Result with a stale fingerprint must be dropped"
+        assert worker.stats['changed'] == 1 and worker.take(100) is None
+    finally:
+        worker.stop()
+
+    # Fingerprint unavailable: the result cannot be verified and is not used
+    def failing(hwnd):
+        raise RuntimeError("window gone")
+
+    worker = make_worker(focus, lambda hwnd: ['x'], cpu_budget=1.0, fingerprint=failing)
+    worker.start()
+    try:
+        assert wait_until(lambda: worker.stats['prefetched'] == 1)
+        assert worker.take(100) is None
+    finally:
+        worker.stop()
+
+
+def test_exclude_own_windows():
+    """Excluded windows (our overlay) are never prefetched"""
+    focus = {'hwnd': 999}
+    detected = []
+    worker = make_worker(focus, lambda hwnd: detected.append(hwnd) or [],
+                         exclude=lambda hwnd: hwnd == 999)
+    worker.start()
+    time.sleep(0.1)
+    worker.stop()
+    assert detected == [], f"Excluded window was prefetched: {detected}"
+
+
+if __name__ == "__main__":
+    test_prefetch_on_focus_change()
+    test_stale_prefetch_dropped()
+    test_cpu_budget()
+    test_budget_counts_out_of_thread_work()
+    test_changed_window_not_used()
+    test_exclude_own_windows()
+    print("✅ Prefetch tests passed")
@@ -0,0 +1,98 @@
+"""
+HEMouse Element Ranking Tests
+Top-k selection by type, size, cursor distance and click history
+"""
+import sys
+import os
+import random
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.detection_engine import is_clickable_type, priority_tier
+from core.element_record import ElementRecord
+from core.label_generator import LabelGenerator
+from core.ranking import ElementRanker
+
+
+def make_dense(count, seed=1):
+    rng = random.Random(seed)
+    types = ['Button', 'Hyperlink', 'ListItem', 'TreeItem', 'Edit', 'MenuItem']
+    elements = []
+    for i in range(count):
+        x, y = rng.randrange(0, 1800), rng.randrange(0, 1000)
+        w, h = rng.choice([(16, 16), (24, 24), (80, 24), (200, 30)])
+        elements.append(ElementRecord(x, y, x + w, y + h, rng.choice(types), f"Item {i}"))
+    return elements
+
+
+def test_priority_tier():
+    assert priority_tier('Button', '') == 2 and priority_tier('SplitButton', '') == 2
+    assert priority_tier('ListItem', 'Inbox') == 1 and priority_tier('ListItem', '  ') == 0
+    assert priority_tier('Pane', 'Main') == 0
+    assert is_clickable_type('Edit', 'Search') and not is_clickable_type('Edit', '')
+
+
+def test_score_terms():
+    ranker = ElementRanker(limit=1)
+    button = ElementRecord(0, 0, 60, 30, 'Button', 'OK')
+    item = ElementRecord(0, 0, 60, 30, 'ListItem', 'OK')
+    icon = ElementRecord(0, 0, 12, 12, 'Button', 'OK')
+    far = ElementRecord(1500, 900, 1560, 930, 'Button', 'OK')
+
+    assert ranker.top_k([item, button])[0] == [1], "Type priority"
+    assert ranker.top_k([icon, button])[0] == [1], "Size"
+    assert ranker.top_k([far, button], cursor=(10, 10))[0] == [1], "Cursor distance"
+    assert ranker.top_k([button, far], cursor=(10, 10), weights=[0.0, 20.0])[0] == [1], "Click history"
+    assert ranker.top_k([button, far], k=5) == ([0, 1], []), "Nothing dropped below the limit"
+
+
+def test_top_k_matches_sort():
+    ranker = ElementRanker(limit=40)
+    rng = random.Random(2)
+    for count in (41, 100, 700):
+        elements = make_dense(count, seed=count)
+        cursor = (rng.randrange(1800), rng.randrange(1000))
+        weights = [rng.choice([0.0, 0.0, 0.0, rng.random() * 5]) for _ in elements]
+        scores = ranker.scores(elements, cursor, weights)
+
+        kept, rest = ranker.top_k(elements, cursor, weights)
+        assert len(kept) == 40 and sorted(kept + rest) == list(range(count))
+        assert rest == sorted(rest)
+        assert [scores[i] for i in kept] == sorted(scores, reverse=True)[:40]
+
+
+def test_dense_window_benchmark():
+    """Benchmark: label length and canvas items on a dense window"""
+    print("\n" + "=" * 60)
+    print("BENCHMARK: Top-k ranking (800 elements)")
+    print("=" * 60)
+
+    gen = LabelGenerator()
+    ranker = ElementRanker()
+    elements = make_dense(800)
+
+    start = time.perf_counter()
+    for _ in range(20):
+        kept, rest = ranker.top_k(elements, cursor=(900, 500))
+    rank_time = (time.perf_counter() - start) / 20
+
+    all_labels = gen.generate_labels(len(elements))
+    top_labels = gen.generate_labels(len(kept))
+    # Two canvas items (rectangle + text) per label
+    print(f"   all elements: {len(all_labels) * 2} canvas items, "
+          f"{sum(map(len, all_labels)) / len(all_labels):.2f} keys/label")
+    print(f"   top {len(kept)}:      {len(top_labels) * 2} canvas items, "
+          f"{sum(map(len, top_labels)) / len(top_labels):.2f} keys/label")
+    print(f"   ranking: {rank_time * 1000:.2f}ms")
+    assert max(map(len, top_labels)) < max(map(len, all_labels))
+    assert rank_time < 0.01
+
+
+if __name__ == "__main__":
+    test_priority_tier()
+    test_score_terms()
+    test_top_k_matches_sort()
+    test_dense_window_benchmark()
+    print("✅ Ranking tests passed")
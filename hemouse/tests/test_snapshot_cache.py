@@ -0,0 +1,85 @@
+"""
+HEMouse Snapshot Cache Tests
+Per-window snapshot reuse against a synthetic element tree
+"""
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.snapshot_cache import SnapshotCache, window_fingerprint
+from core.detection_engine import TreeWalkEngine
+from core.fake_provider import FakeElement, FakeUIAProvider, make_synthetic_tree
+
+
+def test_cache_hit_skips_detection():
+    """Unchanged window is served from cache without a traversal"""
+    print("\n" + "=" * 60)
+    print("TEST: Snapshot cache hit/miss")
+    print("=" * 60)
+
+    root = make_synthetic_tree(breadth=4, depth=3)
+    provider = FakeUIAProvider(root)
+    engine = TreeWalkEngine(provider)
+    cache = SnapshotCache()
+    key = (1001, 42, (0, 0, 800, 600))
+
+    first, hit = cache.get_or_detect(key, window_fingerprint(provider, root), lambda: engine.detect(root))
+    assert not hit and len(first) == 64, f"Expected fresh detection of 64 elements, got {len(first)}"
+
+    before = provider.round_trips
+    second, hit = cache.get_or_detect(key, window_fingerprint(provider, root), lambda: engine.detect(root))
+    revalidation_cost = provider.round_trips - before
+
+    assert hit and second is first, "Second activation should be a cache hit"
+    assert revalidation_cost == 2 + len(root.children), f"Revalidation took {revalidation_cost} round-trips"
+    assert cache.stats['hits'] == 1 and cache.stats['misses'] == 1
+    print(f"   ✅ Hit revalidated in {revalidation_cost} round-trips (full walk: {before})")
+
+    # Top-level change invalidates the snapshot
+    root.children.append(FakeElement('Button', 'New', (10, 500, 60, 530)))
+    third, hit = cache.get_or_detect(key, window_fingerprint(provider, root), lambda: engine.detect(root))
+    assert not hit and len(third) == 65, "Changed window should be detected again"
+    assert cache.stats['invalidations'] == 1
+    print("   ✅ Changed window invalidated")
+
+
+def test_fingerprint_tracks_rect():
+    """Moving the window changes the fingerprint"""
+    root = make_synthetic_tree(breadth=2, depth=2)
+    provider = FakeUIAProvider(root)
+    before = window_fingerprint(provider, root)
+    root.rect.left += 10
+    assert window_fingerprint(provider, root) != before, "Fingerprint should include window rect"
+
+
+def test_cache_eviction():
+    """LRU eviction by entry count and element budget"""
+    print("\n" + "=" * 60)
+    print("TEST: Snapshot cache eviction")
+    print("=" * 60)
+
+    cache = SnapshotCache(max_entries=3, max_elements=100)
+    for hwnd in range(4):
+        cache.put(hwnd, 'fp', [object()] * 10)
+    assert len(cache) == 3 and cache.stats['evictions'] == 1
+    assert cache.get(0, 'fp') is None, "Oldest window should be evicted"
+
+    # Touch 1 so that 2 becomes least recently used
+    assert cache.get(1, 'fp') is not None
+    cache.put(10, 'fp', [object()] * 75)
+    assert cache.element_count <= 100, f"Budget exceeded: {cache.element_count}"
+    assert cache.get(2, 'fp') is None and cache.get(1, 'fp') is not None
+    print(f"   ✅ {cache.stats['evictions']} evictions, {cache.element_count} elements cached")
+
+    # Oversized snapshot is never cached
+    cache.put(11, 'fp', [object()] * 101)
+    assert cache.get(11, 'fp') is None
+
+
+if __name__ == "__main__":
+    test_cache_hit_skips_detection()
+    test_fingerprint_tracks_rect()
+    test_cache_eviction()
+    print("✅ Snapshot cache tests passed")
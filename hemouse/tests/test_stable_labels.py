@@ -0,0 +1,181 @@
+"""
+HEMouse Stable Labels Tests
+Labels that survive element changes across activations of the same window
+"""
+import sys
+import os
+import random
+import tempfile
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.element_record import ElementRecord
+from core.label_generator import LabelGenerator
+from core.stable_labels import StableLabelStore, snapshot_fingerprints
+
+
+def make_elements(count, start=0, session=1):
+    return [ElementRecord(10 + (i % 40) * 45, 10 + (i // 40) * 35, 50 + (i % 40) * 45, 40 + (i // 40) * 35,
+                          'Button', f"Button {i}", (session, i)) for i in range(start, start + count)]
+
+
+def changed(before, after):
+    """Elements present in both snapshots whose label differs"""
+    old = {record.name: label for record, label in before}
+    return sum(1 for record, label in after if record.name in old and old[record.name] != label)
+
+
+def test_labels_survive_changes():
+    gen = LabelGenerator()
+    store = StableLabelStore(gen.charset, path='')
+    elements = make_elements(100)
+    first = store.assign('app.exe|Main', elements)
+    assert first == gen.generate_labels(100), "First activation uses the default code"
+    assert store.assign('app.exe|Main', elements) == first
+
+    # One element removed, one added: nobody else moves
+    edited = elements[:40] + elements[41:] + make_elements(1, start=500)
+    labels = store.assign('app.exe|Main', edited)
+    assert gen.verify_no_prefix_conflicts(labels) and len(set(labels)) == len(edited)
+    assert changed(zip(elements, first), zip(edited, labels)) == 0
+    assert labels[-1] == first[40], "Newcomer takes the freed label"
+
+    # Restarted app: new runtime ids, fingerprints still match
+    restarted = make_elements(100, session=2)
+    assert store.assign('app.exe|Main', restarted) == first
+
+    # Other windows are independent
+    assert store.assign('app.exe|Dialog', make_elements(3)) == ['a', 's', 'd']
+
+
+def test_returning_elements_and_duplicates():
+    store = StableLabelStore(path='')
+    base = make_elements(100)
+    menu = make_elements(5, start=200)
+    with_menu = store.assign('w', base + menu)
+
+    closed = store.assign('w', base)  # Menu closed
+    assert closed == with_menu[:100]
+    again = store.assign('w', base + menu)
+    assert again == with_menu, "Reopened menu gets its labels back"
+
+    same = [ElementRecord(10 + i * 100, 10, 50 + i * 100, 40, 'Button', 'Close') for i in range(3)]
+    fingerprints = snapshot_fingerprints(same)
+    assert len(set(fingerprints)) == 3 and not any('#' in f for f in fingerprints), "Told apart by position"
+    labels = store.assign('tabs', same)
+    assert len(set(labels)) == 3
+    # Traversal order changed (new session, no runtime ids): labels follow the positions
+    assert store.assign('tabs', same[::-1]) == labels[::-1]
+
+
+def test_bounds_and_persistence():
+    store = StableLabelStore(path='', max_windows=2, max_entries=50)
+    for start in range(0, 200, 20):
+        store.assign('w', make_elements(20, start=start))
+    assert len(store._windows['w']['labels']) <= 50, "Oldest elements forgotten"
+
+    store.assign('x', make_elements(5))
+    store.assign('y', make_elements(5))
+    assert len(store) == 2 and 'w' not in store._windows, "LRU window evicted"
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'labels.json')
+        elements = make_elements(60)
+        saved = StableLabelStore(path=path, save_delay=0.05)
+        labels = saved.assign('notepad.exe|Notepad', elements[5:])
+        assert not os.path.exists(path), "assign() must not write the file itself"
+        deadline = time.monotonic() + 2.0
+        while not os.path.exists(path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert os.path.exists(path), "Background save did not run"
+        all_labels = saved.assign('notepad.exe|Notepad', elements)
+        saved.flush()  # On exit
+        assert StableLabelStore(path=path).assign('notepad.exe|Notepad', elements) == all_labels
+        reloaded = StableLabelStore(path=path)
+        assert reloaded.assign('notepad.exe|Notepad', elements[5:], weights=None) == labels
+        reloaded.reset()
+        assert len(StableLabelStore(path=path)) == 0
+
+
+def test_full_store_benchmark():
+    """Benchmark: assign() with a full store (32 windows x 2000 entries) and a file behind it"""
+    print("\n" + "=" * 60)
+    print("BENCHMARK: Stable labels assign with a full store (file-backed)")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'labels.json')
+        store = StableLabelStore(path=path, save_delay=60.0)
+        pool = make_elements(4000)
+        for window in range(32):
+            for start in (0, 1000, 2000):
+                store.assign(f"app{window}.exe|Main", pool[start:start + 1000])
+        assert all(len(w['labels']) == 2000 for w in store._windows.values())
+
+        runs = 20
+        start = time.perf_counter()
+        for i in range(runs):
+            store.assign('app31.exe|Main', pool[i * 10:i * 10 + 300])
+        per_assign = (time.perf_counter() - start) / runs
+
+        start = time.perf_counter()
+        store.flush()
+        flush_time = time.perf_counter() - start
+
+    print(f"   assign (300 elements): {per_assign * 1000:.2f}ms, file write off the paint path: "
+          f"{flush_time * 1000:.0f}ms")
+    assert per_assign < 0.02
+
+
+def test_churn_benchmark():
+    """Benchmark: labels changed per activation under small element churn"""
+    print("\n" + "=" * 60)
+    print("BENCHMARK: Stable labels (500 elements, 2% churn per activation)")
+    print("=" * 60)
+
+    rng = random.Random(11)
+    gen = LabelGenerator()
+    store = StableLabelStore(gen.charset, path='', autosave=False)
+    pool = make_elements(2000)
+    current = pool[:500]
+    next_new = 500
+
+    plain_changed = stable_changed = 0
+    assign_time = 0.0
+    previous_plain = list(zip(current, gen.generate_labels(len(current))))
+    previous_stable = list(zip(current, store.assign('w', current)))
+    activations = 50
+
+    for _ in range(activations):
+        for _ in range(10):
+            if rng.random() < 0.5 and len(current) > 400:
+                current.pop(rng.randrange(len(current)))
+            else:
+                current.insert(rng.randrange(len(current) + 1), pool[next_new])
+                next_new += 1
+
+        plain = list(zip(current, gen.generate_labels(len(current))))
+        start = time.perf_counter()
+        stable = list(zip(current, store.assign('w', current)))
+        assign_time += time.perf_counter() - start
+
+        plain_changed += changed(previous_plain, plain)
+        stable_changed += changed(previous_stable, stable)
+        previous_plain, previous_stable = plain, stable
+
+    print(f"   count + order:   {plain_changed / activations:.1f} labels changed per activation")
+    print(f"   stable mapping:  {stable_changed / activations:.1f} labels changed per activation")
+    print(f"   assign: {assign_time / activations * 1000:.2f}ms per activation")
+    assert stable_changed < plain_changed / 10, "Most labels should stay put"
+    assert assign_time / activations < 0.02
+
+
+if __name__ == "__main__":
+    test_labels_survive_changes()
+    test_returning_elements_and_duplicates()
+    test_bounds_and_persistence()
+    test_full_store_benchmark()
+    test_churn_benchmark()
+    print("✅ Stable labels tests passed")
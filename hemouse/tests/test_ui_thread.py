@@ -0,0 +1,184 @@
+"""
+HEMouse UI Thread Tests
+Command queue, after() polling and latency of the single Tk thread
+"""
+import sys
+import os
+import heapq
+import itertools
+import threading
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ui.ui_thread import UIThread
+
+
+class SchedulerRoot:
+    """Stand-in for a hidden Tk root: after()/after_idle() timers and a mainloop"""
+
+    def __init__(self):
+        self._timers = []
+        self._ids = itertools.count()
+        self._quit = False
+        self.thread = None
+        self.destroyed = False
+
+    def withdraw(self):
+        pass
+
+    def after(self, ms, func, *args):
+        timer_id = next(self._ids)
+        heapq.heappush(self._timers, (time.perf_counter() + ms / 1000, timer_id, func, args))
+        return timer_id
+
+    def after_idle(self, func, *args):
+        return self.after(0, func, *args)
+
+    def after_cancel(self, timer_id):
+        self._timers = [t for t in self._timers if t[1] != timer_id]
+        heapq.heapify(self._timers)
+
+    def mainloop(self):
+        self.thread = threading.current_thread()
+        self._quit = False
+        while not self._quit:
+            if self._timers and self._timers[0][0] <= time.perf_counter():
+                _, _, func, args = heapq.heappop(self._timers)
+                func(*args)
+            else:
+                time.sleep(0.0005)
+
+    def quit(self):
+        self._quit = True
+
+    def destroy(self):
+        self.destroyed = True
+
+
+def start(setup=None, poll_interval=0.01):
+    root = SchedulerRoot()
+    ui = UIThread(setup=setup, poll_interval=poll_interval, root_factory=lambda: root)
+    ui.start()
+    return ui, root
+
+
+def test_commands_run_in_order_on_ui_thread():
+    prepared = []
+    ui, root = start(setup=prepared.append)
+    assert prepared == [root]
+
+    seen = []
+    futures = [ui.submit(lambda i=i: seen.append((i, threading.current_thread()))) for i in range(20)]
+    for future in futures:
+        future.result(1.0)
+    assert [i for i, _ in seen] == list(range(20))
+    assert all(thread is ui.thread for _, thread in seen)
+    assert ui.call(lambda a, b: a + b, 2, 3, timeout=1.0) == 5
+
+    stats = ui.latency_stats()
+    ui.stop()
+    assert stats['count'] == 21 and stats['queue_depth'] == 0
+    assert root.destroyed and not ui.thread.is_alive()
+
+
+def test_errors_reach_the_caller():
+    ui, _ = start()
+
+    def fail():
+        raise ValueError("boom")
+
+    future = ui.submit(fail)
+    try:
+        future.result(1.0)
+        raise AssertionError("Exception not propagated")
+    except ValueError:
+        pass
+    assert ui.call(lambda: 'still running', timeout=1.0) == 'still running'
+    ui.stop()
+
+    def broken_root():
+        raise RuntimeError("no display")
+
+    try:
+        UIThread(root_factory=broken_root).start()
+        raise AssertionError("Start failure not reported")
+    except RuntimeError as e:
+        assert "no display" in str(e)
+
+
+def test_call_from_ui_thread_runs_directly():
+    ui, _ = start()
+    # Would deadlock if queued: the UI thread would wait for itself
+    assert ui.call(lambda: ui.call(lambda: 42), timeout=1.0) == 42
+    ui.stop()
+
+
+def test_run_mode_waits_for_on_exit():
+    ui, root = start()
+    events = []
+
+    def activate(on_exit):
+        # Like HintMode.activate(on_exit=...): returns once shown, ends later from a Tk callback
+        events.append('shown')
+        root.after(30, lambda: (events.append('hidden'), on_exit()))
+
+    start_time = time.perf_counter()
+    assert ui.run_mode(activate, timeout=1.0)
+    assert events == ['shown', 'hidden'] and time.perf_counter() - start_time >= 0.03
+
+    # Commands from other threads still run while a mode is shown
+    ended = threading.Event()
+    ui.call(lambda: root.after(100, ended.set))
+    assert ui.call(lambda: 'served', timeout=0.05) == 'served'
+    assert ended.wait(1.0)
+    ui.stop()
+
+
+def test_command_latency_benchmark():
+    """Benchmark: submit-to-run latency from 4 threads (after() polling every 10ms)"""
+    print("\n" + "=" * 60)
+    print("BENCHMARK: UI command latency (4 submitting threads)")
+    print("=" * 60)
+
+    roots = {'scheduler': SchedulerRoot}
+    try:
+        import tkinter as tk
+        tk.Tk().destroy()
+        roots['tk'] = None  # UIThread's own hidden Tk root
+    except Exception as e:
+        print(f"   ⚠️ Real Tk skipped: needs a display ({e})")
+
+    for name, factory in roots.items():
+        ui = UIThread(poll_interval=0.01, **({'root_factory': factory} if factory else {}))
+        ui.start()
+        order = {n: [] for n in range(4)}
+
+        def submitter(n):
+            for i in range(50):
+                ui.submit(order[n].append, i)
+                time.sleep(0.001)
+
+        threads = [threading.Thread(target=submitter, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        ui.call(lambda: None, timeout=1.0)
+        stats = ui.latency_stats()
+        ui.stop()
+
+        print(f"   {name:9s}: {stats['count']} commands, mean {stats['mean_ms']:.2f}ms, "
+              f"max {stats['max_ms']:.2f}ms")
+        assert all(order[n] == list(range(50)) for n in order), "Per-thread order kept"
+        assert stats['mean_ms'] < 15
+
+
+if __name__ == "__main__":
+    test_commands_run_in_order_on_ui_thread()
+    test_errors_reach_the_caller()
+    test_call_from_ui_thread_runs_directly()
+    test_run_mode_waits_for_on_exit()
+    test_command_latency_benchmark()
+    print("✅ UI thread tests passed")